@@ -18,8 +18,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+import sys
+
 from tomoxrd import app, __version__
 
 
 if __name__ == "__main__":
-    app.run(version=__version__)
+    # --benchmark-startup prints the time to the first paint and to the connected hardware, then exits
+    app.run(version=__version__, benchmark="--benchmark-startup" in sys.argv)
@@ -18,15 +18,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-from qtpy.QtCore import Qt
-from qtpy.QtWidgets import QApplication
+import time
+from typing import Any
 
 from tomoxrd import _version
-from tomoxrd.controller import MainController
 
-# Enable high DPI support
-QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
-QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+# Reference for the time to the first paint of the window
+_started_at = time.perf_counter()
 
 # Version number based on git tags
 __version__ = _version.get_versions()["version"]
@@ -35,5 +33,25 @@ __version__ = _version.get_versions()["version"]
 if __version__ == "0+unknown":
     __version__ = "0.0.4"
 
-# Application controller
-app = MainController()
+
+def create_app() -> Any:
+    """Creates the GUI application controller."""
+    from qtpy.QtCore import Qt
+    from qtpy.QtWidgets import QApplication
+    from tomoxrd.controller import MainController
+
+    # Enable high DPI support
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+
+    return MainController(started_at=_started_at)
+
+
+def __getattr__(name: str) -> Any:
+    # The application controller is created on first access, so that importing the package
+    # for headless use does not build the QApplication and the widgets.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,320 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import argparse
+import datetime
+import os
+import sys
+from typing import List, Optional
+
+from tomoxrd.controller import HeadlessController
+from tomoxrd.model import (
+    CbfArchiveModel,
+    PathModel,
+    ScanCatalogModel,
+    ScanQueueModel,
+    ScanQueueItem,
+    ScanSimulatorModel,
+    ScanTimingModel,
+    ScanHistoryModel,
+)
+
+
+def _parse_point(value: str) -> dict:
+    """Parses a NAME:X:Y:Z collection point, empty coordinates keep the current stage position."""
+    parts = value.split(":")
+    if len(parts) != 4 or not parts[0]:
+        raise argparse.ArgumentTypeError(f"Invalid collection point '{value}', expected NAME:X:Y:Z.")
+
+    point = {"name": parts[0]}
+    try:
+        for axis, coordinate in zip(("x", "y", "z"), parts[1:]):
+            point[axis] = float(coordinate) if coordinate else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid coordinates in collection point '{value}'.")
+    return point
+
+
+def _parse_date(value: str) -> float:
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+def _add_scan_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("collection_type", choices=["Still", "Step", "Wide"], type=str.capitalize)
+    parser.add_argument("--exposure", type=float, required=True, help="Exposure time in seconds.")
+    parser.add_argument("--start", type=float, help="Omega range start.")
+    parser.add_argument("--end", type=float, help="Omega range end.")
+    parser.add_argument("--step", type=float, help="Omega step size (Step collections only).")
+    parser.add_argument("--filename", required=True)
+    parser.add_argument("--filepath", required=True)
+    parser.add_argument("--frame", type=int, default=1, help="Starting frame number.")
+    parser.add_argument("--no-crysalis", action="store_true", help="Skip the esperanto conversion.")
+    parser.add_argument(
+        "--point", type=_parse_point, action="append", default=[], help="Collection point as NAME:X:Y:Z."
+    )
+    parser.add_argument(
+        "--burst", action="store_true", help="Collect the Still points in a single detector series."
+    )
+    parser.add_argument(
+        "--recollect", action="store_true", help="Collect the points with missing frames again right away."
+    )
+
+
+def _create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="tomoxrd-collect", description="Runs TomoXRD collections without the graphical interface."
+    )
+    parser.add_argument("--queue", help="Path of the scan queue file.")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    collect_parser = subparsers.add_parser("collect", help="Run a single collection now.")
+    _add_scan_arguments(collect_parser)
+    collect_parser.add_argument(
+        "--dry-run", action="store_true", help="Only simulate the collection and print its timeline."
+    )
+    _add_scan_arguments(subparsers.add_parser("add", help="Append a collection to the scan queue."))
+
+    run_parser = subparsers.add_parser("run", help="Collect the pending items of the scan queue.")
+    run_parser.add_argument(
+        "--keep-alive", action="store_true", help="Wait for new items when the queue is empty."
+    )
+
+    subparsers.add_parser("list", help="List the items of the scan queue.")
+    subparsers.add_parser("history", help="Show the overheads learned from the scan history.")
+
+    catalog_parser = subparsers.add_parser("catalog", help="Search the catalog of the collected points.")
+    catalog_parser.add_argument("--sample", help="Base file name of the collection.")
+    catalog_parser.add_argument("--point", help="Collection point name.")
+    catalog_parser.add_argument("--type", dest="collection_type", type=str.capitalize, help="Collection type.")
+    catalog_parser.add_argument("--since", type=_parse_date, help="First day, as YYYY-MM-DD.")
+    catalog_parser.add_argument("--until", type=_parse_date, help="Day after the last day, as YYYY-MM-DD.")
+    catalog_parser.add_argument("--limit", type=int, default=50, help="Number of the newest points shown.")
+    catalog_parser.add_argument("--csv", help="Export all the matching points to a CSV file instead.")
+
+    extract_parser = subparsers.add_parser("extract", help="Extract .cbf files from a CBF archive.")
+    extract_parser.add_argument("archive", help="Path of the .cbfpack archive.")
+    extract_parser.add_argument("names", nargs="*", help="Names of the files to extract, all if none are given.")
+    extract_parser.add_argument("--output", default=".", help="Directory of the extracted files.")
+
+    return parser
+
+
+def _item_from_arguments(args: argparse.Namespace) -> ScanQueueItem:
+    filepath = args.filepath.replace("\\", "/")
+    if not filepath.endswith("/"):
+        filepath += "/"
+
+    return ScanQueueItem(
+        exposure=args.exposure,
+        collection_type=args.collection_type,
+        start=args.start,
+        end=args.end,
+        step=args.step,
+        filename=args.filename,
+        filepath=filepath,
+        frame=args.frame,
+        crysalis=not args.no_crysalis,
+        points=args.point,
+        burst=args.burst,
+        recollect=args.recollect,
+    )
+
+
+def _validate_item(item: ScanQueueItem) -> Optional[str]:
+    if item.collection_type != "Still" and (item.start is None or item.end is None):
+        return f"{item.collection_type} collections require --start and --end."
+    if item.collection_type == "Step" and item.step is None:
+        return "Step collections require --step."
+    return None
+
+
+def _format_timestamp(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    return datetime.datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _list_queue(queue: ScanQueueModel) -> None:
+    for item in queue.items():
+        duration = "-" if item.duration is None else f"{item.duration:.1f}s"
+        print(
+            f"{item.item_id}  {item.status:<11}  {item.collection_type:<5}  {item.filename:<24}  "
+            f"points={len(item.points) or 1:<4}  started={_format_timestamp(item.started_at)}  "
+            f"duration={duration}  {item.message}"
+        )
+
+
+def _format_seconds(seconds: float) -> str:
+    sign = "-" if seconds < 0 else ""
+    return f"{sign}{datetime.timedelta(seconds=round(abs(seconds)))}"
+
+
+def _show_history(history: ScanHistoryModel) -> None:
+    """Prints the fitted overheads and their drift for every collection type."""
+    for collection_type in ("Still", "Step", "Wide"):
+        fit = history.fit(collection_type)
+        if fit is None:
+            print(f"{collection_type:<5}  not enough points")
+            continue
+
+        drift = history.drift(collection_type)
+        drift = "-" if drift is None else f"{drift * 1000:+.2f}ms/frame/h"
+        print(
+            f"{collection_type:<5}  points={fit.samples:<4}  frame={fit.frame_dead_time * 1000:+.2f}ms  "
+            f"point={fit.point_cost:+.2f}s  drift={drift}"
+        )
+
+    for collection_type in ("Still", "Step", "Wide"):
+        timing = history.frame_timing(collection_type)
+        if timing is None:
+            continue
+        print(
+            f"{collection_type:<5}  points={timing['points']:<4}  {timing['frames_per_second']:.2f}frames/s  "
+            f"period={timing['period'] * 1000:.1f}ms  jitter={timing['jitter'] * 1000:.2f}ms  "
+            f"dead={timing['dead_time'] * 1000:.1f}ms  excess={timing['excess'] * 1000:+.1f}ms"
+        )
+
+    conversions = history.records(kind="conversion")
+    if conversions:
+        seconds = sum(record["phases"]["conversion"] for record in conversions)
+        frames = sum(record["frames"] for record in conversions)
+        print(f"Conversion  {len(conversions)} scans  {seconds / max(frames, 1) * 1000:.1f}ms/frame")
+
+
+def _simulate(item: ScanQueueItem, history: ScanHistoryModel) -> None:
+    """Prints the simulated timeline of a collection, without moving any motors."""
+    start, end, step = item.start, item.end, item.step
+    if item.collection_type == "Still":
+        start, end, step = None, None, None
+    elif item.collection_type == "Wide":
+        step = None
+
+    points = [(point["name"], point.get("x"), point.get("y"), point.get("z")) for point in item.points]
+    # Only reads, the overheads are measured with writes to the detector and PSO of a possibly running scan
+    simulator = ScanSimulatorModel(ScanTimingModel.from_epics(measure_overheads=False))
+    simulator.calibrate_from_history(history)
+    timeline = simulator.simulate(
+        exposure=item.exposure,
+        start=start,
+        end=end,
+        step=step,
+        points=points or None,
+        cbf_collection=item.crysalis,
+        burst=item.burst,
+    )
+
+    for phase in timeline.phases:
+        print(f"{phase.start:10.2f}s  {phase.duration:9.2f}s  {phase.name:<12}  {phase.point or ''}")
+    for name, seconds in timeline.phase_totals().items():
+        print(f"{name:<12} {_format_seconds(seconds)}")
+    print(f"{'total':<12} {_format_seconds(timeline.total)}")
+
+
+def _search_catalog(catalog: ScanCatalogModel, args: argparse.Namespace) -> None:
+    """Prints the newest matching points of the catalog, or exports all of them."""
+    filters = {
+        "sample": args.sample,
+        "point": args.point,
+        "collection_type": args.collection_type,
+        "since": args.since,
+        "until": args.until,
+    }
+    if args.csv:
+        print(f"Exported {catalog.export_csv(args.csv, **filters)} points to {args.csv}")
+        return None
+
+    for row in catalog.collections(**filters, limit=args.limit):
+        frames = "-" if row["first_frame"] is None else f"{row['first_frame']}-{row['last_frame']}"
+        print(
+            f"{_format_timestamp(row['timestamp'])}  {row['collection_type']:<5}  {row['sample'] or '-':<24}  "
+            f"{row['point'] or '-':<8}  frames={frames:<11}  {_format_seconds(row['duration'] or 0.0)}  "
+            f"esperanto={row['esperanto'] or '-'}{'  aborted' if row['aborted'] else ''}"
+        )
+
+
+def _extract(path: str, names: List[str], output: str) -> int:
+    """Extracts the given files of a CBF archive, or all of them."""
+    archive = CbfArchiveModel()
+    try:
+        _, entries = archive.read_index(path)
+        for name in names or [entry.name for entry in entries]:
+            with open(os.path.join(output, name), "wb") as file:
+                file.write(archive.extract(path, name))
+    except (OSError, KeyError, ValueError) as error:
+        print(f"[Archive-Error] - {error}")
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _create_parser().parse_args(argv)
+    data_path = PathModel().data_path
+    queue_filepath = args.queue or os.path.join(data_path, "scan_queue.jsonl")
+    history = ScanHistoryModel(os.path.join(data_path, "scan_history.jsonl"))
+
+    if args.command == "list":
+        _list_queue(ScanQueueModel(queue_filepath))
+        return 0
+
+    if args.command == "history":
+        _show_history(history)
+        return 0
+
+    if args.command == "catalog":
+        _search_catalog(ScanCatalogModel(os.path.join(data_path, "scan_catalog.sqlite")), args)
+        return 0
+
+    if args.command == "extract":
+        return _extract(args.archive, names=args.names, output=args.output)
+
+    if args.command in ("collect", "add"):
+        item = _item_from_arguments(args)
+        error = _validate_item(item)
+        if error is not None:
+            print(f"[Argument-Error] - {error}")
+            return 2
+
+        if args.command == "collect" and args.dry_run:
+            _simulate(item, history)
+            return 0
+
+        if args.command == "add":
+            ScanQueueModel(queue_filepath).append(item)
+            print(f"Queued {item.item_id}")
+            return 0
+
+    controller = HeadlessController(queue_filepath=queue_filepath)
+    try:
+        if args.command == "collect":
+            controller.collect_item(item)
+            print(f"Collection {item.item_id} {item.status} {item.message}")
+            return 0 if item.status == "done" else 1
+
+        controller.run_queue(keep_alive=args.keep_alive)
+        return 0
+    finally:
+        controller.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
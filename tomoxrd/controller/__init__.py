@@ -21,5 +21,7 @@
 from tomoxrd.controller.filename_controller import FilenameController
 from tomoxrd.controller.detector_settings_controller import DetectorSettingsController
 from tomoxrd.controller.scanning_controller import ScanningController
+from tomoxrd.controller.scan_queue_controller import ScanQueueController
+from tomoxrd.controller.headless_controller import HeadlessController
 from tomoxrd.controller.collection_status_controller import CollectionStatusController
 from tomoxrd.controller.main_controller import MainController
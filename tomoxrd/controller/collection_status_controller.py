@@ -19,11 +19,10 @@
 # ----------------------------------------------------------------------
 
 import threading
-import time
 from epics import caput
 from qtpy.QtCore import QObject, Signal
 
-from tomoxrd.model import MainModel
+from tomoxrd.model import MainModel, ScanState, ScanStateModel
 from tomoxrd.widget import MainWidget
 from tomoxrd.controller import ScanningController
 
@@ -31,11 +30,7 @@ from tomoxrd.controller import ScanningController
 class CollectionStatusController(QObject):
     _moving_to_tomo: Signal = Signal(bool)
     _moving_to_xrd: Signal = Signal(bool)
-
-    _tomo_thread_is_running: bool = False
-    _xrd_thread_is_running: bool = False
-    _move_tomo_aborted: bool = False
-    _move_xrd_aborted: bool = False
+    _status_message_changed: Signal = Signal(str)
 
     def __init__(self, model: MainModel, widget: MainWidget, controller: ScanningController) -> None:
         super(CollectionStatusController, self).__init__()
@@ -44,6 +39,9 @@ class CollectionStatusController(QObject):
         self._widget = widget
         self._controller = controller
 
+        # Shared by the tomo and XRD moves, only one of them can run at a time
+        self._positioning = ScanStateModel()
+
         self._connect_collection_status_widgets()
 
     def _connect_collection_status_widgets(self) -> None:
@@ -54,108 +52,105 @@ class CollectionStatusController(QObject):
         self._moving_to_xrd.connect(self._widget.collection_status.toggle_xrd_abort_button)
         self._moving_to_tomo.connect(self._controller.disable_gui_while_moving_to_tomo)
         self._moving_to_xrd.connect(self._controller.disable_gui_while_moving_to_xrd)
+        self._positioning.state_changed.connect(self._positioning_state_changed)
+        # The move threads never touch the widgets, the status message is queued to the GUI thread
+        self._status_message_changed.connect(self._widget.collection_status.update_status_message)
+
+    def _positioning_state_changed(self, state: str) -> None:
+        """Disables the positioning buttons from the abort until the move thread finishes."""
+        if state not in (ScanState.ABORTING.name.capitalize(), ScanState.IDLE.name.capitalize()):
+            return None
+        enabled = state == ScanState.IDLE.name.capitalize()
+        self._widget.collection_status.btn_prepare_for_tomo.setEnabled(enabled)
+        self._widget.collection_status.btn_prepare_for_xrd.setEnabled(enabled)
+
+    def _abort_positioning(self) -> None:
+        """Stops the detector move, repeated clicks are ignored."""
+        if not self._positioning.request_abort():
+            return None
+        # Set the status message
+        self._status_message_changed.emit("Aborting")
+        # Stop the movement.
+        caput("13BMD_TOMO_XPS:allstop", 1)
+        caput("13BMD:allstop.VAL", 1)
+
+    def stop_positioning(self) -> None:
+        """Aborts the running detector move, if any."""
+        if self._positioning.running:
+            self._abort_positioning()
+
+    @property
+    def positioning(self) -> bool:
+        return self._positioning.running
 
     def _toggle_tomo_clicked(self) -> None:
         if self._widget.collection_status.btn_prepare_for_tomo.text() == "Abort":
-            # Set the status message
-            self._widget.collection_status.update_status_message("Aborting")
-            # Stop the movement.
-            self._move_tomo_aborted = True
-            caput("13BMD_TOMO_XPS:allstop", 1)
-            caput("13BMD:allstop.VAL", 1)
+            self._abort_positioning()
         else:
             tomo_thread = threading.Thread(target=self._move_to_tomo_position, args=())
 
-            if not self._tomo_thread_is_running:
-                if self._move_tomo_aborted:
-                    return None
+            if self._positioning.begin(ScanState.MOVING):
                 self._moving_to_tomo.emit(True)
                 tomo_thread.start()
 
     def _move_to_tomo_position(self) -> None:
         # Set the status message
-        self._widget.collection_status.update_status_message("Moving to Tomo")
-        # Set tomo thread as running
-        self._tomo_thread_is_running = True
+        self._status_message_changed.emit("Moving to Tomo")
 
         if not self._controller.shutter_is_open():
 
             # Move the detector out
-            if not self._move_tomo_aborted:
+            if not self._positioning.aborted:
                 self._model.bmd.detector_z.move(self._model.detector_settings.detector_out, wait=True, timeout=300.0)
 
             if self._model.bmd.detector_z.readback == self._model.detector_settings.detector_out:
                 # Move detector_x to the tomo position
-                if not self._move_tomo_aborted:
+                if not self._positioning.aborted:
                     self._model.bmd.detector_x.move(self._model.detector_settings.tomo_x, wait=True, timeout=300.0)
                 # Move detector_z to the tomo position
-                if not self._move_tomo_aborted:
+                if not self._positioning.aborted:
                     self._model.bmd.detector_z.move(self._model.detector_settings.tomo_z, wait=True, timeout=300.0)
         else:
             self._model.scanning.error_message_changed.emit("Can't move to tomo when the shutter is open!!!")
 
-        # Add delay to account for users spamming the Abort button.
-        time.sleep(2.0)
         # Reset tomo thread running status
         self._moving_to_tomo.emit(False)
-        self._tomo_thread_is_running = False
-        self._move_tomo_aborted = False
+        self._positioning.end()
         # Set the status message
-        self._widget.collection_status.update_status_message("Idle")
+        self._status_message_changed.emit("Idle")
 
     def _toggle_xrd_clicked(self) -> None:
         button = self._widget.collection_status.btn_prepare_for_xrd
         if button.text() == "Abort":
-            # Set the status message
-            self._widget.collection_status.update_status_message("Aborting")
-            # Stop the movement.
-            self._move_xrd_aborted = True
-            caput("13BMD_TOMO_XPS:allstop", 1)
-            caput("13BMD:allstop.VAL", 1)
+            self._abort_positioning()
         else:
             xrd_thread = threading.Thread(target=self._move_to_xrd_position, args=())
 
-            if not self._xrd_thread_is_running:
-                if self._move_xrd_aborted:
-                    return None
+            if self._positioning.begin(ScanState.MOVING):
                 self._moving_to_xrd.emit(True)
                 xrd_thread.start()
 
     def _move_to_xrd_position(self) -> None:
         # Set the status message
-        self._widget.collection_status.update_status_message("Moving to XRD")
-        # Set XRD thread as running
-        self._xrd_thread_is_running = True
+        self._status_message_changed.emit("Moving to XRD")
 
         if not self._controller.shutter_is_open():
             # Move the detector out
-            if not self._move_tomo_aborted:
+            if not self._positioning.aborted:
                 self._model.bmd.detector_z.move(self._model.detector_settings.detector_out, wait=True, timeout=300.0)
 
             if self._model.bmd.detector_z.readback == self._model.detector_settings.detector_out:
                 # Move detector_x to the XRD position
-                if not self._move_xrd_aborted:
+                if not self._positioning.aborted:
                     self._model.bmd.detector_x.move(self._model.detector_settings.xrd_x, wait=True, timeout=300.0)
                 # Move detector_z to the XRD position
-                if not self._move_xrd_aborted:
+                if not self._positioning.aborted:
                     self._model.bmd.detector_z.move(self._model.detector_settings.xrd_z, wait=True, timeout=300.0)
         else:
             self._model.scanning.error_message_changed.emit("Can't move to XRD when the shutter is open!!!")
 
-        # Add delay to account for users spamming the Abort button.
-        time.sleep(2.0)
         # Reset XRD thread running status
         self._moving_to_xrd.emit(False)
-        self._xrd_thread_is_running = False
-        self._move_xrd_aborted = False
+        self._positioning.end()
         # Set the status message
-        self._widget.collection_status.update_status_message("Idle")
-
-    def update_collection_status(self) -> None:
-        # detector x
-        if self._model.bmd.detector_x.moving:
-            self._model.bmd.detector_x.moving = False
-
-        # detector z
-        if self._model.bmd.detector_z.moving:
-            self._model.bmd.detector_z.moving = False
+        self._status_message_changed.emit("Idle")
@@ -17,21 +17,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
-import collections
 import os
-import shutil
-import numpy as np
 from epics import caget
-from cryio import cbfimage, esperanto, crysalis
+from typing import Callable, Optional, Tuple
 
 from tomoxrd.widget import MainWidget
-
-
-class CBFNotFoundError(Exception):
-
-    def __init__(self, msg) -> None:
-        super(CBFNotFoundError, self).__init__()
-        self.msg = msg
+from tomoxrd.model import CrysalisModel
 
 
 class FilenameController:
@@ -41,66 +32,32 @@ class FilenameController:
     _tiff_file_path: str = "13PIL1MCdTe:TIFF1:FilePath"
     _base_path: str = "T:/dac_user/2022/BMD_2022-3/Tomo"
 
-    # File paths
-    _set_filepath: str = "T:/dac_user/Setup/Crysalis/pilatus_1m.set"
-    _ccd_filepath: str = "T:/dac_user/Setup/Crysalis/pilatus_1m.ccd"
-    _par_filepath: str = "T:/dac_user/Setup/Crysalis/pilatus_1m_TOMO_37keV.par"
-
-    _scans = collections.OrderedDict()
     starting_frame: int = 1
 
     def __init__(self, widget: MainWidget) -> None:
         self._widget = widget
+        self._crysalis = CrysalisModel()
 
-        current_user_path = caget(self._tiff_file_path, as_string=True).replace("/DAC", self._base_path)
-        if current_user_path[-1] != "/":
-            current_user_path += "/"
-        self._widget.filename_settings.ipt_path.setText(current_user_path)
         self._widget.filename_settings.flb_path.target_directory = self._base_path
         self._widget.filename_settings.flb_calibration.target_directory = self._base_path
-        self._widget.filename_settings.lbl_calibration_path.setText(self._par_filepath.split("/")[-1])
-
-        self._scans[0] = [
-            {
-                "count": 10,
-                "omega": 0,
-                "omega_start": 0.0,
-                "omega_end": 5.0,
-                "pixel_size": 0.172,
-                "omega_runs": None,
-                "theta": 0,
-                "kappa": 0,
-                "phi": 0,
-                "domega": 0.5,
-                "dtheta": 0,
-                "dkappa": 0,
-                "dphi": 0,
-                "center_x": 525,
-                "center_y": 514,
-                "alpha": 50,
-                "dist": 206.32,
-                "l1": 0.2952,
-                "l2": 0.2952,
-                "l12": 0.2952,
-                "b": 0.2952,
-                "mono": 0.99,
-                "monotype": 'SYNCHROTRON',
-                "chip": [1044, 1044],
-                "Exposure_time": 0.5,
-            }
-        ]
+        self._widget.filename_settings.lbl_calibration_path.setText(self._crysalis.par_filepath.split("/")[-1])
 
         self._connect_filename_settings_widgets()
-        self._update_with_current_values()
 
-    def _update_with_current_values(self) -> None:
-        """
-        Reads the current PV values for the file path and number
-        and updates the widgets.
-        """
-        file_number = caget(self._tiff_file_number)
+    def read_current_values(self) -> Tuple[str, str, int]:
+        """Reads the current PV values for the file path, name and number, runs outside the GUI thread."""
+        current_user_path = caget(self._tiff_file_path, as_string=True).replace("/DAC", self._base_path)
+        if current_user_path[-1] != "/":
+            current_user_path += "/"
         file_name = caget(self._tiff_file_name, as_string=True)
+        file_number = caget(self._tiff_file_number)
+        return current_user_path, file_name, file_number
 
+    def update_with_current_values(self, values: Tuple[str, str, int]) -> None:
+        """Updates the widgets with the values read by read_current_values."""
+        current_user_path, file_name, file_number = values
+
+        self._widget.filename_settings.ipt_path.setText(current_user_path)
         self._widget.filename_settings.ipt_filename.setText(file_name)
         self._widget.filename_settings.spin_frame_number.setValue(file_number)
 
@@ -113,7 +70,7 @@ class FilenameController:
     def _par_file_path_changed(self, state: bool) -> None:
         if state:
             new_par_path = self._widget.filename_settings.flb_calibration.file_path
-            self._par_filepath = new_par_path
+            self._crysalis.par_filepath = new_par_path
             self._widget.filename_settings.lbl_calibration_path.setText(new_par_path.split("/")[-1])
 
     def _update_file_name(self) -> None:
@@ -149,104 +106,33 @@ class FilenameController:
             self._widget.filename_settings.ipt_path.setText(current_path)
             self._widget.filename_settings.ipt_path.returnPressed.connect(self._update_file_path)
 
-    @staticmethod
-    def create_esperanto_directory(filepath: str, filename: str) -> None:
-        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
-
-        if not os.path.exists(target_directory):
-            os.makedirs(target_directory)
-
-    def create_par_file(self, filepath: str, filename: str) -> None:
-        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
-        par_file = os.path.join(target_directory, filename + ".par").replace("\\", "/")
-
-        with open(par_file, "w") as pf:
-            with open(self._par_filepath, "r") as calf:
-                for line in calf:
-                    if line.startswith("FILE CHIP"):
-                        pf.write(f"FILE CHIP {filename}.ccd\n")
-                    else:
-                        pf.write(line)
-
-    def copy_set_and_ccd_files(self, filepath: str, filename: str) -> None:
-        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
-        shutil.copy(self._set_filepath, os.path.join(target_directory, f"{filename}.set")).replace("\\", "/")
-        shutil.copy(self._ccd_filepath, os.path.join(target_directory, f"{filename}.ccd")).replace("\\", "/")
-
-    @staticmethod
-    def convert_to_square(images_array: np.ndarray) -> np.ndarray:
-        a = np.empty((1043, 31), dtype=images_array.dtype)
-        b = np.empty((1043, 32), dtype=images_array.dtype)
-        a.fill(-1)
-        b.fill(-1)
-
-        converted_images = np.hstack((b, np.hstack((images_array, a))))
-
-        c = np.empty((1, 1044), dtype=images_array.dtype)
-        c.fill(-1)
-
-        return np.vstack((converted_images, c))
-
-    def prepare_for_crysalis(
+    def create_esperanto_files(
             self,
+            filepath: str,
+            filename: str,
             num_angles: int,
             start: float,
             end: float,
             step: float,
             exposure: float,
+            is_aborted: Optional[Callable[[], bool]] = None,
+            starting_frame: Optional[int] = None,
     ) -> None:
-
-        self._scans[0][0]["count"] = num_angles
-        self._scans[0][0]["omega_start"] = start
-        self._scans[0][0]["omega_end"] = end
-        self._scans[0][0]["domega"] = step
-        self._scans[0][0]["Exposure_time"] = exposure
-
-    def convert_to_esperanto(
-            self,
-            filepath: str,
-            filename: str,
-            num_angles: int,
-    ) -> None:
-        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
-
-        for i in range(int(self.starting_frame - 1), int(self.starting_frame + num_angles - 1), 1):
-            cbf_file = os.path.join(filepath, filename + "_{0:04d}".format(i + 1) + ".cbf").replace("\\", "/")
-            esperanto_file = os.path.join(target_directory, f"{filename}_1_{i + 1}.esperanto").replace("\\", "/")
-
-            try:
-                if not os.path.exists(cbf_file):
-                    raise CBFNotFoundError(f"[CBF-Error] - {cbf_file} does not exist!")
-            except CBFNotFoundError as error:
-                print(error.msg)
-            else:
-                trans_image = np.flip(cbfimage.CbfImage(cbf_file).array, 0)
-                eps_target_image = self.convert_to_square(trans_image)
-
-                kwargs = self._scans[0][0]
-                kwargs['omega'] = kwargs['omega_start'] + kwargs['domega'] * i
-
-                esperanto.EsperantoImage().save(esperanto_file, eps_target_image, **kwargs)
-
-    def create_crysalis_exp_settings_file(self, filepath: str, filename: str) -> None:
-
-        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
-
-        run_header = crysalis.RunHeader(filename.encode(), target_directory.encode(), 1)
-        run_name = os.path.join(target_directory, filename).replace("\\", "/")
-        run_file = []
-
-        for omega_run in self._scans[0]:
-            dscr = crysalis.RunDscr(0)
-            dscr.axis = crysalis.SCAN_AXIS['OMEGA']
-            dscr.kappa = omega_run['kappa']
-            dscr.omegaphi = 0
-            dscr.start = omega_run['omega_start']
-            dscr.end = omega_run['omega_end']
-            dscr.width = omega_run['domega']
-            dscr.todo = dscr.done = omega_run['count']
-            dscr.exposure = 1
-            run_file.append(dscr)
-
-        crysalis.saveRun(run_name, run_header, run_file)
-        crysalis.saveCrysalisExpSettings(target_directory)
+        """
+        Converts the .cbf files of the latest collection to a CrysAlis esperanto dataset, starting from the
+        given frame or the current starting frame.
+        """
+        if starting_frame is None:
+            starting_frame = self.starting_frame
+
+        self._crysalis.create_esperanto_files(
+            filepath=filepath,
+            filename=filename,
+            num_angles=num_angles,
+            start=start,
+            end=end,
+            step=step,
+            exposure=exposure,
+            starting_frame=starting_frame,
+            is_aborted=is_aborted,
+        )
@@ -0,0 +1,221 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from qtpy.QtCore import QSettings
+from typing import Dict, List, Optional
+
+from tomoxrd.model import (
+    MainModel,
+    CrysalisModel,
+    ScanQueueModel,
+    ScanQueueItem,
+    ScanSimulatorModel,
+    ScanTimingModel,
+)
+from tomoxrd.controller import ScanQueueController
+
+
+class HeadlessController:
+    """
+    Library API for scripted and queued collections. Uses the scanning model and the CrysAlis file
+    pipeline directly, without creating a QApplication or any widgets.
+    """
+
+    def __init__(
+            self,
+            queue_filepath: Optional[str] = None,
+            par_filepath: Optional[str] = None,
+            verbose: Optional[bool] = True,
+    ) -> None:
+        self._settings = QSettings("GSECARS", "TomoXRD")
+        self._model = MainModel(settings=self._settings)
+        self._hardware_connected = False
+        self._crysalis = CrysalisModel()
+
+        if par_filepath is not None:
+            self._crysalis.par_filepath = par_filepath
+
+        if queue_filepath is None:
+            queue_filepath = os.path.join(self._model.paths.data_path, "scan_queue.jsonl")
+        self._queue = ScanQueueModel(queue_filepath)
+        self._executor = ScanQueueController(
+            model=self._model,
+            queue=self._queue,
+            point_collected=self._point_collected,
+            connect_hardware=self._connect_hardware,
+        )
+
+        # Conversions run in the background, so the next point is collected without waiting for them
+        self._conversion_pool = ThreadPoolExecutor(max_workers=1)
+        self._conversions: List[Future] = []
+        self._conversions_cancelled = threading.Event()
+
+        # The measured phases of every point refine the overheads used by the time estimates
+        # The timings are read from the hardware once it is connected
+        self._simulator = ScanSimulatorModel(ScanTimingModel())
+        self._simulator.calibrate_from_history(self._model.history)
+        self._model.scanning.phases_recorded.connect(self._record_point)
+
+        self._model.scanning.error_message_changed.connect(lambda msg: print(f"[Generic-Error] - {msg}"))
+        if verbose:
+            self._model.scanning.status_message_changed.connect(lambda msg: print(f"[Status] - {msg}"))
+
+    def _connect_hardware(self) -> None:
+        """
+        Initializes the scanning hardware and measures the simulator timings. Called by the executor once
+        it holds the queue lock, so a second process doesn't write to the PSO and detector of a running scan.
+        """
+        if self._hardware_connected:
+            return None
+        self._model.connect_hardware()
+        self._simulator.timing = ScanTimingModel.from_epics()
+        self._hardware_connected = True
+
+    def _record_point(self, record: dict) -> None:
+        """Learns the overheads from the measured phases and adds the point to the catalog."""
+        predicted = self._simulator.learn(self._model.history, record)
+        if record["collection_type"] == "Step" and record["cbf"] and not record["aborted"]:
+            record = {**record, "esperanto": "pending"}
+        self._model.catalog.add_point(record, predicted=predicted)
+
+    def _point_collected(self, item: ScanQueueItem, filename: str, frame: int) -> None:
+        """Queues the esperanto conversion of a finished step scan point."""
+        if not item.crysalis or item.collection_type != "Step":
+            return None
+
+        self._conversions.append(self._conversion_pool.submit(self._convert, item, filename, frame))
+
+    def _convert(self, item: ScanQueueItem, filename: str, frame: int) -> None:
+        """Creates the esperanto files of a point and stores the conversion time in the history."""
+        num_angles = round(abs(item.end - item.start) / item.step)
+        start_time = time.perf_counter()
+
+        self._crysalis.create_esperanto_files(
+            filepath=item.filepath,
+            filename=filename,
+            num_angles=num_angles,
+            start=item.start,
+            end=item.end,
+            step=item.step,
+            exposure=item.exposure,
+            starting_frame=frame,
+            is_aborted=self._conversions_cancelled.is_set,
+        )
+        status = "cancelled" if self._conversions_cancelled.is_set() else "done"
+        self._model.catalog.set_esperanto(directory=item.filepath + filename, filename=filename, status=status)
+        if self._conversions_cancelled.is_set():
+            return None
+
+        self._model.history.add_conversion(frames=num_angles, duration=time.perf_counter() - start_time)
+
+    def wait_for_conversions(self) -> None:
+        """Blocks until all the queued esperanto conversions are finished."""
+        while self._conversions:
+            conversion = self._conversions.pop(0)
+            if conversion.cancelled():
+                continue
+            error = conversion.exception()
+            if error is not None:
+                print(f"[Conversion-Error] - {error}")
+
+    def collect(
+            self,
+            exposure: float,
+            collection_type: Optional[str] = "Still",
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+            step: Optional[float] = None,
+            filename: Optional[str] = "",
+            filepath: Optional[str] = "",
+            frame: Optional[int] = 1,
+            crysalis: Optional[bool] = True,
+            points: Optional[List[Dict[str, float]]] = None,
+            burst: Optional[bool] = False,
+            recollect: Optional[bool] = False,
+    ) -> ScanQueueItem:
+        """Runs a single collection immediately and blocks until it is finished."""
+        item = ScanQueueItem(
+            exposure=exposure,
+            collection_type=collection_type,
+            start=start,
+            end=end,
+            step=step,
+            filename=filename,
+            filepath=filepath,
+            frame=frame,
+            crysalis=crysalis,
+            points=points or [],
+            burst=burst,
+            recollect=recollect,
+        )
+        return self.collect_item(item)
+
+    def collect_item(self, item: ScanQueueItem) -> ScanQueueItem:
+        """Runs the collection of an item immediately, without adding it to the queue."""
+        self._conversions_cancelled.clear()
+        self._executor.collect(item)
+        self.wait_for_conversions()
+        return item
+
+    def enqueue(self, item: ScanQueueItem) -> ScanQueueItem:
+        """Appends an item to the persistent scan queue."""
+        return self._queue.append(item)
+
+    def run_queue(self, keep_alive: Optional[bool] = False) -> None:
+        """Collects the pending queue items back to back and blocks until the queue is empty."""
+        self._conversions_cancelled.clear()
+        self._executor.start(keep_alive=keep_alive)
+        try:
+            while not self._executor.wait(timeout=0.5):
+                continue
+        except KeyboardInterrupt:
+            self.stop()
+            self._executor.wait()
+        self.wait_for_conversions()
+
+    def stop(self) -> None:
+        """Aborts the running collection, stops the queue executor and cancels the queued conversions."""
+        self._conversions_cancelled.set()
+        for conversion in self._conversions:
+            conversion.cancel()
+        self._executor.stop()
+
+    def close(self) -> None:
+        """Waits for the remaining conversions, releases the worker thread and commits the catalog."""
+        self.wait_for_conversions()
+        self._conversion_pool.shutdown(wait=True)
+        self._model.catalog.close()
+        self._model.catalog.wait()
+
+    @property
+    def model(self) -> MainModel:
+        return self._model
+
+    @property
+    def queue(self) -> ScanQueueModel:
+        return self._queue
+
+    @property
+    def simulator(self) -> ScanSimulatorModel:
+        return self._simulator
@@ -18,14 +18,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+import os
 import sys
-import time
-
-from win32 import win32gui
 from qtpy.QtCore import QSettings, QObject, Signal
 from qtpy.QtWidgets import QApplication
+from typing import Optional
 
-from tomoxrd.model import MainModel, QtWorkerModel
+from tomoxrd.model import MainModel, ScanTimingModel, ShutdownModel, StartupModel
 from tomoxrd.controller import (
     DetectorSettingsController,
     ScanningController,
@@ -36,11 +35,11 @@ from tomoxrd.widget import MainWidget
 
 
 class MainController(QObject):
-    """Base controller, initializes sub-controllers, creates and run main app worker and checks for epics connection."""
+    """Base controller, initializes sub-controllers, connects the hardware after startup and stops every subsystem on exit."""
 
     _epics_connection_changed: Signal = Signal(bool)
 
-    def __init__(self) -> None:
+    def __init__(self, started_at: Optional[float] = None) -> None:
         super(MainController, self).__init__()
 
         self._app = QApplication(sys.argv)
@@ -57,19 +56,81 @@ class MainController(QObject):
             model=self._model, widget=self._widget, controller=self._scanning_controller
         )
 
-        # Application worker thread
-        self._main_worker = QtWorkerModel(self._worker_methods, ())
-        self._main_worker.start()
+        # The hardware is connected on a worker thread after the first paint of the window
+        self._benchmark: bool = False
+        self._startup = StartupModel(started_at=started_at)
+        self._startup.add_step("hardware", self._model.connect_hardware)
+        self._startup.add_step(
+            "filename", self._filename_controller.read_current_values,
+            self._filename_controller.update_with_current_values,
+        )
+        self._startup.add_step("timing", ScanTimingModel.from_epics, self._scanning_controller.set_timing)
+        self._startup.state_changed.connect(self._widget.collection_status.update_status_message)
+        self._startup.finished.connect(self._startup_finished)
+        self._widget.first_painted.connect(self._first_painted)
+        self._widget.collection_status.set_connecting(True)
+
+        # Every subsystem is stopped at once on exit, with the time it is given to stop
+        self._shutdown = ShutdownModel()
+        self._shutdown.add(
+            "scan", self._scanning_controller.stop_collection,
+            lambda: not self._model.scanning.is_running, timeout=10.0,
+        )
+        self._shutdown.add(
+            "positioning", self._collection_status_controller.stop_positioning,
+            lambda: not self._collection_status_controller.positioning, timeout=10.0,
+        )
+        self._shutdown.add(
+            "conversions", self._scanning_controller.cancel_conversions,
+            self._scanning_controller.conversions_finished, timeout=30.0,
+        )
+        self._shutdown.add(
+            "reducer", self._model.scanning.reducer.cancel,
+            lambda: self._model.scanning.reducer.wait(timeout=0), timeout=5.0,
+        )
+        self._shutdown.add(
+            "preview", self._scanning_controller.stop_preview,
+            self._scanning_controller.stop_preview, timeout=5.0,
+        )
+        self._shutdown.add(
+            "catalog", self._model.catalog.close, lambda: self._model.catalog.wait(timeout=0), timeout=5.0,
+        )
+        self._shutdown.add("startup", self._startup.stop, lambda: not self._startup.running, timeout=10.0)
+        self._shutdown.add("monitors", self._clear_monitors)
+        self._widget.close_requested.connect(self._shutdown.start)
+        self._shutdown.finished.connect(self._shutdown_finished)
+
+    def _first_painted(self) -> None:
+        """Starts the hardware connection once the window is on screen."""
+        self._startup.mark_first_paint()
+        self._startup.start()
+
+    def _startup_finished(self, connected: bool) -> None:
+        # The buttons stay disabled if the hardware is not connected
+        if connected:
+            self._widget.collection_status.set_connecting(False)
+
+        self._startup.save(os.path.join(self._model.paths.data_path, "startup_history.jsonl"))
+        if self._benchmark:
+            record = self._startup.record()
+            print(f"[Startup] - First paint: {record['first_paint']:.3f} s, ready: {record['ready']:.3f} s")
+            for name, seconds in record["steps"].items():
+                print(f"[Startup] - {name}: {seconds:.3f} s")
+            self._app.quit()
 
     @staticmethod
     def _window_enumeration_handler(handle: int, windows: list) -> None:
         """Populates the list of open windows."""
+        from win32 import win32gui
+
         windows.append((handle, win32gui.GetWindowText(handle)))
 
     def _check_for_existing_application(self, version: str) -> None:
         """If an application instance is already open it brings the application to top-most."""
         # Get open windows list for Windows OS
         if sys.platform == "win32":
+            from win32 import win32gui
+
             windows = []
             win32gui.EnumWindows(self._window_enumeration_handler, windows)
 
@@ -80,24 +141,26 @@ class MainController(QObject):
                     win32gui.SetForegroundWindow(window[0])
                     sys.exit()
 
-    def _worker_methods(self) -> None:
-        """Runs all the worker methods."""
-        while not self._widget.terminated:
-            self._collection_status_controller.update_collection_status()
-            time.sleep(0.05)
+    def _shutdown_finished(self, failed: list) -> None:
+        if failed:
+            print(f"[Shutdown-Error] - Closing with running subsystems: {', '.join(failed)}")
+        self._widget.terminate()
+
+    def _clear_monitors(self) -> None:
+        """Stops all the PV monitors."""
+        if self._model.bmd is None:
+            return None
 
-        # Clear camonitor instances after exiting the loop
         for pv in self._model.bmd.collection:
-            pv.moving = False
-            del pv
+            pv.clear_monitor()
 
-        # Set as finished so UI can exit
-        self._widget.workers_finished = True
+    def run(self, version: str, benchmark: Optional[bool] = False) -> None:
+        """Starts the application. The benchmark prints the startup times and exits once connected."""
+        self._benchmark = benchmark
 
-    def run(self, version: str) -> None:
-        """Starts the application."""
         # Limit the number of application instances to one
-        self._check_for_existing_application(version=version)
+        if not benchmark:
+            self._check_for_existing_application(version=version)
 
         self._widget.display(
             version=version,
@@ -0,0 +1,276 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import threading
+import time
+from typing import Callable, Optional
+
+from tomoxrd.model import MainModel, ScanQueueModel, ScanQueueItem, ScanState
+
+
+class ScanQueueController:
+    """
+    Headless executor for the scan queue. Collects the pending items back to back, without any
+    widgets, and records the status and timing of every item in the queue file.
+    """
+
+    _collection_types: tuple = ("Still", "Step", "Wide")
+    _recollect_attempts: int = 1
+
+    def __init__(
+            self,
+            model: MainModel,
+            queue: ScanQueueModel,
+            poll_interval: Optional[float] = 1.0,
+            point_collected: Optional[Callable[[ScanQueueItem, str, int], None]] = None,
+            connect_hardware: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._model = model
+        self._queue = queue
+        self._poll_interval = poll_interval
+        # Called with the item, the point filename and its starting frame after every collected point
+        self._point_collected = point_collected
+        # Called once the executor lock is held, so only the owner of the queue writes to the hardware
+        self._connect_hardware = connect_hardware
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._current_item: Optional[ScanQueueItem] = None
+
+    def start(self, keep_alive: Optional[bool] = False) -> None:
+        """Starts the executor thread."""
+        if self.is_running:
+            return None
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, args=(keep_alive,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the executor after aborting the item that is currently collected."""
+        self._stop_event.set()
+        if self._current_item is not None:
+            self._model.scanning.abort()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the executor thread to finish, returns False on timeout."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def run(self, keep_alive: Optional[bool] = False) -> None:
+        """
+        Collects the pending items in order. With keep_alive the executor waits for new items
+        to be appended when the queue is empty, otherwise it returns.
+        """
+        # Only a single process executes the queue, the others can list and append items
+        if not self._queue.acquire_executor():
+            print("[Queue-Error] - The queue is already executed by another process.")
+            return None
+
+        try:
+            if not self._hardware_connected():
+                return None
+            self._queue.recover_interrupted()
+            self._execute_pending(keep_alive=keep_alive)
+        finally:
+            self._queue.release_executor()
+
+    def _hardware_connected(self) -> bool:
+        """Connects the hardware with the executor lock held. Returns False if the connection failed."""
+        if self._connect_hardware is None:
+            return True
+        try:
+            self._connect_hardware()
+        except Exception as error:
+            print(f"[Queue-Error] - The hardware could not be connected: {error}")
+            return False
+        return True
+
+    def _execute_pending(self, keep_alive: bool) -> None:
+        while not self._stop_event.is_set():
+            item = self._queue.next_pending()
+
+            if item is None:
+                if not keep_alive:
+                    break
+                self._stop_event.wait(self._poll_interval)
+                continue
+
+            self._current_item = item
+            self._queue.update(item.item_id, status="running", started_at=time.time())
+
+            try:
+                status, message = self.execute(item)
+            except Exception as error:
+                status, message = "failed", str(error)
+                print(f"[Queue-Error] - {item.item_id}: {message}")
+
+            self._queue.update(item.item_id, status=status, message=message, finished_at=time.time())
+            self._current_item = None
+
+    def collect(self, item: ScanQueueItem) -> tuple:
+        """Collects a single item that is not part of the queue."""
+        if self.is_running:
+            return "failed", "The queue executor is running."
+
+        # The hardware is shared with the executor of the queue, which can run in another process
+        if not self._queue.acquire_executor():
+            item.status, item.message = "failed", "The queue is executed by another process."
+            print(f"[Queue-Error] - {item.message}")
+            return item.status, item.message
+
+        try:
+            if not self._hardware_connected():
+                item.status, item.message = "failed", "The hardware could not be connected."
+                return item.status, item.message
+            self._stop_event.clear()
+            item.started_at = time.time()
+            item.status, item.message = self.execute(item)
+            item.finished_at = time.time()
+        finally:
+            self._queue.release_executor()
+        return item.status, item.message
+
+    def execute(self, item: ScanQueueItem) -> tuple:
+        """Collects all the points of a single item. Returns the final status and message."""
+        scanning = self._model.scanning
+
+        if item.collection_type not in self._collection_types:
+            return "failed", f"Unknown collection type: {item.collection_type}"
+
+        if not self._model.on_xrd_position():
+            return "failed", "First move to XRD position."
+
+        start, end, step = item.start, item.end, item.step
+        if item.collection_type == "Still":
+            start, end, step = None, None, None
+        elif item.collection_type == "Wide":
+            step = None
+        elif step is None or step > abs(end - start):
+            return "failed", "Step size cannot be greater than the total range of the collection!"
+
+        # All the points of the item are a single collection
+        if not scanning.begin_collection(ScanState.PREPARING):
+            return "failed", "A collection is already running."
+
+        try:
+            return self._execute_points(item, start=start, end=end, step=step)
+        finally:
+            scanning.end_collection()
+
+    def _execute_points(
+            self, item: ScanQueueItem, start: Optional[float], end: Optional[float], step: Optional[float]
+    ) -> tuple:
+        """Collects the points of an item inside a running collection."""
+        scanning = self._model.scanning
+
+        crysalis = item.crysalis and item.collection_type == "Step"
+        scanning.toggle_cbf_collection(crysalis)
+        scanning.set_base_filename(item.filename)
+        # The PSO could have been changed outside TomoXRD since the last item
+        scanning.invalidate_pso()
+
+        previous_positions = scanning.stage_positions() if item.points else None
+        frame = item.frame
+        status, message = "done", ""
+        # Points that were collected with missing frames
+        incomplete = []
+
+        if item.burst and item.collection_type == "Still" and item.points:
+            status, message = self._execute_burst(item)
+        else:
+            for point in item.points or [None]:
+                if self._stop_event.is_set() or scanning.aborted:
+                    status, message = "aborted", "Executor stopped."
+                    break
+
+                filename = item.filename
+                if point is not None:
+                    filename += f"_{point['name']}"
+                    if not scanning.move_to_point(point.get("x"), point.get("y"), point.get("z")):
+                        status, message = "failed", f"Point {point['name']} is outside the stage limits."
+                        break
+
+                if crysalis:
+                    frame = 1
+
+                # Points with missing frames are collected again over the same frame numbers
+                attempts = 1 + self._recollect_attempts if item.recollect else 1
+                for _ in range(attempts):
+                    limited = scanning.prepare_scan(
+                        start=start, end=end, exposure=item.exposure, step=step,
+                        frame=frame, filename=filename, filepath=item.filepath
+                    )
+                    if limited:
+                        break
+
+                    if start is None or end is None:
+                        scanning.collect_still()
+                    else:
+                        scanning.collect_projections()
+
+                    report = scanning.frame_report
+                    if report is None or report.complete or scanning.aborted:
+                        break
+
+                if limited:
+                    status, message = "failed", "Theta limits reached."
+                    break
+
+                report = scanning.frame_report
+                if report is not None and not report.complete:
+                    incomplete.append(f"{filename} ({report.received}/{report.expected})")
+                elif self._point_collected is not None and not self._stop_event.is_set():
+                    self._point_collected(item, filename, frame)
+
+                frame = scanning.next_frame_number()
+
+        if self._stop_event.is_set() and status == "done":
+            status, message = "aborted", "Executor stopped."
+        elif incomplete and status == "done":
+            status, message = "failed", f"Missing frames: {', '.join(incomplete)}"
+
+        if previous_positions is not None:
+            scanning.move_to_point(*previous_positions)
+            scanning.scan_is_running.emit(False)
+            scanning.status_message_changed.emit("Finished")
+
+        return status, message
+
+    def _execute_burst(self, item: ScanQueueItem) -> tuple:
+        """Collects the still points of an item in a single detector series."""
+        points = [(point["name"], point.get("x"), point.get("y"), point.get("z")) for point in item.points]
+        collected = self._model.scanning.collect_still_burst(
+            points, exposure=item.exposure, frame=item.frame, filename=item.filename, filepath=item.filepath
+        )
+
+        if collected < len(points) and not self._stop_event.is_set():
+            return "failed", f"Collected {collected} of {len(points)} points."
+        return "done", ""
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def current_item(self) -> Optional[ScanQueueItem]:
+        return self._current_item
@@ -18,21 +18,36 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 import datetime
+import os
 import threading
 import time
 import numpy as np
-from qtpy.QtCore import QObject, Signal
+from qtpy.QtCore import QObject, QTimer, Signal
 from epics import caget, caput
-from typing import Optional
-
-from tomoxrd.model import MainModel
+from typing import Dict, List, Optional, Tuple
+
+from tomoxrd.model import (
+    CbfArchiveModel,
+    FramePreviewModel,
+    MainModel,
+    MapAxis,
+    MapGrid,
+    NexusWriterModel,
+    ScanEstimateModel,
+    ScanSimulatorModel,
+    ScanState,
+    ScanTimingModel,
+)
 from tomoxrd.controller import FilenameController
+from tomoxrd.util import bin_frame, log_scale
 from tomoxrd.widget import MainWidget
 
 
 class ScanningController(QObject):
     current_collection_changed: Signal = Signal(int)
     estimated_time_changed: Signal = Signal(float)
+    estimated_phases_changed: Signal = Signal(dict)
+    _total_frames_reset: Signal = Signal()
 
     _horizontal_motor: str = "13BMD:m123"
     _vertical_motor: str = "13BMD:m115"
@@ -45,11 +60,11 @@ class ScanningController(QObject):
     _total_collections: int = 1
     _current_collection: int = 1
 
-    _multiple_collection_aborted: bool = False
-    _multiple_collection_running: bool = False
     _at_xrd_position: bool = False
     _current_row: int = 0
     _start_time: datetime.datetime
+    _elapsed_interval: int = 100  # ms
+    _estimate_delay: int = 150  # ms
 
     def __init__(self, model: MainModel, widget: MainWidget, controller: FilenameController) -> None:
         super(ScanningController, self).__init__()
@@ -58,12 +73,43 @@ class ScanningController(QObject):
         self._widget = widget
         self._controller = controller
 
+        # Set on abort, stops the running esperanto conversions between their steps
+        self._conversions_cancelled = threading.Event()
+        self._conversion_threads: List[threading.Thread] = []
+        # Packs the converted .cbf files on the conversion threads
+        self._archive = CbfArchiveModel()
+
+        # Dry-run simulator used for the estimated time, with default timings until the hardware is read
+        self._simulator = ScanSimulatorModel(ScanTimingModel())
+        self._simulator.calibrate_from_history(self._model.history)
+        self._estimate = ScanEstimateModel(self._simulator)
+
+        # Bursts of point and setting changes are estimated once, after they settle
+        self._estimate_timer = QTimer(self)
+        self._estimate_timer.setSingleShot(True)
+        self._estimate_timer.setInterval(self._estimate_delay)
+
+        # Live preview of the newest frame, read on its own thread
+        self._preview = FramePreviewModel(locate=self._model.scanning.newest_frame_file)
+
+        # Elapsed time is refreshed from the GUI thread while a collection runs
+        self._elapsed_timer = QTimer(self)
+        self._elapsed_timer.setInterval(self._elapsed_interval)
+
+        # The points table shows the points model
+        self._widget.collection_points.table_points.setModel(self._model.points)
+
         self._connect_methods()
+        self._toggle_checkbox_status()
         self._update_total_frames()
         self._update_estimated_time()
 
     def _connect_methods(self) -> None:
         self.current_collection_changed.connect(self._update_current_collection)
+        self._total_frames_reset.connect(self._update_total_frames)
+        self._elapsed_timer.timeout.connect(self._update_elapsed_time)
+        self._estimate_timer.timeout.connect(self._emit_estimated_time)
+        self._model.points.dataChanged.connect(lambda: self._update_estimated_time())
         self._model.scanning.status_message_changed.connect(self._widget.collection_status.update_status_message)
         self._model.scanning.scan_is_running.connect(self._widget.collection_status.toggle_collect_abort_button)
         self._model.scanning.scan_is_running.connect(self._disable_gui_while_collecting)
@@ -72,6 +118,11 @@ class ScanningController(QObject):
         self._model.scanning.frame_number_changed.connect(self._widget.filename_settings.update_frame_number)
         self._model.scanning.total_frames_changed.connect(self._update_status_total_frames)
         self._model.scanning.frame_counter_changed.connect(self._update_status_current_frames)
+        self._model.scanning.frame_rate_changed.connect(self._widget.collection_status.update_frame_rate)
+        self._model.scanning.frame_counter_changed.connect(lambda: self._preview.request())
+        self._preview.preview_changed.connect(self._widget.frame_preview.update_preview)
+        self._model.scanning.reducer.projections_ready.connect(self._show_max_projection)
+        self._model.scanning.frames_missing.connect(self._widget.statusBar().showMessage)
         self._widget.collection_settings.combo_collection_type.currentIndexChanged.connect(
             lambda: self._update_total_frames()
         )
@@ -88,19 +139,51 @@ class ScanningController(QObject):
             lambda: self._update_estimated_time()
         )
         self._widget.filename_settings.check_chrysalis.stateChanged.connect(self._model.scanning.toggle_cbf_collection)
+        self._widget.filename_settings.check_chrysalis.stateChanged.connect(lambda: self._update_estimated_time())
+        self._widget.filename_settings.check_nexus.stateChanged.connect(
+            self._model.scanning.toggle_container_collection
+        )
+        self._widget.filename_settings.check_software_merge.stateChanged.connect(
+            self._model.scanning.toggle_software_merge
+        )
+        self._widget.collection_settings.check_burst.stateChanged.connect(lambda: self._update_estimated_time())
+        for spinbox in (
+            *self._widget.collection_settings.spin_map_x,
+            *self._widget.collection_settings.spin_map_y,
+            *self._widget.collection_settings.spin_map_z,
+        ):
+            spinbox.valueChanged.connect(lambda: self._update_total_frames())
+        self._widget.collection_settings.check_map_z.stateChanged.connect(lambda: self._update_total_frames())
+        self._widget.collection_settings.check_map_snake.stateChanged.connect(lambda: self._update_estimated_time())
         self._widget.collection_points.btn_add.clicked.connect(self._add_collection_point)
-        self._widget.collection_points.btn_clear.clicked.connect(lambda: self._update_total_collections(1))
-        self._widget.collection_points.btn_add.clicked.connect(lambda: self._update_total_collections(
-            self._total_collections + 1
-        ))
-        self._widget.collection_points.btn_delete.clicked.connect(lambda: self._update_total_collections(
-            self._total_collections - 1
-        ))
-        self._widget.collection_points.btn_check_all.clicked.connect(lambda: self._update_estimated_time)
-        self._widget.collection_points.table_points.enabled_checkboxes_changed.connect(self._iterate_collections)
+        self._widget.collection_points.btn_delete.clicked.connect(
+            lambda: self._model.points.delete_point(self._widget.collection_points.table_points.current_row())
+        )
+        self._widget.collection_points.btn_clear.clicked.connect(self._model.points.clear_points)
+        self._widget.collection_points.btn_check_all.clicked.connect(self._model.points.check_all_points)
+        self._model.points.enabled_points_changed.connect(self._iterate_collections)
         self.estimated_time_changed.connect(self._widget.collection_status.update_estimated_time_widget)
+        self.estimated_phases_changed.connect(self._widget.collection_status.update_estimated_time_phases)
         self._widget.collection_settings.combo_collection_type.currentIndexChanged.connect(self._toggle_checkbox_status)
         self._model.scanning.error_message_changed.connect(self._model.scanning.create_error_message)
+        self._model.scanning.phases_recorded.connect(self._record_point)
+
+    def _record_point(self, record: dict) -> None:
+        """Learns the overheads from the measured phases and adds the point to the catalog."""
+        predicted = self._simulator.learn(self._model.history, record)
+        if record["collection_type"] == "Step" and record["cbf"] and not record["aborted"]:
+            record = {**record, "esperanto": "pending"}
+        self._model.catalog.add_point(record, predicted=predicted)
+
+    def set_timing(self, timing: ScanTimingModel) -> None:
+        """Replaces the default simulator timings with the ones read from the hardware."""
+        self._simulator.timing = timing
+        self._update_estimated_time()
+
+    def _show_max_projection(self, projections: dict) -> None:
+        """Shows the max projection of the finished point in the frame preview."""
+        image = log_scale(bin_frame(projections["max"], self._preview.binning))
+        self._widget.frame_preview.update_preview(image, f"Max of {projections['frames']} frames")
 
     def shutter_is_open(self) -> bool:
         """Checks if the shutter is open."""
@@ -109,75 +192,98 @@ class ScanningController(QObject):
         return False
 
     def _toggle_checkbox_status(self) -> None:
-        if self._widget.collection_settings.combo_collection_type.currentText() == "Step":
+        collection_type = self._widget.collection_settings.combo_collection_type.currentText()
+        if collection_type == "Step":
             self._widget.filename_settings.check_chrysalis.setEnabled(True)
             self._widget.filename_settings.check_auto_reset_frames.setEnabled(True)
+            self._widget.filename_settings.check_archive.setEnabled(True)
+            self._widget.filename_settings.check_software_merge.setEnabled(True)
         else:
             self._widget.filename_settings.check_chrysalis.setEnabled(False)
             self._widget.filename_settings.check_auto_reset_frames.setEnabled(False)
+            self._widget.filename_settings.check_archive.setEnabled(False)
+            self._widget.filename_settings.check_software_merge.setEnabled(False)
 
-    def _esperanto_creator(self) -> None:
-        filepath = self._widget.filename_settings.ipt_path.text()
-        filename = self._widget.filename_settings.ipt_filename.text()
-
-        if self._widget.collection_points.table_points.rowCount() >= 1:
-            filename += f"_{self._widget.collection_points.table_points.item(self._current_row, 0).text()}"
-
-        if not self._model.scanning.aborted:
-            self._controller.prepare_for_crysalis(
-                num_angles=self._model.scanning.total_frames,
-                start=self._widget.collection_settings.spin_omega_range_start.value(),
-                end=self._widget.collection_settings.spin_omega_range_end.value(),
-                step=self._widget.collection_settings.spin_step_size.value(),
-                exposure=self._widget.collection_settings.spin_exposure.value()
-            )
-
-        if not self._model.scanning.aborted:
-            self._controller.create_esperanto_directory(
-                filepath=filepath + filename,
-                filename=filename
-            )
-
-        if not self._model.scanning.aborted:
-            self._controller.copy_set_and_ccd_files(
-                filepath=filepath + filename,
-                filename=filename
-            )
-
-        if not self._model.scanning.aborted:
-            self._controller.create_crysalis_exp_settings_file(
-                filepath=filepath + filename,
-                filename=filename
-            )
+        # The NeXus container needs the optional h5py package
+        self._widget.filename_settings.check_nexus.setEnabled(
+            collection_type in ("Step", "Wide") and NexusWriterModel.available()
+        )
 
-        if not self._model.scanning.aborted:
-            self._controller.create_par_file(
-                filepath=filepath + filename,
-                filename=filename
+    def _esperanto_creator(self, settings: dict) -> None:
+        """Converts the collection point with the settings read on the GUI thread, archiving its .cbf files."""
+        filepath = settings["filepath"]
+        filename = settings["filename"]
+
+        start_time = time.perf_counter()
+        self._controller.create_esperanto_files(
+            filepath=filepath,
+            filename=filename,
+            num_angles=settings["num_angles"],
+            start=settings["start"],
+            end=settings["end"],
+            step=settings["step"],
+            exposure=settings["exposure"],
+            is_aborted=self._conversions_cancelled.is_set,
+            starting_frame=settings["starting_frame"],
+        )
+        if not self._conversions_cancelled.is_set():
+            self._model.history.add_conversion(
+                frames=settings["num_angles"], duration=time.perf_counter() - start_time
             )
+        status = "cancelled" if self._conversions_cancelled.is_set() else "done"
+        self._model.catalog.set_esperanto(directory=filepath + filename, filename=filename, status=status)
 
-        if not self._model.scanning.aborted:
-            self._controller.convert_to_esperanto(
+        if settings["archive"] and not self._conversions_cancelled.is_set():
+            self._archive_cbf_files(
                 filepath=filepath + filename,
                 filename=filename,
-                num_angles=self._model.scanning.total_frames
+                first_frame=settings["starting_frame"],
+                num_angles=settings["num_angles"],
             )
 
-        self._model.scanning.creating_esperanto = False
+    def _archive_cbf_files(self, filepath: str, filename: str, first_frame: int, num_angles: int) -> None:
+        """Packs the .cbf files of the converted collection point, the originals are removed once verified."""
+        files = [
+            os.path.join(filepath, f"{filename}_{frame:04d}.cbf").replace("\\", "/")
+            for frame in range(first_frame, first_frame + num_angles)
+        ]
+        path = self._archive.archive(
+            directory=filepath, filename=filename, files=files, is_aborted=self._conversions_cancelled.is_set
+        )
+        if path is not None:
+            self._model.catalog.set_archive(directory=filepath, filename=filename, path=path)
+
+    def _esperanto_settings(self) -> dict:
+        """Reads the conversion settings of the collected point from the widgets, on the GUI thread."""
+        filename = self._widget.filename_settings.ipt_filename.text()
+        if self._model.points.rowCount() >= 1:
+            filename += f"_{self._model.points.name(self._current_row)}"
+
+        return {
+            "filepath": self._widget.filename_settings.ipt_path.text(),
+            "filename": filename,
+            "num_angles": self._model.scanning.total_frames,
+            "start": self._widget.collection_settings.spin_omega_range_start.value(),
+            "end": self._widget.collection_settings.spin_omega_range_end.value(),
+            "step": self._widget.collection_settings.spin_step_size.value(),
+            "exposure": self._widget.collection_settings.spin_exposure.value(),
+            "starting_frame": self._controller.starting_frame,
+            "archive": self._widget.filename_settings.check_archive.isChecked(),
+        }
 
     def _create_esperanto_files(self) -> None:
-        esperanto_creator_thread = threading.Thread(target=self._esperanto_creator, args=())
+        esperanto_creator_thread = threading.Thread(target=self._esperanto_creator, args=(self._esperanto_settings(),))
 
-        collection_points = self._widget.collection_points.table_points.rowCount()
-        if collection_points < 1:
+        collection_points = self._model.points.rowCount()
+        if collection_points < 1 or self._model.points.is_enabled(self._current_row):
+            # Kept until they finish, so the shutdown can wait for them
+            self._conversion_threads = [thread for thread in self._conversion_threads if thread.is_alive()]
+            self._conversion_threads.append(esperanto_creator_thread)
             esperanto_creator_thread.start()
-        else:
-            if self._widget.collection_points.table_points.enabled_checkboxes[self._current_row].isChecked():
-                esperanto_creator_thread.start()
 
     def _update_total_collections(self, collections_number: int) -> None:
 
-        if self._widget.collection_points.table_points.rowCount() <= 1:
+        if self._model.points.rowCount() <= 1:
             self._total_collections = 1
         else:
             self._total_collections = collections_number
@@ -185,12 +291,7 @@ class ScanningController(QObject):
         self._update_estimated_time()
 
     def _iterate_collections(self) -> None:
-        collection_counter = 0
-        for checkbox in self._widget.collection_points.table_points.enabled_checkboxes:
-            if checkbox.isChecked():
-                collection_counter += 1
-
-        self._update_total_collections(collections_number=collection_counter)
+        self._update_total_collections(collections_number=self._model.points.enabled_count)
 
     def _update_current_collection(self, collection_number: int) -> None:
         self._current_collection = collection_number - 1
@@ -199,8 +300,22 @@ class ScanningController(QObject):
         )
         self._update_estimated_time()
 
+    def _map_grid(self) -> MapGrid:
+        """Creates the map grid from the map options."""
+        settings = self._widget.collection_settings
+        x, y, z = (
+            MapAxis(*(spinbox.value() for spinbox in spinboxes))
+            for spinboxes in (settings.spin_map_x, settings.spin_map_y, settings.spin_map_z)
+        )
+        z = z if settings.check_map_z.isChecked() else None
+        return MapGrid(x, y, z, snake=settings.check_map_snake.isChecked())
+
     def _update_total_frames(self) -> None:
-        if self._widget.collection_settings.combo_collection_type.currentText() == "Step":
+        if self._widget.collection_settings.combo_collection_type.currentText() == "Map":
+            grid = self._map_grid()
+            self._widget.collection_settings.lbl_map_pixels.setText(f"{grid.num_pixels} Pixels")
+            self._model.scanning.total_frames = grid.num_pixels
+        elif self._widget.collection_settings.combo_collection_type.currentText() == "Step":
             start = self._widget.collection_settings.spin_omega_range_start.value()
             end = self._widget.collection_settings.spin_omega_range_end.value()
             step = self._widget.collection_settings.spin_step_size.value()
@@ -234,6 +349,9 @@ class ScanningController(QObject):
         self._widget.collection_status.btn_prepare_for_xrd.setEnabled(not state)
 
         if not state:
+            # Update the simulator with the positions after the collection
+            self._simulator.timing.refresh_positions()
+
             if self._widget.collection_settings.combo_collection_type.currentText() == "Step":
                 # Check if auto reset frame is selected
                 if self._widget.filename_settings.check_auto_reset_frames.isChecked():
@@ -242,7 +360,7 @@ class ScanningController(QObject):
                 frame = int(caget("13PIL1MCdTe:TIFF1:FileNumber"))
                 self._widget.filename_settings.spin_frame_number.setValue(frame)
 
-            if self._widget.collection_points.table_points.rowCount() < 1:
+            if self._model.points.rowCount() < 1:
                 # Update collections
                 self._update_total_collections(1)
 
@@ -254,7 +372,9 @@ class ScanningController(QObject):
             end = self._widget.collection_settings.spin_omega_range_end.value()
             step = self._widget.collection_settings.spin_step_size.value()
 
-            if self._widget.collection_settings.combo_collection_type.currentText() == "Still":
+            if self._widget.collection_settings.combo_collection_type.currentText() == "Map":
+                self.collect_map(exposure=exposure)
+            elif self._widget.collection_settings.combo_collection_type.currentText() == "Still":
                 self.collect(exposure=exposure)
             elif self._widget.collection_settings.combo_collection_type.currentText() == "Wide":
                 self.collect(exposure=exposure, start=start, end=end)
@@ -267,54 +387,73 @@ class ScanningController(QObject):
         x = round(caget(self._horizontal_motor), 4)
         y = round(caget(self._vertical_motor), 4)
         z = round(caget(self._focus_motor), 4)
-        self._widget.collection_points.table_points.add_point(x_value=x, y_value=y, z_value=z)
-        self._update_estimated_time()
+        self._model.points.add_point(x=x, y=y, z=z)
 
-    def _compute_estimated_time(self) -> float:
+    def _enabled_collection_points(self) -> List[Tuple[str, Optional[float], Optional[float], Optional[float]]]:
+        """Returns the name and x, y, z positions of the enabled collection points."""
+        return self._model.points.enabled_points()
+
+    def _compute_estimated_time(self) -> Tuple[float, Dict[str, float]]:
+        """Estimates the current collection settings and points against the motor timing model."""
         exposure = self._widget.collection_settings.spin_exposure.value()
         start = self._widget.collection_settings.spin_omega_range_start.value()
         end = self._widget.collection_settings.spin_omega_range_end.value()
         step = self._widget.collection_settings.spin_step_size.value()
 
-        # TODO: Need to include the delay of epics wait=True usage.
-        if self._widget.collection_settings.combo_collection_type.currentText() == "Step":
-            time_estimate = round(np.abs(end - start) / step) * exposure
-            # Add existing delay for step scans
-            time_estimate += 2
-        else:
-            # Add existing delay for still and wide scans
-            time_estimate = exposure
-            # Account for time.sleep delay added
-            time_estimate += 1.5
+        collection_type = self._widget.collection_settings.combo_collection_type.currentText()
+        if collection_type == "Map":
+            timeline = self._simulator.simulate_map(self._map_grid(), exposure=exposure)
+            return timeline.total, timeline.phase_totals()
+        elif collection_type == "Still":
+            start, end, step = None, None, None
+        elif collection_type == "Wide":
+            step = None
+
+        return self._estimate.estimate(
+            self._model.points,
+            exposure=exposure,
+            start=start,
+            end=end,
+            step=step,
+            cbf_collection=self._widget.filename_settings.check_chrysalis.isChecked(),
+            burst=self._burst_selected(),
+        )
 
-        return time_estimate
+    def _burst_selected(self) -> bool:
+        """Checks if the still points are collected in a single detector series."""
+        return (
+            self._widget.collection_settings.combo_collection_type.currentText() == "Still"
+            and self._widget.collection_settings.check_burst.isChecked()
+        )
 
     def _update_estimated_time(self) -> None:
-        collection_points = self._widget.collection_points.table_points.rowCount()
-        total_estimate = 0.0
+        """Schedules the estimated time, restarting the wait on every change."""
+        self._estimate_timer.start()
+
+    def _emit_estimated_time(self) -> None:
+        map_scan = self._widget.collection_settings.combo_collection_type.currentText() == "Map"
+        if not map_scan and self._model.points.rowCount() >= 1 and self._model.points.enabled_count == 0:
+            self.estimated_time_changed.emit(0.0)
+            self.estimated_phases_changed.emit({})
+            return None
 
-        if collection_points < 1:
-            total_estimate = self._compute_estimated_time()
-        else:
-            for row in range(collection_points):
-                if self._widget.collection_points.table_points.enabled_checkboxes[row].isChecked():
-                    total_estimate += self._compute_estimated_time()
+        total, phases = self._compute_estimated_time()
+        self.estimated_time_changed.emit(total)
+        self.estimated_phases_changed.emit(phases)
 
-        self.estimated_time_changed.emit(total_estimate)
+    def _start_elapsed_time(self) -> None:
+        self._start_time = datetime.datetime.now()
+        self._elapsed_timer.start()
 
-    def _compute_elapsed_time(self) -> None:
-        while self._model.scanning.is_running or self._multiple_collection_running:
-            time.sleep(0.1)
-            elapsed_time = (datetime.datetime.now() - self._start_time).total_seconds()
-            self._widget.collection_status.update_elapsed_time_widget(seconds=elapsed_time)
+    def _update_elapsed_time(self) -> None:
+        elapsed_time = (datetime.datetime.now() - self._start_time).total_seconds()
+        self._widget.collection_status.update_elapsed_time_widget(seconds=elapsed_time)
+        # Stop refreshing once the collection is over
+        if not self._model.scanning.is_running:
+            self._elapsed_timer.stop()
 
     def _on_xrd_position(self) -> bool:
-        current_x = self._model.bmd.detector_x.readback
-        current_z = self._model.bmd.detector_z.readback
-
-        if current_x == self._model.detector_settings.xrd_x and current_z == self._model.detector_settings.xrd_z:
-            return True
-        return False
+        return self._model.on_xrd_position()
 
     def _step_is_larger_than_range(self) -> bool:
         start = self._widget.collection_settings.spin_omega_range_start.value()
@@ -346,24 +485,55 @@ class ScanningController(QObject):
             return None
 
         # Set initial filenames
-        file_name = self._widget.filename_settings.ipt_filename.text()
-        caput("13PIL1MCdTe:TIFF1:FileName", file_name, wait=True)
-        caput("13PIL1MCdTe:cam1:FileName", file_name, wait=True)
+        self._model.scanning.set_base_filename(self._widget.filename_settings.ipt_filename.text())
         self._controller.starting_frame = self._widget.filename_settings.spin_frame_number.value()
+        # The PSO could have been changed outside TomoXRD since the last collection
+        self._model.scanning.invalidate_pso()
+        self._conversions_cancelled.clear()
         # Check if there are collection points listed before starting the collection
-        if self._widget.collection_points.table_points.rowCount() < 1:
+        if self._model.points.rowCount() < 1:
             self._collect_single_point(exposure=exposure, start=start, end=end, step=step)
+        elif self._burst_selected():
+            burst_scan = threading.Thread(target=self._collect_burst, args=(exposure,))
+            if self._model.scanning.begin_collection(ScanState.MOVING):
+                burst_scan.start()
         else:
             multiple_points_scan = threading.Thread(target=self._collect_multiple_points, args=(
                 exposure, start, end, step))
-            if not self._model.scanning.aborted:
+            if self._model.scanning.begin_collection(ScanState.MOVING):
                 multiple_points_scan.start()
 
-        # Elapsed time thread
-        elapsed_time_thread = threading.Thread(target=self._compute_elapsed_time, args=())
-        # Start the elapsed time thread
-        self._start_time = datetime.datetime.now()
-        elapsed_time_thread.start()
+        # Start the elapsed time
+        self._start_elapsed_time()
+
+    def collect_map(self, exposure: float) -> None:
+        """Starts the fly scan collection of the map grid."""
+        if not self._on_xrd_position():
+            self._model.scanning.scan_is_running.emit(False)
+            self._model.scanning.error_message_changed.emit("First move to XRD position.")
+            return None
+
+        map_scan = threading.Thread(target=self._collect_map, args=(exposure,))
+        if self._model.scanning.begin_collection(ScanState.PREPARING):
+            self._start_elapsed_time()
+            map_scan.start()
+
+    def _collect_map(self, exposure: float) -> None:
+        self._previous_horiz_pos, self._previous_vert_pos, self._previous_focus_pos = (
+            self._model.scanning.stage_positions()
+        )
+
+        self.current_collection_changed.emit(1)
+        self._model.scanning.collect_map(
+            self._map_grid(),
+            exposure=exposure,
+            filename=self._widget.filename_settings.ipt_filename.text(),
+            filepath=self._widget.filename_settings.ipt_path.text(),
+        )
+
+        self._revert_sample_positions()
+        self._model.scanning.end_collection()
+        self.current_collection_changed.emit(0)
 
     def _collect_single_point(
             self,
@@ -389,6 +559,7 @@ class ScanningController(QObject):
 
         if limited:
             self.abort()
+            self._model.scanning.end_collection()
             self._revert_sample_positions(with_x_y_z=False)
             return None
 
@@ -410,48 +581,43 @@ class ScanningController(QObject):
             end: Optional[float] = None,
             step: Optional[float] = None
     ) -> None:
-        self._multiple_collection_aborted = False
-        self._multiple_collection_running = True
-
-        self._previous_horiz_pos = caget(self._horizontal_motor + ".RBV")
-        self._previous_vert_pos = caget(self._vertical_motor + ".RBV")
-        self._previous_focus_pos = caget(self._focus_motor + ".RBV")
+        self._previous_horiz_pos, self._previous_vert_pos, self._previous_focus_pos = (
+            self._model.scanning.stage_positions()
+        )
 
         collection_number = 0
 
-        collection_points = self._widget.collection_points.table_points.rowCount()
+        collection_points = self._model.points.rowCount()
         for row in range(collection_points):
             # Set current collection point
             self._current_row = row
 
-            if self._multiple_collection_aborted:
+            if self._model.scanning.aborted:
                 break
 
-            if self._widget.collection_points.table_points.enabled_checkboxes[row].isChecked():
+            if self._model.points.is_enabled(row):
 
-                # Set the starting frame
+                next_frame = self._widget.filename_settings.spin_frame_number.value()
+                # Set the starting frame, the spinbox is updated from the GUI thread
                 if self._widget.filename_settings.check_chrysalis.isChecked():
                     if self._widget.collection_settings.combo_collection_type.currentText() == "Step":
-                        self._widget.filename_settings.spin_frame_number.setValue(1)
-                        self._controller.starting_frame = self._widget.filename_settings.spin_frame_number.value()
+                        next_frame = 1
+                        self._model.scanning.frame_number_changed.emit(next_frame)
+                        self._controller.starting_frame = next_frame
 
                 # Update current collection number
                 collection_number += 1
                 self.current_collection_changed.emit(collection_number)
                 # Scan point
-                point_name = self._widget.collection_points.table_points.item(row, 0).text()
-                x_text = self._widget.collection_points.table_points.cellWidget(row, 1).text()
-                y_text = self._widget.collection_points.table_points.cellWidget(row, 2).text()
-                z_text = self._widget.collection_points.table_points.cellWidget(row, 3).text()
-                x = float(x_text) if x_text else self._previous_horiz_pos
-                y = float(y_text) if y_text else self._previous_vert_pos
-                z = float(z_text) if z_text else self._previous_focus_pos
+                point_name, x, y, z = self._model.points.point(row)
+                x = x if x is not None else self._previous_horiz_pos
+                y = y if y is not None else self._previous_vert_pos
+                z = z if z is not None else self._previous_focus_pos
 
                 limit_check = self._move_to_point(x, y, z)
                 if not limit_check:
                     break
 
-                next_frame = self._widget.filename_settings.spin_frame_number.value()
                 filename = self._widget.filename_settings.ipt_filename.text()
                 filename += f"_{point_name}"
                 filepath = self._widget.filename_settings.ipt_path.text()
@@ -470,12 +636,34 @@ class ScanningController(QObject):
                 else:
                     self._model.scanning.collect_projections()
 
-        time.sleep(0.5)
         self._revert_sample_positions()
-        self._multiple_collection_running = False
+        self._model.scanning.end_collection()
         # Reset current collection point
         self.current_collection_changed.emit(0)
 
+    def _collect_burst(self, exposure: float) -> None:
+        """Collects the enabled still points with the detector armed once for all of them."""
+        self._previous_horiz_pos, self._previous_vert_pos, self._previous_focus_pos = (
+            self._model.scanning.stage_positions()
+        )
+
+        points = self._enabled_collection_points()
+        self._model.scanning.total_frames = len(points)
+
+        self.current_collection_changed.emit(1)
+        self._model.scanning.collect_still_burst(
+            points,
+            exposure=exposure,
+            frame=self._widget.filename_settings.spin_frame_number.value(),
+            filename=self._widget.filename_settings.ipt_filename.text(),
+            filepath=self._widget.filename_settings.ipt_path.text(),
+        )
+
+        self._revert_sample_positions()
+        self._total_frames_reset.emit()
+        self._model.scanning.end_collection()
+        self.current_collection_changed.emit(0)
+
     def _revert_sample_positions(self, with_x_y_z: Optional[bool] = True) -> None:
         self._model.scanning.scan_is_running.emit(True)
         self._model.scanning.status_message_changed.emit("Moving")
@@ -488,43 +676,24 @@ class ScanningController(QObject):
 
     def _move_to_point(self, x: Optional[float] = None, y: Optional[float] = None, z: Optional[float] = None) -> bool:
         """Moves the stages to the collection point positions to prepare for the collection."""
+        return self._model.scanning.move_to_point(x, y, z)
 
-        self._model.scanning.scan_is_running.emit(True)
-        self._model.scanning.status_message_changed.emit("Moving")
+    def abort(self) -> None:
+        """Stops the motion, detector and shutter at once and cancels the running conversions."""
+        self._conversions_cancelled.set()
+        self._model.scanning.abort()
 
-        # Check motor limits
-        limit_check_horiz = self._check_limits(self._horizontal_motor, x)
-        limit_check_vert = self._check_limits(self._vertical_motor, y)
-        limit_check_focus = self._check_limits(self._focus_motor, z)
-
-        if not limit_check_horiz or not limit_check_vert or not limit_check_focus:
-            return False
-
-        if x is not None:
-            caput(self._horizontal_motor + ".VAL", x, wait=True)
-        if y is not None:
-            caput(self._vertical_motor + ".VAL", y, wait=True)
-        if z is not None:
-            caput(self._focus_motor + ".VAL", z, wait=True)
-
-        return True
-
-    def _check_limits(self, pv: str, value: float | None) -> bool:
-        """
-        Checks for high and low limits for a PV.
-        :return: False if exceeds the limits, else True
-        """
-        if value is None:
-            return True
-        if value < caget(pv + ".LLM"):
-            self._model.scanning.error_message_changed.emit(f"You have reached the low limit of the {pv}.")
-            return False
-        if value > caget(pv + ".HLM"):
-            self._model.scanning.error_message_changed.emit(f"You have reached the high limit of the {pv}.")
-            return False
-        return True
+    def stop_collection(self) -> None:
+        """Aborts the running collection, if any."""
+        if self._model.scanning.is_running:
+            self.abort()
 
-    def abort(self) -> None:
-        self._model.scanning.aborted = True
-        self._multiple_collection_aborted = True
-        self._multiple_collection_running = False
+    def cancel_conversions(self) -> None:
+        self._conversions_cancelled.set()
+
+    def conversions_finished(self) -> bool:
+        return not any(thread.is_alive() for thread in self._conversion_threads)
+
+    def stop_preview(self) -> bool:
+        """Stops the preview thread without waiting. Returns True once it has stopped."""
+        return self._preview.stop(timeout=0)
@@ -19,11 +19,32 @@
 # ----------------------------------------------------------------------
 
 from tomoxrd.model.path_model import PathModel
+from tomoxrd.model.style_model import StyleModel
+from tomoxrd.model.crysalis_model import CrysalisModel, CBFNotFoundError
 from tomoxrd.model.pv_model import PVModel, DoubleValuePV, StringValuePV
 from tomoxrd.model.epics_model import EpicsModel, EpicsConfig
 from tomoxrd.model.bmd_model import BMDModel
+from tomoxrd.model.detector_config_model import DetectorConfigModel
+from tomoxrd.model.map_model import MapAxis, MapRow, MapGrid
+from tomoxrd.model.collection_points_model import CollectionPointsModel
+from tomoxrd.model.scan_state_model import ScanStateModel, ScanState
+from tomoxrd.model.frame_progress_model import FrameProgressModel
+from tomoxrd.model.frame_preview_model import FramePreviewModel
+from tomoxrd.model.nexus_writer_model import NexusWriterModel
+from tomoxrd.model.cbf_archive_model import CbfArchiveModel, ArchiveEntry
+from tomoxrd.model.frame_reducer_model import FrameReducerModel
+from tomoxrd.model.frame_stack_model import FrameStack
+from tomoxrd.model.frame_account_model import FrameAccountModel, FrameReport
+from tomoxrd.model.frame_timing_model import FrameTimingModel, FrameTimingStats
 from tomoxrd.model.scanning_model import ScanningModel
+from tomoxrd.model.scan_queue_model import ScanQueueModel, ScanQueueItem
+from tomoxrd.model.scan_history_model import ScanHistoryModel, OverheadFit
+from tomoxrd.model.scan_catalog_model import ScanCatalogModel
+from tomoxrd.model.scan_simulator_model import ScanSimulatorModel, ScanTimingModel, ScanTimeline, ScanPhase
+from tomoxrd.model.scan_estimate_model import ScanEstimateModel
 from tomoxrd.model.qt_worker_model import QtWorkerModel
+from tomoxrd.model.startup_model import StartupModel
+from tomoxrd.model.shutdown_model import ShutdownModel, ShutdownStep
 from tomoxrd.model.event_filter_model import EventFilterModel
 from tomoxrd.model.detector_settings_model import DetectorSettingsModel
 from tomoxrd.model.main_model import MainModel
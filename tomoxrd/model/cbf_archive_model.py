@@ -0,0 +1,246 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class ArchiveEntry:
+    """A single file of the archive, its compressed bytes start at the offset."""
+
+    name: str
+    offset: int
+    size: int
+    length: int
+    sha256: str
+
+
+class CbfArchiveModel:
+    """
+    Packs the .cbf files of a finished dataset into a single archive. Every file is compressed on its own
+    by a pool of threads, so a single file is extracted with one seek through the index at the end of the
+    archive. The zstandard package is used if it is installed, otherwise zlib. The original files are only
+    removed after every file of the archive is read back and its checksum verified.
+    """
+
+    _magic: bytes = b"TXRDCBF1"
+    _trailer: struct.Struct = struct.Struct("<Q8s")
+    _extension: str = ".cbfpack"
+    _frame_number: re.Pattern = re.compile(r"_(\d+)\.cbf$")
+
+    _zstd_level: int = 3
+    _zlib_level: int = 1
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self._workers = workers or min(8, os.cpu_count() or 1)
+
+    @staticmethod
+    def codec() -> str:
+        """Returns the compressor used for new archives."""
+        return "zstd" if importlib.util.find_spec("zstandard") is not None else "zlib"
+
+    def _compressor(self, codec: str) -> Callable[[bytes], bytes]:
+        if codec == "zstd":
+            import zstandard
+            # Compressor objects can't be shared between threads
+            return lambda data: zstandard.ZstdCompressor(level=self._zstd_level).compress(data)
+        return lambda data: zlib.compress(data, self._zlib_level)
+
+    @staticmethod
+    def _decompressor(codec: str) -> Callable[[bytes], bytes]:
+        if codec == "zstd":
+            import zstandard
+            return lambda data: zstandard.ZstdDecompressor().decompress(data)
+        if codec == "zlib":
+            return zlib.decompress
+        raise ValueError(f"Unknown archive codec: {codec}")
+
+    @staticmethod
+    def _read_file(path: str) -> Tuple[bytes, str]:
+        with open(path, "rb") as file:
+            data = file.read()
+        return data, hashlib.sha256(data).hexdigest()
+
+    def _compressed_files(
+            self, files: List[str], codec: str, is_aborted: Callable[[], bool]
+    ) -> Iterator[Tuple[str, int, bytes, str]]:
+        """
+        Yields the name, size, compressed bytes and checksum of the files in order. Only a window of files
+        is read ahead of the writer, to bound the memory of large datasets.
+        """
+        compress = self._compressor(codec)
+
+        def _compress(path: str) -> Tuple[str, int, bytes, str]:
+            data, checksum = self._read_file(path)
+            return os.path.basename(path), len(data), compress(data), checksum
+
+        window = 2 * self._workers
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            for first in range(0, len(files), window):
+                if is_aborted():
+                    return None
+                yield from executor.map(_compress, files[first:first + window])
+
+    def pack(self, path: str, files: List[str], is_aborted: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Writes the files to a new archive, under a temporary name until it is complete. An existing archive
+        is never replaced.
+        :return: False if it was aborted, nothing is left behind
+        """
+        if os.path.exists(path):
+            raise FileExistsError(f"The archive {os.path.basename(path)} already exists")
+
+        def _aborted() -> bool:
+            return is_aborted is not None and is_aborted()
+
+        codec = self.codec()
+        partial_path = path + ".part"
+        entries: List[ArchiveEntry] = []
+
+        with open(partial_path, "wb") as archive:
+            archive.write(self._magic)
+            for name, size, data, checksum in self._compressed_files(files, codec, _aborted):
+                entries.append(ArchiveEntry(name, archive.tell(), len(data), size, checksum))
+                archive.write(data)
+
+            if _aborted() or len(entries) < len(files):
+                aborted = True
+            else:
+                aborted = False
+                # Index and its offset at the end, written once all the files are in
+                index_offset = archive.tell()
+                index = {"codec": codec, "entries": [astuple(entry) for entry in entries]}
+                archive.write(json.dumps(index).encode())
+                archive.write(self._trailer.pack(index_offset, self._magic))
+
+        if aborted or os.path.exists(path):
+            os.remove(partial_path)
+            if not aborted:
+                raise FileExistsError(f"The archive {os.path.basename(path)} already exists")
+            return False
+        os.replace(partial_path, path)
+        return True
+
+    def read_index(self, path: str) -> Tuple[str, List[ArchiveEntry]]:
+        """Returns the codec and the entries of an archive."""
+        with open(path, "rb") as archive:
+            archive.seek(-self._trailer.size, os.SEEK_END)
+            trailer_offset = archive.tell()
+            index_offset, magic = self._trailer.unpack(archive.read(self._trailer.size))
+            if magic != self._magic:
+                raise ValueError(f"Not a CBF archive: {path}")
+            archive.seek(index_offset)
+            index = json.loads(archive.read(trailer_offset - index_offset))
+        return index["codec"], [ArchiveEntry(*entry) for entry in index["entries"]]
+
+    def extract(self, path: str, name: str) -> bytes:
+        """Returns the original bytes of a single file of the archive."""
+        codec, entries = self.read_index(path)
+        entry = next((entry for entry in entries if entry.name == name), None)
+        if entry is None:
+            raise KeyError(f"{name} is not in {os.path.basename(path)}")
+
+        with open(path, "rb") as archive:
+            archive.seek(entry.offset)
+            return self._decompressor(codec)(archive.read(entry.size))
+
+    def verify(self, path: str, files: List[str]) -> bool:
+        """Checks that every file is in the archive, with the size of the original and an intact checksum."""
+        codec, entries = self.read_index(path)
+        decompress = self._decompressor(codec)
+        by_name = {entry.name: entry for entry in entries}
+
+        with open(path, "rb") as archive:
+            for file in files:
+                entry = by_name.get(os.path.basename(file))
+                if entry is None or entry.length != os.path.getsize(file):
+                    return False
+                archive.seek(entry.offset)
+                try:
+                    data = decompress(archive.read(entry.size))
+                except Exception:
+                    # zlib and zstandard raise their own errors for corrupted data
+                    return False
+                if len(data) != entry.length or hashlib.sha256(data).hexdigest() != entry.sha256:
+                    return False
+        return True
+
+    def archive_name(self, filename: str, files: List[str]) -> str:
+        """Returns the archive name of the files, with their frame range if they are numbered."""
+        numbers = [self._frame_number.search(os.path.basename(file)) for file in files]
+        if not files or not all(numbers):
+            return filename + self._extension
+        numbers = [int(number.group(1)) for number in numbers]
+        return f"{filename}_{min(numbers):04d}-{max(numbers):04d}{self._extension}"
+
+    def archive(
+            self,
+            directory: str,
+            filename: str,
+            files: List[str],
+            remove: Optional[bool] = True,
+            is_aborted: Optional[Callable[[], bool]] = None,
+    ) -> Optional[str]:
+        """
+        Packs the files of a dataset to <directory>/<filename>_<first>-<last>.cbfpack, named by the frame
+        range of the files, and removes the originals once the archive is verified. The originals are kept
+        if an archive of the same name already exists.
+        :return: The path of the archive, None if it was aborted or failed
+        """
+        files = [file for file in files if os.path.exists(file)]
+        if not files:
+            print(f"[Archive-Error] - No .cbf files to archive for {filename}")
+            return None
+
+        path = os.path.join(directory, self.archive_name(filename, files)).replace("\\", "/")
+        start_time = time.perf_counter()
+        try:
+            if not self.pack(path, files, is_aborted=is_aborted):
+                return None
+            if not self.verify(path, files):
+                print(f"[Archive-Error] - Verification of {os.path.basename(path)} failed, the originals are kept")
+                return None
+        except (OSError, ValueError) as error:
+            print(f"[Archive-Error] - {error}")
+            if os.path.exists(path + ".part"):
+                os.remove(path + ".part")
+            return None
+
+        original = sum(os.path.getsize(file) for file in files)
+        archived = os.path.getsize(path)
+        if remove:
+            for file in files:
+                os.remove(file)
+
+        print(
+            f"[Archive] - {len(files)} files packed to {os.path.basename(path)}, "
+            f"{archived / max(original, 1) * 100:.0f}% of {original / 1e6:.1f} MB in {time.perf_counter() - start_time:.1f} s"
+        )
+        return path
@@ -0,0 +1,311 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import heapq
+import numpy as np
+from qtpy.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+Point = Tuple[str, Optional[float], Optional[float], Optional[float]]
+
+
+class CollectionPointsModel(QAbstractTableModel):
+    """
+    Table model of the collection points. The points are stored in a structured array with the name
+    index, the x, y, z positions and the enabled state of every point. Empty positions are stored as NaN
+    and are replaced by the current stage positions during the collection.
+    """
+
+    enabled_points_changed: Signal = Signal()
+
+    NAME, X, Y, Z, ENABLED = range(5)
+
+    _headers: Tuple[str, ...] = ("Name", "X", "Y", "Z", "Enabled")
+    _axes: Tuple[str, ...] = ("x", "y", "z")
+    _dtype: np.dtype = np.dtype([
+        ("index", np.int32),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("z", np.float64),
+        ("enabled", np.bool_),
+    ])
+    _initial_capacity: int = 64
+
+    def __init__(self) -> None:
+        super(CollectionPointsModel, self).__init__()
+        self._points = np.zeros(self._initial_capacity, dtype=self._dtype)
+        self._size = 0
+        # Running count of the enabled points, and a counter changed with every position or enabled change
+        self._enabled_count = 0
+        self._revision = 0
+        # Name indices in use, and the deleted ones kept as a heap to reuse the lowest first
+        self._used: Set[int] = set()
+        self._free: List[int] = []
+        # Names edited by the user, by name index
+        self._labels: Dict[int, str] = {}
+
+    def _reserve(self, size: int) -> None:
+        """Grows the storage to fit the given number of points."""
+        if size <= self._points.size:
+            return None
+        points = np.zeros(max(size, 2 * self._points.size), dtype=self._dtype)
+        points[:self._size] = self._points[:self._size]
+        self._points = points
+
+    def _taken(self, index: int) -> bool:
+        return index in self._used or f"pos{index}" in self._labels.values()
+
+    def _next_index(self) -> int:
+        """Returns the index of the next point name, pos{n + 1} or the lowest free name if it exists."""
+        index = self._size + 1
+        if not self._taken(index):
+            return index
+
+        while self._free:
+            index = heapq.heappop(self._free)
+            if not self._taken(index):
+                return index
+
+        index = 1
+        while self._taken(index):
+            index += 1
+        return index
+
+    def _release(self, rows: np.ndarray) -> None:
+        for index in rows["index"].tolist():
+            self._used.discard(index)
+            self._labels.pop(index, None)
+            heapq.heappush(self._free, index)
+
+    @staticmethod
+    def _position(value: float) -> Optional[float]:
+        return None if np.isnan(value) else float(value)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._size
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == self.ENABLED:
+            return flags | Qt.ItemIsUserCheckable
+        return flags | Qt.ItemIsEditable
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= self._size:
+            return None
+
+        row, column = index.row(), index.column()
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        elif role == Qt.CheckStateRole and column == self.ENABLED:
+            return Qt.Checked if self._points["enabled"][row] else Qt.Unchecked
+        elif role in (Qt.DisplayRole, Qt.EditRole):
+            if column == self.NAME:
+                return self.name(row)
+            elif column in (self.X, self.Y, self.Z):
+                value = self._points[self._axes[column - 1]][row]
+                return "" if np.isnan(value) else str(round(float(value), 4))
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or index.row() >= self._size:
+            return False
+
+        row, column = index.row(), index.column()
+        if role == Qt.CheckStateRole and column == self.ENABLED:
+            self.set_enabled(row, Qt.CheckState(value) == Qt.Checked)
+            return True
+        elif role != Qt.EditRole:
+            return False
+
+        if column == self.NAME:
+            return self.rename(row, str(value))
+        elif column in (self.X, self.Y, self.Z):
+            text = str(value).strip()
+            try:
+                position = float(text) if text else np.nan
+            except ValueError:
+                return False
+            self._points[self._axes[column - 1]][row] = position
+            self._revision += 1
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+            return True
+        return False
+
+    def add_point(self, x: Optional[float] = None, y: Optional[float] = None, z: Optional[float] = None) -> int:
+        """Appends an enabled point and returns its row."""
+        row = self._size
+        index = self._next_index()
+
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._reserve(row + 1)
+        self._points[row] = (
+            index,
+            np.nan if x is None else x,
+            np.nan if y is None else y,
+            np.nan if z is None else z,
+            True,
+        )
+        self._used.add(index)
+        self._size += 1
+        self._enabled_count += 1
+        self._revision += 1
+        self.endInsertRows()
+
+        self.enabled_points_changed.emit()
+        return row
+
+    def add_points(self, positions: np.ndarray) -> None:
+        """Appends an (n, 3) array of x, y, z positions as enabled points, NaN keeps the stage position."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if positions.shape[0] == 0:
+            return None
+
+        first, last = self._size, self._size + positions.shape[0] - 1
+        self.beginInsertRows(QModelIndex(), first, last)
+        self._reserve(last + 1)
+        rows = self._points[first:last + 1]
+        for i in range(positions.shape[0]):
+            index = self._next_index()
+            self._used.add(index)
+            rows["index"][i] = index
+            self._size += 1
+        for axis, column in zip(self._axes, positions.T):
+            rows[axis] = column
+        rows["enabled"] = True
+        self._enabled_count += positions.shape[0]
+        self._revision += 1
+        self.endInsertRows()
+
+        self.enabled_points_changed.emit()
+
+    def delete_point(self, row: int) -> None:
+        """Removes the point in the given row."""
+        if not 0 <= row < self._size:
+            return None
+
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._release(self._points[row:row + 1])
+        self._enabled_count -= int(self._points["enabled"][row])
+        self._revision += 1
+        self._points[row:self._size - 1] = self._points[row + 1:self._size]
+        self._size -= 1
+        self.endRemoveRows()
+
+        self.enabled_points_changed.emit()
+
+    def clear_points(self) -> None:
+        """Removes all the points."""
+        self.beginResetModel()
+        self._points = np.zeros(self._initial_capacity, dtype=self._dtype)
+        self._size = 0
+        self._enabled_count = 0
+        self._revision += 1
+        self._used.clear()
+        self._free.clear()
+        self._labels.clear()
+        self.endResetModel()
+
+        self.enabled_points_changed.emit()
+
+    def check_all_points(self) -> None:
+        """Enables all the points."""
+        if self._size == 0:
+            return None
+
+        self._points["enabled"][:self._size] = True
+        self._enabled_count = self._size
+        self._revision += 1
+        self.dataChanged.emit(
+            self.index(0, self.ENABLED), self.index(self._size - 1, self.ENABLED), [Qt.CheckStateRole]
+        )
+        self.enabled_points_changed.emit()
+
+    def set_enabled(self, row: int, enabled: bool) -> None:
+        if not 0 <= row < self._size or self._points["enabled"][row] == enabled:
+            return None
+
+        self._points["enabled"][row] = enabled
+        self._enabled_count += 1 if enabled else -1
+        self._revision += 1
+        index = self.index(row, self.ENABLED)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.enabled_points_changed.emit()
+
+    def rename(self, row: int, name: str) -> bool:
+        """Renames the point in the given row, names have to be unique."""
+        name = name.strip()
+        if not name or not 0 <= row < self._size:
+            return False
+        if name == self.name(row):
+            return True
+        if any(name == self.name(other) for other in range(self._size)):
+            return False
+
+        index = int(self._points["index"][row])
+        if name == f"pos{index}":
+            self._labels.pop(index, None)
+        else:
+            self._labels[index] = name
+        model_index = self.index(row, self.NAME)
+        self.dataChanged.emit(model_index, model_index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def is_enabled(self, row: int) -> bool:
+        return bool(self._points["enabled"][row])
+
+    def name(self, row: int) -> str:
+        index = int(self._points["index"][row])
+        return self._labels.get(index, f"pos{index}")
+
+    def point(self, row: int) -> Point:
+        """Returns the name and x, y, z positions of the point in the given row."""
+        x, y, z = (self._position(self._points[axis][row]) for axis in self._axes)
+        return self.name(row), x, y, z
+
+    def enabled_points(self) -> List[Point]:
+        """Returns the name and x, y, z positions of the enabled points."""
+        return [self.point(row) for row in np.flatnonzero(self._points["enabled"][:self._size]).tolist()]
+
+    def enabled_positions(self) -> np.ndarray:
+        """Returns the (n, 3) x, y, z positions of the enabled points, NaN for the empty positions."""
+        points = self._points[:self._size]
+        points = points[points["enabled"]]
+        return np.column_stack([points[axis] for axis in self._axes])
+
+    @property
+    def enabled_count(self) -> int:
+        return self._enabled_count
+
+    @property
+    def revision(self) -> int:
+        """Changes with every position or enabled change, used to invalidate the cached estimates."""
+        return self._revision
+
@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import copy
+import os
+import shutil
+import numpy as np
+from typing import Callable, Optional
+
+
+class CBFNotFoundError(Exception):
+
+    def __init__(self, msg) -> None:
+        super(CBFNotFoundError, self).__init__()
+        self.msg = msg
+
+
+class CrysalisModel:
+    """
+    File pipeline that converts the .cbf step scan collections to CrysAlis esperanto datasets.
+    The cryio package is only imported when a conversion runs, to keep the startup fast.
+    """
+
+    # File paths
+    _set_filepath: str = "T:/dac_user/Setup/Crysalis/pilatus_1m.set"
+    _ccd_filepath: str = "T:/dac_user/Setup/Crysalis/pilatus_1m.ccd"
+    _par_filepath: str = "T:/dac_user/Setup/Crysalis/pilatus_1m_TOMO_37keV.par"
+
+    _default_scan: dict = {
+        "count": 10,
+        "omega": 0,
+        "omega_start": 0.0,
+        "omega_end": 5.0,
+        "pixel_size": 0.172,
+        "omega_runs": None,
+        "theta": 0,
+        "kappa": 0,
+        "phi": 0,
+        "domega": 0.5,
+        "dtheta": 0,
+        "dkappa": 0,
+        "dphi": 0,
+        "center_x": 525,
+        "center_y": 514,
+        "alpha": 50,
+        "dist": 206.32,
+        "l1": 0.2952,
+        "l2": 0.2952,
+        "l12": 0.2952,
+        "b": 0.2952,
+        "mono": 0.99,
+        "monotype": 'SYNCHROTRON',
+        "chip": [1044, 1044],
+        "Exposure_time": 0.5,
+    }
+
+    def __init__(self) -> None:
+        self._scans = {0: [copy.deepcopy(self._default_scan)]}
+
+    @staticmethod
+    def create_esperanto_directory(filepath: str, filename: str) -> None:
+        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
+
+        if not os.path.exists(target_directory):
+            os.makedirs(target_directory)
+
+    def create_par_file(self, filepath: str, filename: str) -> None:
+        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
+        par_file = os.path.join(target_directory, filename + ".par").replace("\\", "/")
+
+        with open(par_file, "w") as pf:
+            with open(self._par_filepath, "r") as calf:
+                for line in calf:
+                    if line.startswith("FILE CHIP"):
+                        pf.write(f"FILE CHIP {filename}.ccd\n")
+                    else:
+                        pf.write(line)
+
+    def copy_set_and_ccd_files(self, filepath: str, filename: str) -> None:
+        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
+        shutil.copy(self._set_filepath, os.path.join(target_directory, f"{filename}.set")).replace("\\", "/")
+        shutil.copy(self._ccd_filepath, os.path.join(target_directory, f"{filename}.ccd")).replace("\\", "/")
+
+    @staticmethod
+    def convert_to_square(images_array: np.ndarray) -> np.ndarray:
+        a = np.empty((1043, 31), dtype=images_array.dtype)
+        b = np.empty((1043, 32), dtype=images_array.dtype)
+        a.fill(-1)
+        b.fill(-1)
+
+        converted_images = np.hstack((b, np.hstack((images_array, a))))
+
+        c = np.empty((1, 1044), dtype=images_array.dtype)
+        c.fill(-1)
+
+        return np.vstack((converted_images, c))
+
+    def prepare_for_crysalis(
+            self,
+            num_angles: int,
+            start: float,
+            end: float,
+            step: float,
+            exposure: float,
+    ) -> None:
+
+        self._scans[0][0]["count"] = num_angles
+        self._scans[0][0]["omega_start"] = start
+        self._scans[0][0]["omega_end"] = end
+        self._scans[0][0]["domega"] = step
+        self._scans[0][0]["Exposure_time"] = exposure
+
+    def convert_to_esperanto(
+            self,
+            filepath: str,
+            filename: str,
+            num_angles: int,
+            starting_frame: Optional[int] = 1,
+    ) -> None:
+        from cryio import cbfimage, esperanto
+
+        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
+
+        for i in range(int(starting_frame - 1), int(starting_frame + num_angles - 1), 1):
+            cbf_file = os.path.join(filepath, filename + "_{0:04d}".format(i + 1) + ".cbf").replace("\\", "/")
+            esperanto_file = os.path.join(target_directory, f"{filename}_1_{i + 1}.esperanto").replace("\\", "/")
+
+            try:
+                if not os.path.exists(cbf_file):
+                    raise CBFNotFoundError(f"[CBF-Error] - {cbf_file} does not exist!")
+            except CBFNotFoundError as error:
+                print(error.msg)
+            else:
+                trans_image = np.flip(cbfimage.CbfImage(cbf_file).array, 0)
+                eps_target_image = self.convert_to_square(trans_image)
+
+                kwargs = self._scans[0][0]
+                kwargs['omega'] = kwargs['omega_start'] + kwargs['domega'] * i
+
+                esperanto.EsperantoImage().save(esperanto_file, eps_target_image, **kwargs)
+
+    def create_crysalis_exp_settings_file(self, filepath: str, filename: str) -> None:
+        from cryio import crysalis
+
+        target_directory = os.path.join(filepath, f"{filename}_crys").replace("\\", "/")
+
+        run_header = crysalis.RunHeader(filename.encode(), target_directory.encode(), 1)
+        run_name = os.path.join(target_directory, filename).replace("\\", "/")
+        run_file = []
+
+        for omega_run in self._scans[0]:
+            dscr = crysalis.RunDscr(0)
+            dscr.axis = crysalis.SCAN_AXIS['OMEGA']
+            dscr.kappa = omega_run['kappa']
+            dscr.omegaphi = 0
+            dscr.start = omega_run['omega_start']
+            dscr.end = omega_run['omega_end']
+            dscr.width = omega_run['domega']
+            dscr.todo = dscr.done = omega_run['count']
+            dscr.exposure = 1
+            run_file.append(dscr)
+
+        crysalis.saveRun(run_name, run_header, run_file)
+        crysalis.saveCrysalisExpSettings(target_directory)
+
+    def create_esperanto_files(
+            self,
+            filepath: str,
+            filename: str,
+            num_angles: int,
+            start: float,
+            end: float,
+            step: float,
+            exposure: float,
+            starting_frame: Optional[int] = 1,
+            is_aborted: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Runs the full CrysAlis pipeline for a single collection point, checking for aborts between steps."""
+        def _aborted() -> bool:
+            return is_aborted is not None and is_aborted()
+
+        if not _aborted():
+            self.prepare_for_crysalis(num_angles=num_angles, start=start, end=end, step=step, exposure=exposure)
+
+        if not _aborted():
+            self.create_esperanto_directory(filepath=filepath + filename, filename=filename)
+
+        if not _aborted():
+            self.copy_set_and_ccd_files(filepath=filepath + filename, filename=filename)
+
+        if not _aborted():
+            self.create_crysalis_exp_settings_file(filepath=filepath + filename, filename=filename)
+
+        if not _aborted():
+            self.create_par_file(filepath=filepath + filename, filename=filename)
+
+        if not _aborted():
+            self.convert_to_esperanto(
+                filepath=filepath + filename,
+                filename=filename,
+                num_angles=num_angles,
+                starting_frame=starting_frame,
+            )
+
+    @property
+    def par_filepath(self) -> str:
+        return self._par_filepath
+
+    @par_filepath.setter
+    def par_filepath(self, value: str) -> None:
+        self._par_filepath = value
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+import math
+import threading
+import time
+from epics import get_pv
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class DetectorConfigModel:
+    """
+    Write-through cache of the detector configuration PVs. The last known value of every PV is kept
+    from channel access monitors and from the completed writes. Only the values that differ are written,
+    all the writes of a configuration are issued together and waited for with a single completion barrier.
+    The original values of the changed PVs are remembered, so a reset restores only what was changed.
+    """
+
+    def __init__(self, pvs: Iterable[str], timeout: Optional[float] = 10.0) -> None:
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        # Original values of the changed PVs, in order of the first change
+        self._changes: Dict[str, Any] = {}
+
+        # The connections are started here and waited for by connect
+        self._pvs = {name: get_pv(name, auto_monitor=True) for name in pvs}
+
+    def connect(self) -> None:
+        """Waits for the PV connections and reads their current values, blocks until the IOCs reply."""
+        for name, pv in self._pvs.items():
+            pv.wait_for_connection()
+            self._values[name] = pv.get(as_string=self._is_string(name))
+            pv.add_callback(self._on_change)
+
+    def _is_string(self, name: str) -> bool:
+        """File names and paths are char arrays, they are compared as strings."""
+        pv = self._pvs[name]
+        return pv.type is not None and "char" in pv.type and (pv.count or 1) > 1
+
+    def _on_change(self, pvname: str, value: Any, char_value: Optional[str] = None, **kwargs) -> None:
+        if pvname in self._pvs and self._is_string(pvname):
+            value = char_value
+        with self._lock:
+            self._values[pvname] = value
+
+    @staticmethod
+    def _differs(current: Any, value: Any) -> bool:
+        if current is None:
+            return True
+        if isinstance(value, str) or isinstance(current, str):
+            return str(current) != str(value)
+        try:
+            return not math.isclose(float(current), float(value), rel_tol=1e-9, abs_tol=1e-12)
+        except (TypeError, ValueError):
+            return current != value
+
+    def value(self, pv: str) -> Any:
+        """Returns the last known value of a PV."""
+        with self._lock:
+            return self._values.get(pv)
+
+    def apply(self, values: Dict[str, Any], keep: Optional[Iterable[str]] = ()) -> List[str]:
+        """
+        Writes the values that differ from the last known ones and waits for all the writes to complete.
+        The PVs in keep are not restored by the next reset.
+        :return: The names of the written PVs
+        """
+        keep = set(keep)
+        pending = []
+        with self._lock:
+            for name, value in values.items():
+                current = self._values.get(name)
+                if not self._differs(current, value):
+                    continue
+                if name not in keep and name not in self._changes:
+                    self._changes[name] = current
+                pending.append((name, value))
+
+        for name, value in pending:
+            self._pvs[name].put(value, wait=False, use_complete=True)
+
+        # Single completion barrier for all the writes
+        deadline = time.perf_counter() + self._timeout
+        while not all(self._pvs[name].put_complete for name, _ in pending):
+            if time.perf_counter() > deadline:
+                incomplete = [name for name, _ in pending if not self._pvs[name].put_complete]
+                print(f"[Detector-Config-Error] - Writes did not complete: {', '.join(incomplete)}")
+                break
+            time.sleep(0.001)
+
+        with self._lock:
+            for name, value in pending:
+                if self._pvs[name].put_complete:
+                    self._values[name] = value
+        return [name for name, _ in pending]
+
+    def restore(self, defaults: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Writes back the original values of the PVs changed since the last restore.
+        PVs with a default value are reset to it instead, so an interrupted collection is not restored.
+        """
+        defaults = defaults or {}
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        values = {name: defaults.get(name, value) for name, value in changes.items()}
+        return self.apply(values, keep=values.keys())
+
+    @property
+    def changed(self) -> List[str]:
+        with self._lock:
+            return list(self._changes)
@@ -22,8 +22,6 @@ from dataclasses import dataclass, field
 from enum import Enum
 from epics import pv
 
-from tomoxrd.widget.custom import MsgBox
-
 
 class EpicsConnectionError(Exception):
     """No epics connection exception."""
@@ -34,6 +32,8 @@ class EpicsConnectionError(Exception):
 
     @property
     def message(self) -> str:
+        # Imported here, the widget package imports the models
+        from tomoxrd.widget.custom import MsgBox
         MsgBox(msg=self._message)
         return f"[Epics-Connection-Error] - {self._message}"
 
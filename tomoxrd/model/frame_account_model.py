@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import os
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from qtpy.QtCore import QObject, Signal
+from typing import List, Optional
+
+
+@dataclass
+class FrameReport:
+    """Expected and received frames of a collection point, with the arrival time of every received frame."""
+
+    expected: int
+    received: int
+    missing: List[int] = field(default_factory=lambda: [])  # Indices of the missing frames
+    arrivals: List[float] = field(default_factory=lambda: [])  # Seconds since the start of the acquisition
+    stalls: int = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.received >= self.expected and not self.missing
+
+    @property
+    def longest_gap(self) -> float:
+        """Returns the longest time between two received frames."""
+        if len(self.arrivals) < 2:
+            return 0.0
+        return float(np.max(np.diff(self.arrivals)))
+
+
+class FrameAccountModel(QObject):
+    """
+    Real-time accounting of the expected against the received frames of a collection point. Every new
+    frame is timestamped on arrival, a stall is flagged as soon as no frame arrives for several frame
+    periods, and the missing frames are identified when the point ends.
+    """
+
+    stall_detected: Signal = Signal(str)
+
+    _stall_factor: float = 5.0
+    _stall_grace: float = 2.0
+
+    def __init__(self) -> None:
+        super(FrameAccountModel, self).__init__()
+        self._lock = threading.Lock()
+        self._expected = 0
+        self._received = 0
+        self._arrivals = np.empty(0, dtype=np.float64)
+        self._started_at = time.perf_counter()
+        self._last_at = self._started_at
+        self._threshold = self._stall_grace
+        self._stalled = False
+        self._stalls = 0
+
+    def start(self, expected: int, period: float) -> None:
+        """Starts the accounting of a point, with the expected number of frames and the time between frames."""
+        with self._lock:
+            self._expected = expected
+            self._received = 0
+            self._arrivals = np.full(expected, np.nan, dtype=np.float64)
+            self._started_at = time.perf_counter()
+            self._last_at = self._started_at
+            self._threshold = period * self._stall_factor + self._stall_grace
+            self._stalled = False
+            self._stalls = 0
+
+    def update(self, received: int) -> None:
+        """Timestamps the newly received frames and checks for a stall. Called on every poll."""
+        now = time.perf_counter()
+        with self._lock:
+            if received > self._received:
+                self._arrivals[self._received:min(received, self._expected)] = now - self._started_at
+                self._received = received
+                self._last_at = now
+                self._stalled = False
+                return None
+
+            if self._stalled or self._received >= self._expected or now - self._last_at < self._threshold:
+                return None
+            self._stalled = True
+            self._stalls += 1
+            message = (
+                f"No frame for {now - self._last_at:.1f} s after frame {self._received} of {self._expected}."
+            )
+        self.stall_detected.emit(message)
+
+    def finish(self, received: int, files: Optional[List[str]] = None) -> FrameReport:
+        """
+        Ends the point and returns its report. If frames are missing, the expected files show which ones,
+        otherwise the frames after the last received one are reported missing.
+        """
+        self.update(received)
+        with self._lock:
+            expected, received = self._expected, self._received
+            arrivals = self._arrivals[:min(received, expected)]
+            stalls = self._stalls
+
+        missing = []
+        if received < expected:
+            if files is not None:
+                missing = [index for index, path in enumerate(files) if not os.path.exists(path)]
+            else:
+                missing = list(range(received, expected))
+
+        return FrameReport(
+            expected=expected,
+            received=received,
+            missing=missing,
+            arrivals=[round(float(arrival), 4) for arrival in arrivals],
+            stalls=stalls,
+        )
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import os
+import threading
+import time
+from qtpy.QtCore import QObject, Signal
+from typing import Callable, Optional
+
+from tomoxrd.util import bin_frame, log_scale, read_frame
+
+
+class FramePreviewModel(QObject):
+    """
+    Reads the newest detector frame on a background thread and emits it as a binned, log-scaled 8 bit image.
+    Requests that arrive while a frame is processed are merged, so the preview drops the intermediate frames
+    when it falls behind instead of queueing them.
+    """
+
+    preview_changed: Signal = Signal(object, str)  # 8 bit image, file name
+
+    def __init__(
+            self,
+            locate: Callable[[], Optional[str]],
+            binning: Optional[int] = 4,
+            min_interval: Optional[float] = 0.5,
+    ) -> None:
+        super(FramePreviewModel, self).__init__()
+        # Returns the path of the newest frame, None if there is no frame yet
+        self._locate = locate
+        self._binning = binning
+        self._min_interval = min_interval
+
+        self._requested = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_path: Optional[str] = None
+
+    def request(self) -> None:
+        """Asks for a preview of the newest frame, without blocking the caller."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, args=(), daemon=True)
+            self._thread.start()
+        self._requested.set()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Stops the preview thread. Returns False if it did not stop within the timeout."""
+        self._stopped.set()
+        self._requested.set()
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self) -> None:
+        while True:
+            self._requested.wait()
+            if self._stopped.is_set():
+                break
+            self._requested.clear()
+
+            start = time.perf_counter()
+            self._update_preview()
+
+            # Limit the reads, the requests of the meantime are merged into the next one
+            self._stopped.wait(max(self._min_interval - (time.perf_counter() - start), 0.0))
+
+    def _update_preview(self) -> None:
+        path = self._locate()
+        if path is None or path == self._last_path or not os.path.isfile(path):
+            return None
+
+        try:
+            image = log_scale(bin_frame(read_frame(path), self._binning))
+        except (OSError, ValueError, KeyError) as error:
+            print(f"[Preview-Error] - {os.path.basename(path)}: {error}")
+            return None
+
+        self._last_path = path
+        self.preview_changed.emit(image, os.path.basename(path))
+
+    @property
+    def binning(self) -> int:
+        return self._binning
+
+    @binning.setter
+    def binning(self, value: int) -> None:
+        self._binning = value
+        self._last_path = None
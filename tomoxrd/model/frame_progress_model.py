@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+import threading
+import time
+from qtpy.QtCore import QObject, Signal
+from typing import Optional
+
+
+class FrameProgressModel(QObject):
+    """
+    Coalesces the frame updates of a collection to the GUI refresh rate. The counts are always exact,
+    only the emitted signals are limited to one update per refresh interval, plus the final update.
+    """
+
+    frame_number_changed: Signal = Signal(int)
+    frame_counter_changed: Signal = Signal(int)
+    rate_changed: Signal = Signal(float, float)  # frames/s, seconds to finish
+
+    def __init__(self, refresh_rate: Optional[float] = 10.0) -> None:
+        super(FrameProgressModel, self).__init__()
+        self._lock = threading.Lock()
+        self._interval = 1.0 / refresh_rate
+        self._total = 0
+        self._frame_number: Optional[int] = None
+        self._counter = 0
+        self._first_counter = 0
+        self._first_frame_at: Optional[float] = None
+        self._last_frame_at: Optional[float] = None
+        self._emitted_at = 0.0
+        self._dirty = False
+
+    def start(self, total: int) -> None:
+        """Starts counting the frames of a new collection."""
+        with self._lock:
+            self._total = total
+            self._frame_number = None
+            self._counter = 0
+            self._first_counter = 0
+            self._first_frame_at = None
+            self._last_frame_at = None
+            self._emitted_at = 0.0
+            self._dirty = False
+
+    def update(self, counter: int, frame_number: Optional[int] = None) -> None:
+        """
+        Stores the received frames and the current frame number, emitting them if the refresh interval
+        has passed. Can be called on every poll, repeated values are ignored.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if counter != self._counter:
+                if self._first_frame_at is None or counter < self._counter:
+                    self._first_frame_at = now
+                    self._first_counter = counter
+                self._last_frame_at = now
+                self._counter = counter
+                self._dirty = True
+            if frame_number is not None and frame_number != self._frame_number:
+                self._frame_number = frame_number
+                self._dirty = True
+
+            if not self._dirty or now - self._emitted_at < self._interval:
+                return None
+        self.flush()
+
+    def flush(self) -> None:
+        """Emits the current counts if they changed since the last emission."""
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            self._emitted_at = time.perf_counter()
+            frame_number, counter = self._frame_number, self._counter
+            frames_per_second, remaining = self._rate()
+
+        if frame_number is not None:
+            self.frame_number_changed.emit(frame_number)
+        self.frame_counter_changed.emit(counter)
+        self.rate_changed.emit(frames_per_second, remaining)
+
+    def _rate(self) -> tuple:
+        """Returns the frames/s since the first received frame and the seconds to finish. Requires the lock."""
+        if self._first_frame_at is None or self._last_frame_at <= self._first_frame_at:
+            return 0.0, 0.0
+        frames_per_second = (self._counter - self._first_counter) / (self._last_frame_at - self._first_frame_at)
+        if frames_per_second <= 0:
+            return 0.0, 0.0
+        return frames_per_second, max(self._total - self._counter, 0) / frames_per_second
+
+    @property
+    def refresh_rate(self) -> float:
+        return 1.0 / self._interval
+
+    @refresh_rate.setter
+    def refresh_rate(self, value: float) -> None:
+        self._interval = 1.0 / value
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def counter(self) -> int:
+        """Returns the exact number of received frames."""
+        with self._lock:
+            return self._counter
+
+    @property
+    def frame_number(self) -> Optional[int]:
+        with self._lock:
+            return self._frame_number
+
+    @property
+    def frames_per_second(self) -> float:
+        with self._lock:
+            return self._rate()[0]
+
+    @property
+    def finish_time(self) -> Optional[float]:
+        """Returns the expected finish time as a timestamp, None before the frame rate is known."""
+        with self._lock:
+            frames_per_second, remaining = self._rate()
+        if frames_per_second == 0:
+            return None
+        return time.time() + remaining
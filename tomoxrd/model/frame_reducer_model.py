@@ -0,0 +1,201 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import os
+import threading
+import time
+import numpy as np
+from qtpy.QtCore import QObject, Signal
+from typing import List, Optional
+
+from tomoxrd.model import NexusWriterModel
+from tomoxrd.util import read_frame, write_tiff
+
+
+class FrameReducerModel(QObject):
+    """
+    Streaming sum, max and mean projections of the frames of a collection point. The frames are read on a
+    background thread as soon as the detector reports them, and added to float accumulators that are reused
+    between points of the same frame size.
+    """
+
+    projections_ready: Signal = Signal(dict)  # sum, max, mean and frames
+
+    _read_retries: int = 5
+    _retry_delay: float = 0.05
+
+    def __init__(self) -> None:
+        super(FrameReducerModel, self).__init__()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._files: List[str] = []
+        self._merged_file: Optional[str] = None
+        self._container: Optional[NexusWriterModel] = None
+        self._available = 0
+        self._closed = False
+        self._cancelled = False
+        self._frames = 0
+
+        # Reused accumulators
+        self._sum: Optional[np.ndarray] = None
+        self._max: Optional[np.ndarray] = None
+
+    def start(
+            self, files: List[str], merged_file: Optional[str] = None, container: Optional[NexusWriterModel] = None
+    ) -> None:
+        """
+        Starts reducing the files of a new point, in the order they are written. The sum projection
+        is saved as the merged file, and every read frame is added to the container, if given.
+        A previous reduction that was never closed is cancelled, it would otherwise wait for frames forever.
+        """
+        with self._condition:
+            unfinished = not self._closed
+        if unfinished:
+            self.cancel()
+        self.wait()
+        with self._condition:
+            self._files = list(files)
+            self._merged_file = merged_file
+            self._container = container
+            self._available = 0
+            self._closed = False
+            self._cancelled = False
+            self._frames = 0
+        self._thread = threading.Thread(target=self._run, args=(), daemon=True)
+        self._thread.start()
+
+    def frames_available(self, count: int) -> None:
+        """Reports the number of frames the detector has saved so far."""
+        with self._condition:
+            if count > self._available:
+                self._available = count
+                self._condition.notify_all()
+
+    def close(self, count: Optional[int] = None) -> None:
+        """No more frames will be reported. The reducer finishes the available frames without blocking."""
+        with self._condition:
+            if count is not None:
+                self._available = max(self._available, count)
+            self._closed = True
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        """Stops the reduction, nothing is emitted or saved."""
+        with self._condition:
+            self._cancelled = True
+            self._closed = True
+            self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the running reduction to finish. Returns False on timeout."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _next_file(self) -> Optional[str]:
+        """Waits for the next saved frame. Returns None when the point is finished or cancelled."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._cancelled or self._frames < min(self._available, len(self._files)) or self._closed
+            )
+            if self._cancelled or self._frames >= min(self._available, len(self._files)):
+                return None
+            return self._files[self._frames]
+
+    def _read(self, path: str) -> Optional[np.ndarray]:
+        """Reads a frame, retrying while the file is still being written."""
+        for _ in range(self._read_retries):
+            try:
+                return read_frame(path)
+            except (OSError, ValueError):
+                time.sleep(self._retry_delay)
+        print(f"[Reducer-Error] - Could not read {os.path.basename(path)}")
+        return None
+
+    def _add(self, frame: np.ndarray) -> None:
+        if self._frames == 0:
+            if self._sum is None or self._sum.shape != frame.shape:
+                self._sum = np.zeros(frame.shape, dtype=np.float64)
+                self._max = np.empty(frame.shape, dtype=np.float64)
+            self._sum.fill(0.0)
+            self._max.fill(-np.inf)
+        np.add(self._sum, frame, out=self._sum)
+        np.maximum(self._max, frame, out=self._max)
+
+    def _write(self, frame: np.ndarray) -> None:
+        """Adds the frame to the container, a failed write only stops the container."""
+        if self._container is None:
+            return None
+        try:
+            self._container.write(frame)
+        except (OSError, ValueError) as error:
+            print(f"[Reducer-Error] - Could not write the container: {error}")
+            self._close_container()
+
+    def _close_container(self) -> None:
+        if self._container is None:
+            return None
+        try:
+            self._container.close()
+        except (OSError, ValueError) as error:
+            print(f"[Reducer-Error] - Could not close the container: {error}")
+        self._container = None
+
+    def _run(self) -> None:
+        while True:
+            path = self._next_file()
+            if path is None:
+                break
+            frame = self._read(path)
+            if frame is None:
+                self.cancel()
+                break
+            self._add(frame)
+            self._write(frame)
+            with self._condition:
+                self._frames += 1
+
+        self._close_container()
+
+        with self._condition:
+            if self._cancelled or self._frames == 0:
+                return None
+            projections = self._projections()
+            merged_file = self._merged_file
+
+        if merged_file is not None:
+            write_tiff(merged_file, np.round(projections["sum"]).astype(np.int32))
+        self.projections_ready.emit(projections)
+
+    def _projections(self) -> dict:
+        """Returns copies of the projections, the accumulators are reused by the next point."""
+        return {
+            "sum": self._sum.copy(),
+            "max": self._max.copy(),
+            "mean": self._sum / self._frames,
+            "frames": self._frames,
+        }
+
+    @property
+    def frames(self) -> int:
+        """Returns the number of reduced frames of the current point."""
+        with self._condition:
+            return self._frames
@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import glob
+import os
+import re
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+from tomoxrd.util import read_frame
+
+
+class FrameStack:
+    """
+    Lazy (frames, rows, cols) array over the frame files of a collection. A frame is only read when it is
+    indexed, the uncompressed TIFF and esperanto frames are memory-mapped and the compressed CBF and
+    esperanto frames are decoded. The most recently used frames are kept in an LRU cache. The cached
+    memory-mapped frames keep their files open until clear_cache or close is called, or the stack is used
+    as a context manager.
+    """
+
+    # Searched in this order when a directory holds more than one format
+    _extensions: tuple = (".cbf", ".esperanto", ".tif", ".tiff")
+    _numbered_file: re.Pattern = re.compile(r"^(.*)_(\d+)\.\w+$")
+
+    def __init__(self, files: List[str], cache_size: Optional[int] = 32) -> None:
+        if not files:
+            raise ValueError("A frame stack needs at least one file.")
+        self._files = list(files)
+        self._cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        first = self._frame(0)
+        self._frame_shape: Tuple[int, int] = first.shape
+        self._dtype = first.dtype
+
+    @classmethod
+    def open(
+            cls, directory: str, filename: Optional[str] = None, extension: Optional[str] = None, **kwargs
+    ) -> "FrameStack":
+        """
+        Opens the <filename>_<frame> files of a collection directory, ordered by their frame number. The
+        merged frames are skipped, the esperanto files are also searched in the <filename>_crys directory.
+        :param filename: The file name of the collection, all the numbered files if not given
+        :param extension: The frame format, the first of .cbf, .esperanto and .tif found if not given
+        """
+        for candidate in (extension,) if extension else cls._extensions:
+            candidate = candidate if candidate.startswith(".") else f".{candidate}"
+            directories = [directory]
+            if candidate == ".esperanto" and filename:
+                directories.append(os.path.join(directory, f"{filename}_crys"))
+
+            for folder in directories:
+                frames = []
+                for file in glob.glob(os.path.join(glob.escape(folder), f"*{candidate}")):
+                    match = cls._numbered_file.match(os.path.basename(file))
+                    # The esperanto files of a run are numbered as <filename>_1_<frame>
+                    if match and (filename is None or match.group(1) in (filename, f"{filename}_1")):
+                        frames.append((int(match.group(2)), file))
+                if frames:
+                    return cls([file for _, file in sorted(frames)], **kwargs)
+
+        raise FileNotFoundError(f"No frames of {filename or 'any collection'} found in {directory}")
+
+    def _frame(self, index: int) -> np.ndarray:
+        """Returns a frame from the cache, reading it on a miss."""
+        with self._lock:
+            frame = self._cache.get(index)
+            if frame is not None:
+                self._cache.move_to_end(index)
+                return frame
+
+        # Read outside the lock, so the threads reading other frames don't wait
+        frame = read_frame(self._files[index])
+        frame.flags.writeable = False
+
+        with self._lock:
+            self._cache[index] = frame
+            self._cache.move_to_end(index)
+            while len(self._cache) > max(self._cache_size, 1):
+                self._cache.popitem(last=False)
+        return frame
+
+    def _indices(self, key) -> np.ndarray:
+        """Returns the frame indices of an integer, slice, sequence or boolean mask."""
+        if isinstance(key, slice):
+            return np.arange(len(self))[key]
+
+        indices = np.asarray(key)
+        if indices.dtype == bool:
+            if indices.shape != (len(self),):
+                raise IndexError(f"Boolean index of shape {indices.shape} does not match {len(self)} frames")
+            return np.flatnonzero(indices)
+        if not np.issubdtype(indices.dtype, np.integer):
+            raise IndexError(f"Invalid frame index: {key!r}")
+        if np.any((indices < -len(self)) | (indices >= len(self))):
+            raise IndexError(f"Frame index out of range for {len(self)} frames")
+        return indices % len(self)
+
+    def __getitem__(self, key) -> np.ndarray:
+        """
+        Indexes the stack like a (frames, rows, cols) array, e.g. stack[5], stack[100:200:5] or
+        stack[:, 100:200, 300:400]. Only the selected frames are read.
+        """
+        key, pixels = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if len(pixels) > 2:
+            raise IndexError("A frame stack has three dimensions")
+
+        indices = self._indices(key)
+        if indices.ndim == 0:
+            return self._frame(int(indices))[pixels]
+
+        # Only the selected pixels of every frame are copied
+        frames = [self._frame(int(index))[pixels] for index in indices]
+        if not frames:
+            empty = np.empty((0, *self._frame_shape), dtype=self._dtype)
+            return empty[(slice(None), *pixels)]
+        return np.stack(frames)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for index in range(len(self)):
+            yield self._frame(index)
+
+    def clear_cache(self) -> None:
+        """Drops the cached frames, releasing the memory maps that are not referenced elsewhere."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """Releases the cached frames, the frames that are indexed later are read again."""
+        self.clear_cache()
+
+    def __enter__(self) -> "FrameStack":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return len(self), *self._frame_shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    @property
+    def files(self) -> List[str]:
+        return list(self._files)
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import threading
+import numpy as np
+from dataclasses import asdict, dataclass
+from epics import get_pv
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class FrameTimingStats:
+    """Throughput and timing of the frames of a collection point."""
+
+    frames: int
+    frames_per_second: float
+    period: float  # Mean time between frames
+    jitter: float  # Standard deviation of the time between frames
+    longest_period: float
+    dead_time: float  # Period minus the exposure
+    excess: float  # Period minus the assumed period (exposure + readout)
+
+    def to_dict(self) -> dict:
+        return {key: round(value, 6) if isinstance(value, float) else value for key, value in asdict(self).items()}
+
+
+class FrameTimingModel:
+    """
+    Records the arrival time and the commanded omega of every frame from a monitor of the detector array
+    counter, into a preallocated ring buffer. The monitor callback only writes a row of the buffer, the
+    statistics are computed when the point ends.
+    """
+
+    _dtype: np.dtype = np.dtype([("frame", np.int64), ("time", np.float64), ("omega", np.float64)])
+
+    def __init__(self, pv: str, capacity: Optional[int] = 16384, readout_time: Optional[float] = 0.005) -> None:
+        self._lock = threading.RLock()
+        self._buffer = np.zeros(capacity, dtype=self._dtype)
+        self._capacity = capacity
+        self._readout_time = readout_time
+        self._count = 0
+        self._recording = False
+        self._omega_start = np.nan
+        self._omega_step = 0.0
+        self._exposure = 0.0
+
+        self._pv = get_pv(pv, auto_monitor=True)
+        self._pv.add_callback(self._on_frame)
+
+    def start(self, exposure: float, omega_start: Optional[float] = None, omega_step: Optional[float] = None) -> None:
+        """Starts recording the frames of a point. The omega of frame n is omega_start + n * omega_step."""
+        with self._lock:
+            self._count = 0
+            self._exposure = exposure
+            self._omega_start = np.nan if omega_start is None else omega_start
+            self._omega_step = omega_step or 0.0
+            self._recording = True
+
+    def _on_frame(self, value=None, timestamp=None, **kwargs) -> None:
+        """Monitor callback of the array counter, runs on the channel access thread."""
+        with self._lock:
+            if not self._recording or value is None or value <= 0:
+                return None
+            omega = self._omega_start + (value - 1) * self._omega_step
+            self._buffer[self._count % self._capacity] = (value, timestamp, omega)
+            self._count += 1
+
+    def stop(self) -> Optional[FrameTimingStats]:
+        """Stops recording and returns the statistics of the point, None if less than two frames arrived."""
+        with self._lock:
+            self._recording = False
+            frames = self.frames()
+            exposure = self._exposure
+
+        if frames.size < 2:
+            return None
+
+        frame_steps = np.diff(frames["frame"])
+        valid = frame_steps > 0
+        # Monitor updates can merge frames, their interval is shared between them
+        periods = np.repeat(np.diff(frames["time"])[valid] / frame_steps[valid], frame_steps[valid])
+        if periods.size == 0:
+            return None
+
+        period = float(np.mean(periods))
+        return FrameTimingStats(
+            frames=int(frames["frame"][-1] - frames["frame"][0] + 1),
+            frames_per_second=1.0 / period if period > 0 else 0.0,
+            period=period,
+            jitter=float(np.std(periods)),
+            longest_period=float(np.max(periods)),
+            dead_time=period - exposure,
+            excess=period - (exposure + self._readout_time),
+        )
+
+    def frames(self) -> np.ndarray:
+        """Returns a copy of the recorded (frame, time, omega) rows in arrival order."""
+        with self._lock:
+            count = self._count
+            if count <= self._capacity:
+                return self._buffer[:count].copy()
+            start = count % self._capacity
+            return np.concatenate((self._buffer[start:], self._buffer[:start]))
@@ -18,15 +18,20 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+import os
 from dataclasses import dataclass, field
 from qtpy.QtCore import QSettings
+from typing import Optional
 
 from tomoxrd.model import (
     PathModel,
     EpicsModel,
     BMDModel,
+    CollectionPointsModel,
     DetectorSettingsModel,
     ScanningModel,
+    ScanHistoryModel,
+    ScanCatalogModel,
 )
 
 
@@ -38,13 +43,37 @@ class MainModel:
 
     paths: PathModel = field(init=False, repr=False, compare=False)
     epics: EpicsModel = field(init=False, repr=False, compare=False)
-    bmd: BMDModel = field(init=False, repr=False, compare=False)
+    bmd: Optional[BMDModel] = field(init=False, repr=False, compare=False, default=None)
     scanning: ScanningModel = field(init=False, repr=False, compare=False)
+    points: CollectionPointsModel = field(init=False, repr=False, compare=False)
     detector_settings: DetectorSettingsModel = field(init=False, repr=False, compare=False)
+    history: ScanHistoryModel = field(init=False, repr=False, compare=False)
+    catalog: ScanCatalogModel = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         object.__setattr__(self, "paths", PathModel())
         object.__setattr__(self, "epics", EpicsModel())
-        object.__setattr__(self, "bmd", BMDModel())
         object.__setattr__(self, "detector_settings", DetectorSettingsModel(settings=self.settings))
         object.__setattr__(self, "scanning", ScanningModel())
+        object.__setattr__(self, "points", CollectionPointsModel())
+        object.__setattr__(
+            self, "history", ScanHistoryModel(os.path.join(self.paths.data_path, "scan_history.jsonl"))
+        )
+        object.__setattr__(
+            self, "catalog", ScanCatalogModel(os.path.join(self.paths.data_path, "scan_catalog.sqlite"))
+        )
+
+    def connect_hardware(self) -> None:
+        """Connects the detector stages and initializes the scanning hardware, blocks until the IOCs reply."""
+        if self.bmd is None:
+            object.__setattr__(self, "bmd", BMDModel())
+        self.scanning.connect_hardware()
+
+    def on_xrd_position(self) -> bool:
+        """Checks if the detector stages are at the XRD position."""
+        current_x = self.bmd.detector_x.readback
+        current_z = self.bmd.detector_z.readback
+
+        if current_x == self.detector_settings.xrd_x and current_z == self.detector_settings.xrd_z:
+            return True
+        return False
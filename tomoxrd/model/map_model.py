@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class MapAxis:
+    """Start, stop and step of a map axis. A zero step keeps the axis at the start position."""
+
+    start: float
+    stop: float
+    step: float
+
+    @property
+    def size(self) -> int:
+        if self.step == 0 or self.start == self.stop:
+            return 1
+        return int(round(abs(self.stop - self.start) / abs(self.step))) + 1
+
+    def positions(self) -> np.ndarray:
+        direction = 1 if self.stop >= self.start else -1
+        return self.start + direction * abs(self.step) * np.arange(self.size)
+
+
+@dataclass(frozen=True)
+class MapRow:
+    """A single fly row of the horizontal stage, between the first and last pixel centers."""
+
+    index: int
+    y: float
+    z: Optional[float]
+    x_start: float
+    x_end: float
+    pixels: int
+
+    @property
+    def direction(self) -> int:
+        return 1 if self.x_end >= self.x_start else -1
+
+
+class MapGrid:
+    """
+    2D (horizontal, vertical) or 3D (with focus) grid of map pixels. The horizontal axis is the fast
+    axis collected as fly rows, in snake order the direction of every other row (and the vertical order
+    of every other focus layer) is reversed to avoid the return moves.
+    """
+
+    def __init__(self, x: MapAxis, y: MapAxis, z: Optional[MapAxis] = None, snake: Optional[bool] = True) -> None:
+        self._x = x
+        self._y = y
+        self._z = z
+        self._snake = snake
+
+    def rows(self) -> List[MapRow]:
+        """Returns the fly rows in collection order."""
+        x_positions = self._x.positions()
+        y_positions = self._y.positions()
+        z_positions = [None] if self._z is None else self._z.positions()
+
+        rows = []
+        for layer, z in enumerate(z_positions):
+            layer_rows = y_positions[::-1] if self._snake and layer % 2 else y_positions
+            for y in layer_rows:
+                x_start, x_end = x_positions[0], x_positions[-1]
+                if self._snake and len(rows) % 2:
+                    x_start, x_end = x_end, x_start
+                rows.append(
+                    MapRow(
+                        index=len(rows),
+                        y=float(y),
+                        z=None if z is None else float(z),
+                        x_start=float(x_start),
+                        x_end=float(x_end),
+                        pixels=x_positions.size,
+                    )
+                )
+        return rows
+
+    def pixel_positions(self) -> np.ndarray:
+        """Returns the (x, y, z) nominal positions of all the pixels in collection order."""
+        positions = []
+        for row in self.rows():
+            x = np.linspace(row.x_start, row.x_end, row.pixels)
+            y = np.full(row.pixels, row.y)
+            z = np.full(row.pixels, np.nan if row.z is None else row.z)
+            positions.append(np.column_stack((x, y, z)))
+        return np.concatenate(positions)
+
+    def bounds(self) -> Tuple[Tuple[float, float], Tuple[float, float], Optional[Tuple[float, float]]]:
+        """Returns the (min, max) pixel positions of every axis."""
+        axes = [self._x, self._y, self._z]
+        return tuple(
+            None if axis is None else (float(axis.positions().min()), float(axis.positions().max()))
+            for axis in axes
+        )
+
+    @property
+    def x(self) -> MapAxis:
+        return self._x
+
+    @property
+    def y(self) -> MapAxis:
+        return self._y
+
+    @property
+    def z(self) -> Optional[MapAxis]:
+        return self._z
+
+    @property
+    def snake(self) -> bool:
+        return self._snake
+
+    @property
+    def num_rows(self) -> int:
+        return self._y.size * (1 if self._z is None else self._z.size)
+
+    @property
+    def num_pixels(self) -> int:
+        return self.num_rows * self._x.size
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import importlib.util
+import os
+import time
+import numpy as np
+from typing import Optional, Sequence
+
+
+class NexusWriterModel:
+    """
+    Writes the frames of a collection point to a single NeXus/HDF5 file as they arrive, instead of one
+    file per frame. Every frame is a compressed chunk of its own, so a single frame is read with one seek.
+    The h5py package is optional and is only imported when the first frame is written.
+    """
+
+    _compression: str = "gzip"
+    _compression_level: int = 1
+
+    def __init__(
+            self,
+            path: str,
+            omega: Sequence[float],
+            omega_range: float,
+            exposure: float,
+            positions: Sequence[Optional[float]],
+    ) -> None:
+        """
+        :param path: The path of the .nxs file
+        :param omega: The omega at the start of every expected frame
+        :param omega_range: The omega range of a single frame
+        :param exposure: The exposure time of a frame in seconds
+        :param positions: The x, y and z positions of the sample stages
+        """
+        self._path = path
+        self._omega = np.asarray(omega, dtype=np.float64)
+        self._omega_range = omega_range
+        self._exposure = exposure
+        self._positions = [np.nan if position is None else float(position) for position in positions]
+        self._file = None
+        self._frames = None
+        self._angles = None
+        self._written = 0
+
+    @staticmethod
+    def available() -> bool:
+        """Checks if the h5py package is installed."""
+        return importlib.util.find_spec("h5py") is not None
+
+    def _create(self, frame: np.ndarray) -> None:
+        """Creates the file with the NeXus groups, the frame dataset takes the shape of the first frame."""
+        import h5py
+
+        rows, cols = frame.shape
+        self._file = h5py.File(self._path, "w")
+        self._file.attrs["default"] = "entry"
+
+        entry = self._file.create_group("entry")
+        entry.attrs.update({"NX_class": "NXentry", "default": "data"})
+        entry["start_time"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+        detector = entry.create_group("instrument").create_group("detector")
+        entry["instrument"].attrs["NX_class"] = "NXinstrument"
+        detector.attrs["NX_class"] = "NXdetector"
+        detector["count_time"] = self._exposure
+        detector["count_time"].attrs["units"] = "s"
+        self._frames = detector.create_dataset(
+            "data",
+            shape=(self._omega.size, rows, cols),
+            maxshape=(None, rows, cols),
+            dtype=frame.dtype,
+            chunks=(1, rows, cols),
+            compression=self._compression,
+            compression_opts=self._compression_level,
+            shuffle=True,
+        )
+
+        sample = entry.create_group("sample")
+        sample.attrs["NX_class"] = "NXsample"
+        self._angles = sample.create_dataset("rotation_angle", data=self._omega, maxshape=(None,))
+        self._angles.attrs.update({"units": "deg", "omega_range": self._omega_range})
+        for axis, position in zip(("x", "y", "z"), self._positions):
+            sample[f"{axis}_translation"] = position
+            sample[f"{axis}_translation"].attrs["units"] = "mm"
+
+        # The default plot, linked to the detector frames and the omega of every frame
+        data = entry.create_group("data")
+        data.attrs.update({"NX_class": "NXdata", "signal": "data", "axes": ["omega", ".", "."], "omega_indices": 0})
+        data["data"] = self._frames
+        data["omega"] = self._angles
+
+    def write(self, frame: np.ndarray) -> None:
+        """Appends the next frame of the point."""
+        if self._file is None:
+            self._create(frame)
+        if self._written >= self._frames.shape[0]:
+            # More frames than expected, their omega is not known
+            self._frames.resize(self._written + 1, axis=0)
+            self._angles.resize(self._written + 1, axis=0)
+            self._angles[self._written] = np.nan
+        self._frames[self._written] = frame
+        self._written += 1
+
+    def close(self) -> None:
+        """Trims the frames that never arrived and closes the file."""
+        if self._file is None:
+            return None
+        if self._written < self._frames.shape[0]:
+            self._frames.resize(self._written, axis=0)
+            self._angles.resize(self._written, axis=0)
+        self._file.close()
+        self._file = None
+        print(f"[Nexus] - {self._written} frames saved to {os.path.basename(self._path)}")
+
+    @property
+    def frames(self) -> int:
+        """Returns the number of written frames."""
+        return self._written
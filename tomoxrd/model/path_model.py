@@ -31,6 +31,7 @@ class PathModel:
     _assets_path: str = field(init=False, compare=False, repr=False)
     _icon_path: str = field(init=False, compare=False, repr=False)
     _qss_path: str = field(init=False, compare=False, repr=False)
+    _data_path: str = field(init=False, compare=False, repr=False)
 
     def __post_init__(self) -> None:
         object.__setattr__(
@@ -38,6 +39,9 @@ class PathModel:
         )
         object.__setattr__(self, "_icon_path", os.path.join(self._assets_path, "icons"))
         object.__setattr__(self, "_qss_path", os.path.join(self._assets_path, "qss"))
+        object.__setattr__(
+            self, "_data_path", os.path.join(os.path.expanduser("~"), ".tomoxrd")
+        )
 
     @property
     def icon_path(self) -> str:
@@ -46,3 +50,10 @@ class PathModel:
     @property
     def qss_path(self) -> str:
         return self._qss_path
+
+    @property
+    def data_path(self) -> str:
+        """Local directory used for the persistent application data (queue, history)."""
+        if not os.path.exists(self._data_path):
+            os.makedirs(self._data_path)
+        return self._data_path
@@ -18,12 +18,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from epics import caget, caput, camonitor, camonitor_clear
-from typing import Optional
-
-from tomoxrd.widget.custom import MsgBox
+from typing import ClassVar, Optional
 
 
 @dataclass(frozen=False)
@@ -40,7 +39,9 @@ class PVModel(ABC):
     monitor: Optional[bool] = field(init=True, default=False, repr=True, compare=False)
 
     _rbv_string: str = field(init=False, repr=True, compare=False)
-    _moving: bool = field(init=False, repr=False, compare=False, default=True)
+    # Time of the last monitor update, the PV counts as moving for a short window after every update
+    _updated_at: float = field(init=False, repr=False, compare=False, default=0.0)
+    _moving_window: ClassVar[float] = 0.05
 
     @abstractmethod
     def __post_init__(self) -> None:
@@ -58,17 +59,21 @@ class PVModel(ABC):
         object.__setattr__(self, "_rbv_string", value_string)
 
     @property
-    def moving(self):
-        return self._moving
+    def moving(self) -> bool:
+        return time.monotonic() - self._updated_at < self._moving_window
 
     @moving.setter
-    def moving(self, value):
+    def moving(self, value: bool) -> None:
         if isinstance(value, bool):
-            object.__setattr__(self, "_moving", value)
+            object.__setattr__(self, "_updated_at", time.monotonic() if value else 0.0)
 
-    def __del__(self) -> None:
+    def clear_monitor(self) -> None:
+        """Stops monitoring the PV."""
         camonitor_clear(self._rbv_string)
 
+    def __del__(self) -> None:
+        self.clear_monitor()
+
 
 @dataclass(slots=True)
 class DoubleValuePV(PVModel):
@@ -85,7 +90,7 @@ class DoubleValuePV(PVModel):
 
     def _monitor_pv(self, **kwargs) -> None:
         object.__setattr__(self, "readback", round(kwargs["value"], 4))
-        object.__setattr__(self, "_moving", True)
+        object.__setattr__(self, "_updated_at", time.monotonic())
 
     def move(self, value: float, with_limits: Optional[bool] = True, wait: Optional[bool] = False, timeout: Optional[float] = None) -> None:
         """Moves the motor."""
@@ -146,7 +151,7 @@ class StringValuePV(PVModel):
 
     def _monitor_pv(self, **kwargs) -> None:
         object.__setattr__(self, "readback", kwargs["char_value"])
-        object.__setattr__(self, "_moving", True)
+        object.__setattr__(self, "_updated_at", time.monotonic())
 
     def move(self, value: str) -> None:
         """Moves the motor"""
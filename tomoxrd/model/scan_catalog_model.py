@@ -0,0 +1,342 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Callable, List, Optional
+
+_schema: str = """
+CREATE TABLE IF NOT EXISTS collections (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    sample TEXT,
+    point TEXT,
+    collection_type TEXT,
+    x REAL,
+    y REAL,
+    z REAL,
+    omega_start REAL,
+    omega_end REAL,
+    step REAL,
+    exposure REAL,
+    first_frame INTEGER,
+    last_frame INTEGER,
+    frames INTEGER,
+    frames_received INTEGER,
+    directory TEXT,
+    filename TEXT,
+    cbf INTEGER,
+    aborted INTEGER,
+    duration REAL,
+    esperanto TEXT,
+    archive TEXT,
+    frame_timing TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phases (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    name TEXT NOT NULL,
+    duration REAL,
+    predicted REAL
+);
+CREATE INDEX IF NOT EXISTS collections_timestamp ON collections (timestamp);
+CREATE INDEX IF NOT EXISTS collections_sample ON collections (sample, timestamp);
+CREATE INDEX IF NOT EXISTS collections_point ON collections (point, timestamp);
+CREATE INDEX IF NOT EXISTS collections_type ON collections (collection_type, timestamp);
+CREATE INDEX IF NOT EXISTS collections_file ON collections (directory, filename);
+CREATE INDEX IF NOT EXISTS files_collection ON files (collection_id);
+CREATE INDEX IF NOT EXISTS phases_collection ON phases (collection_id);
+"""
+
+
+class ScanCatalogModel:
+    """
+    Local SQLite catalog of every collected point, with its positions, omega range, frames, files, esperanto
+    status and phase timings. The writes are queued and committed by a background thread in batched
+    transactions, so a collection never waits for the disk. The reads use their own connections.
+    """
+
+    _batch_size: int = 100
+    _batch_delay: float = 1.0
+
+    # Columns of the collections table returned by the queries and the export
+    _columns: tuple = (
+        "id", "timestamp", "sample", "point", "collection_type", "x", "y", "z", "omega_start", "omega_end",
+        "step", "exposure", "first_frame", "last_frame", "frames", "frames_received", "directory", "filename",
+        "cbf", "aborted", "duration", "esperanto", "archive",
+    )
+
+    def __init__(self, filepath: str) -> None:
+        self._filepath = filepath
+        self._condition = threading.Condition()
+        self._pending: List[Callable[[sqlite3.Connection], None]] = []
+        self._writing = False
+        self._flushing = False
+        self._closed = False
+
+        directory = os.path.dirname(self._filepath)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # The connection context manager only commits, closing closes the connection
+        with closing(self._connect()) as connection, connection:
+            # Readers don't block the writer thread
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_schema)
+
+        self._thread = threading.Thread(target=self._run, args=(), daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._filepath, timeout=10.0)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _queue(self, write: Callable[[sqlite3.Connection], None]) -> None:
+        with self._condition:
+            if self._closed:
+                print("[Catalog-Error] - The catalog is closed, the record is dropped")
+                return None
+            self._pending.append(write)
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        connection = self._connect()
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                # Collect the writes of a batch, unless they are flushed
+                self._condition.wait_for(
+                    lambda: len(self._pending) >= self._batch_size or self._flushing or self._closed,
+                    timeout=self._batch_delay,
+                )
+                batch, self._pending = self._pending, []
+                self._flushing = False
+                self._writing = bool(batch)
+                closed = self._closed
+
+            if batch:
+                try:
+                    with connection:
+                        for write in batch:
+                            write(connection)
+                except sqlite3.Error as error:
+                    print(f"[Catalog-Error] - {len(batch)} writes were not saved: {error}")
+
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+                if closed and not self._pending:
+                    break
+        connection.close()
+
+    def add_point(self, record: dict, predicted: Optional[dict] = None) -> None:
+        """Adds a collected point from its phases record, with the simulated phases of the same point."""
+        record = {"timestamp": time.time(), **record}
+        predicted = predicted or {}
+        directory = None if record.get("directory") is None else os.path.normpath(record["directory"])
+
+        def _write(connection: sqlite3.Connection) -> None:
+            x, y, z = record.get("positions") or (None, None, None)
+            first_frame = record.get("first_frame")
+            received = record.get("frames_received")
+            last_frame = None
+            if first_frame is not None:
+                last_frame = first_frame + (record["frames"] if received is None else received) - 1
+            phases = record.get("phases") or {}
+
+            cursor = connection.execute(
+                "INSERT INTO collections (timestamp, sample, point, collection_type, x, y, z, omega_start, "
+                "omega_end, step, exposure, first_frame, last_frame, frames, frames_received, directory, filename, "
+                "cbf, aborted, duration, esperanto, frame_timing) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                "?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record["timestamp"], record.get("sample"), record.get("point"), record.get("collection_type"),
+                    x, y, z, record.get("start"), record.get("end"), record.get("step"), record.get("exposure"),
+                    first_frame, last_frame, record.get("frames"), received, directory,
+                    record.get("filename"), int(bool(record.get("cbf"))), int(bool(record.get("aborted"))),
+                    sum(phases.values()), record.get("esperanto"),
+                    None if record.get("frame_timing") is None else json.dumps(record["frame_timing"]),
+                ),
+            )
+            collection_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO files (collection_id, kind, path) VALUES (?, ?, ?)",
+                [(collection_id, kind, path) for kind, paths in (record.get("files") or {}).items() for path in paths],
+            )
+            connection.executemany(
+                "INSERT INTO phases (collection_id, name, duration, predicted) VALUES (?, ?, ?, ?)",
+                [
+                    (collection_id, name, phases.get(name), predicted.get(name))
+                    for name in {**phases, **predicted}
+                ],
+            )
+
+        self._queue(_write)
+
+    def _update_latest(self, directory: str, filename: str, column: str, value: Optional[str]) -> None:
+        """Updates a column of the latest collection of a file name, queued after its insert."""
+        def _write(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                f"UPDATE collections SET {column} = ? WHERE id = "
+                "(SELECT max(id) FROM collections WHERE directory = ? AND filename = ?)",
+                (value, os.path.normpath(directory), filename),
+            )
+
+        self._queue(_write)
+
+    def set_esperanto(self, directory: str, filename: str, status: str) -> None:
+        """Sets the esperanto status (pending, done or cancelled) of the latest collection of a file name."""
+        self._update_latest(directory, filename, "esperanto", status)
+
+    def set_archive(self, directory: str, filename: str, path: str) -> None:
+        """Sets the CBF archive of the latest collection of a file name."""
+        self._update_latest(directory, filename, "archive", path)
+
+    def collections(
+            self,
+            sample: Optional[str] = None,
+            point: Optional[str] = None,
+            collection_type: Optional[str] = None,
+            since: Optional[float] = None,
+            until: Optional[float] = None,
+            limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Returns the collections that match all the given filters, newest first."""
+        conditions, values = [], []
+        for column, value in (("sample", sample), ("point", point), ("collection_type", collection_type)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            values.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            values.append(until)
+
+        query = f"SELECT {', '.join(self._columns)} FROM collections"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        with closing(self._connect()) as connection:
+            return [dict(row) for row in connection.execute(query, values)]
+
+    def files(self, collection_id: int, kind: Optional[str] = None) -> List[str]:
+        """Returns the file paths of a collection, of a single kind (frames, merged, nexus, map) if given."""
+        query = "SELECT path FROM files WHERE collection_id = ?"
+        values = [collection_id]
+        if kind is not None:
+            query += " AND kind = ?"
+            values.append(kind)
+
+        with closing(self._connect()) as connection:
+            return [row["path"] for row in connection.execute(query, values)]
+
+    def records(self, kind: Optional[str] = None, collection_type: Optional[str] = None) -> List[dict]:
+        """
+        Returns the collected points as the phase records of the scan history, oldest first, so the catalog
+        can be the source of the overhead fits.
+        """
+        if kind not in (None, "point"):
+            return []
+
+        query = (
+            "SELECT c.id, c.timestamp, c.collection_type, c.exposure, c.omega_start, c.omega_end, c.step, c.frames, "
+            "c.frames_received, c.cbf, c.aborted, c.frame_timing, p.name, p.duration, p.predicted "
+            "FROM collections c LEFT JOIN phases p ON p.collection_id = c.id"
+        )
+        values = []
+        if collection_type is not None:
+            query += " WHERE c.collection_type = ?"
+            values.append(collection_type)
+        query += " ORDER BY c.timestamp, c.id"
+
+        records = {}
+        with closing(self._connect()) as connection:
+            for row in connection.execute(query, values):
+                record = records.get(row["id"])
+                if record is None:
+                    record = records[row["id"]] = {
+                        "kind": "point",
+                        "timestamp": row["timestamp"],
+                        "collection_type": row["collection_type"],
+                        "exposure": row["exposure"],
+                        "start": row["omega_start"],
+                        "end": row["omega_end"],
+                        "step": row["step"],
+                        "frames": row["frames"],
+                        "frames_received": row["frames_received"],
+                        "cbf": bool(row["cbf"]),
+                        "aborted": bool(row["aborted"]),
+                        "frame_timing": None if row["frame_timing"] is None else json.loads(row["frame_timing"]),
+                        "phases": {},
+                        "predicted": {},
+                    }
+                if row["name"] is None:
+                    continue
+                if row["duration"] is not None:
+                    record["phases"][row["name"]] = row["duration"]
+                if row["predicted"] is not None:
+                    record["predicted"][row["name"]] = row["predicted"]
+        return list(records.values())
+
+    def export_csv(self, path: str, **filters) -> int:
+        """Writes the collections that match the filters to a CSV file. Returns the number of rows."""
+        rows = self.collections(**filters)
+        with open(path, "w", newline="") as export_file:
+            writer = csv.DictWriter(export_file, fieldnames=self._columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the queued writes to be committed. Returns False on timeout."""
+        with self._condition:
+            self._flushing = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._pending and not self._writing, timeout=timeout)
+
+    def close(self) -> None:
+        """Commits the queued writes and stops the writer thread without waiting for it."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the writer thread to finish after close. Returns False on timeout."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from tomoxrd.model import CollectionPointsModel, ScanSimulatorModel
+
+
+class ScanEstimateModel:
+    """
+    Aggregate time estimate of the collection points. Apart from the stage moves, every point after
+    the first one takes the same time, so the phases of a first and of a repeated point are simulated
+    once per change of the collection parameters and multiplied by the number of enabled points. The
+    stage moves of all the points are computed together, and only again when the points change.
+    """
+
+    def __init__(self, simulator: ScanSimulatorModel) -> None:
+        self._simulator = simulator
+        self._point_key: Optional[tuple] = None
+        self._point_phases: Tuple[Dict[str, float], Dict[str, float]] = ({}, {})
+        self._move_key: Optional[tuple] = None
+        self._moves: float = 0.0
+
+    def _phases_per_point(self, key: tuple, **parameters) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Returns the phases of the first and of a repeated point, without their stage moves."""
+        if key == self._point_key:
+            return self._point_phases
+
+        timeline = self._simulator.simulate(points=[("first", None, None, None), ("repeat", None, None, None)], **parameters)
+        first: Dict[str, float] = {}
+        repeat: Dict[str, float] = {}
+        for phase in timeline.phases:
+            if phase.name == "move":
+                continue
+            phases = first if phase.point == "first" else repeat
+            phases[phase.name] = phases.get(phase.name, 0.0) + phase.duration
+
+        self._point_key, self._point_phases = key, (first, repeat)
+        return self._point_phases
+
+    def _stage_moves(self, key: tuple, points: CollectionPointsModel, burst: bool) -> float:
+        """Returns the stage moves of all the enabled points and the final revert move."""
+        if key == self._move_key:
+            return self._moves
+
+        moves, revert = self._simulator.point_moves(points.enabled_positions(), burst=burst)
+        self._move_key, self._moves = key, float(np.sum(moves)) + revert
+        return self._moves
+
+    def estimate(
+            self,
+            points: CollectionPointsModel,
+            exposure: float,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+            step: Optional[float] = None,
+            cbf_collection: Optional[bool] = True,
+            burst: Optional[bool] = False,
+    ) -> Tuple[float, Dict[str, float]]:
+        """Returns the total time and the time of every phase of the enabled points."""
+        count = points.enabled_count
+        parameters = dict(exposure=exposure, start=start, end=end, step=step, cbf_collection=cbf_collection)
+        timing = self._simulator.timing
+        revision = self._simulator.revision
+
+        still = start is None or end is None
+        if count == 0:
+            timeline = self._simulator.simulate(**parameters)
+            return timeline.total, timeline.phase_totals()
+
+        move_key = (revision, points.revision, timing.stage_positions, still and burst)
+        phases = {"move": self._stage_moves(move_key, points, burst=still and burst)}
+
+        if still and burst:
+            # One detector series for all the points, only the limit reads and the exposures grow with them
+            timeline = self._simulator.simulate(points=[("burst", None, None, None)], burst=True, **parameters)
+            for name, duration in timeline.phase_totals().items():
+                if name != "move":
+                    phases[name] = duration
+            phases["prepare"] += 6 * (count - 1) * timing.caget_time
+            phases["acquisition"] *= count
+        else:
+            point_key = (revision, timing.theta_position, *parameters.items())
+            first, repeat = self._phases_per_point(point_key, **parameters)
+            for name in first.keys() | repeat.keys():
+                phases[name] = first.get(name, 0.0) + (count - 1) * repeat.get(name, 0.0)
+
+        return sum(phases.values()), phases
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import json
+import os
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class OverheadFit:
+    """Fitted difference between the measured and the simulated time of a collection point."""
+
+    collection_type: str
+    frame_dead_time: float
+    point_cost: float
+    samples: int
+
+    def correction(self, frames: int) -> float:
+        return self.frame_dead_time * frames + self.point_cost
+
+
+class ScanHistoryModel:
+    """
+    Local store of the measured phase durations of every collected point, kept as JSON lines.
+    Used to fit the overheads that the scan simulator doesn't model, and to follow their drift.
+    """
+
+    # Phases that are compared against the simulator, stage moves and taxi depend on the previous point
+    _fitted_phases: tuple = ("prepare", "pso", "acquisition", "flush", "return", "reset")
+
+    def __init__(self, filepath: str, window: Optional[int] = 200) -> None:
+        self._filepath = filepath
+        self._window = window
+        self._lock = threading.Lock()
+        self._records: List[dict] = []
+
+        directory = os.path.dirname(self._filepath)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self._filepath):
+            return None
+
+        with open(self._filepath, "r", encoding="utf-8") as history:
+            for line in history:
+                if not line.strip():
+                    continue
+                try:
+                    self._records.append(json.loads(line))
+                except ValueError:
+                    print(f"[History-Error] - Skipping invalid history record: {line}")
+
+    def add(self, record: dict) -> None:
+        """Appends a record to the history, adding the current timestamp."""
+        record = {"timestamp": time.time(), **record}
+        with self._lock:
+            self._records.append(record)
+            with open(self._filepath, "a", encoding="utf-8") as history:
+                history.write(json.dumps(record) + "\n")
+
+    def add_point(self, record: dict, predicted: Optional[dict] = None) -> None:
+        """Adds the measured phases of a point, with the simulated phases of the same point."""
+        # The file lists of the points are only kept in the catalog
+        record = {key: value for key, value in record.items() if key != "files"}
+        self.add({"kind": "point", **record, "predicted": predicted or {}})
+
+    def add_conversion(self, frames: int, duration: float) -> None:
+        """Adds the duration of an esperanto conversion."""
+        self.add({"kind": "conversion", "frames": frames, "phases": {"conversion": duration}})
+
+    def records(self, kind: Optional[str] = None, collection_type: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            records = list(self._records)
+
+        if kind is not None:
+            records = [record for record in records if record.get("kind") == kind]
+        if collection_type is not None:
+            records = [record for record in records if record.get("collection_type") == collection_type]
+        return records
+
+    def _residuals(self, collection_type: str) -> tuple:
+        """Returns the timestamps, frames and measured minus simulated times of the completed points."""
+        timestamps, frames, residuals = [], [], []
+        for record in self.records(kind="point", collection_type=collection_type):
+            if record.get("aborted") or not record.get("predicted"):
+                continue
+
+            measured = sum(record["phases"].get(phase, 0.0) for phase in self._fitted_phases)
+            predicted = sum(record["predicted"].get(phase, 0.0) for phase in self._fitted_phases)
+            timestamps.append(record["timestamp"])
+            frames.append(record["frames"])
+            residuals.append(measured - predicted)
+
+        if self._window is not None:
+            timestamps, frames, residuals = timestamps[-self._window:], frames[-self._window:], residuals[-self._window:]
+
+        return np.array(timestamps), np.array(frames, dtype=float), np.array(residuals)
+
+    def fit(self, collection_type: str, min_samples: Optional[int] = 3) -> Optional[OverheadFit]:
+        """
+        Fits the residual time of the recent points as (frame dead time * frames + point cost).
+        Returns None if there are not enough completed points of the collection type.
+        """
+        _, frames, residuals = self._residuals(collection_type)
+        if len(residuals) < min_samples:
+            return None
+
+        if np.unique(frames).size < 2:
+            # Frame number never changed, all the residual goes to the point cost
+            return OverheadFit(collection_type, 0.0, float(np.mean(residuals)), len(residuals))
+
+        design = np.column_stack((frames, np.ones_like(frames)))
+        (frame_dead_time, point_cost), *_ = np.linalg.lstsq(design, residuals, rcond=None)
+        return OverheadFit(collection_type, float(frame_dead_time), float(point_cost), len(residuals))
+
+    def drift(self, collection_type: str, min_samples: Optional[int] = 3) -> Optional[float]:
+        """
+        Returns the trend of the residual time per frame in seconds per hour, a growing value
+        shows an increasing IOC or detector latency.
+        """
+        timestamps, frames, residuals = self._residuals(collection_type)
+        if len(residuals) < min_samples or np.ptp(timestamps) == 0:
+            return None
+
+        slope, _ = np.polyfit((timestamps - timestamps[0]) / 3600.0, residuals / np.maximum(frames, 1), 1)
+        return float(slope)
+
+    def frame_timing(self, collection_type: str) -> Optional[dict]:
+        """Returns the median frame timing statistics of the recent points, None if no point recorded them."""
+        timings = [
+            record["frame_timing"]
+            for record in self.records(kind="point", collection_type=collection_type)
+            if record.get("frame_timing") and not record.get("aborted")
+        ]
+        if self._window is not None:
+            timings = timings[-self._window:]
+        if not timings:
+            return None
+
+        names = ("frames_per_second", "period", "jitter", "longest_period", "dead_time", "excess")
+        median = {name: float(np.median([timing[name] for timing in timings])) for name in names}
+        return {"points": len(timings), **median}
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
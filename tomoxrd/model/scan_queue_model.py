@@ -0,0 +1,240 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import ctypes
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ScanQueueItem:
+    """A single queued collection, with the same parameters as a Collect button press."""
+
+    exposure: float
+    collection_type: str = "Still"  # Still, Step or Wide
+    start: Optional[float] = None
+    end: Optional[float] = None
+    step: Optional[float] = None
+    filename: str = ""
+    filepath: str = ""
+    frame: int = 1
+    crysalis: bool = True
+    points: List[Dict[str, float]] = field(default_factory=lambda: [])
+    burst: bool = False  # Still points collected in a single detector series
+    recollect: bool = False  # Points with missing frames are collected again right away
+
+    item_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "pending"  # pending, running, done, failed, aborted, interrupted
+    message: str = ""
+    queued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Returns the run time of the item in seconds, if it has finished."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "ScanQueueItem":
+        """Creates an item from a journal record, ignoring unknown keys."""
+        names = {item_field.name for item_field in fields(cls)}
+        return cls(**{key: value for key, value in values.items() if key in names})
+
+
+class ScanQueueModel:
+    """
+    Persistent, file backed queue of collections.
+
+    The queue is stored as an append-only journal of JSON lines, every line either adds a new item or
+    updates the status of an existing one. Appending a line never rewrites the file, so other processes
+    can add items while the executor is running, and the queue survives application restarts.
+    """
+
+    _finished_status: tuple = ("done", "failed", "aborted", "interrupted")
+
+    def __init__(self, filepath: str) -> None:
+        self._filepath = filepath
+        self._lock = threading.RLock()
+        self._items: Dict[str, ScanQueueItem] = {}
+        self._offset: int = 0
+
+        directory = os.path.dirname(self._filepath)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.refresh()
+
+    def _write_record(self, record: dict) -> None:
+        # Binary mode, so the offsets of refresh are the bytes on disk on every platform
+        with open(self._filepath, "ab") as journal:
+            journal.write((json.dumps(record) + "\n").encode("utf-8"))
+
+    def _apply_record(self, record: dict) -> None:
+        if record.get("op") == "add":
+            item = ScanQueueItem.from_dict(record["item"])
+            self._items[item.item_id] = item
+        elif record.get("op") == "update":
+            item = self._items.get(record.get("item_id"))
+            if item is not None:
+                for key, value in record.get("changes", {}).items():
+                    if hasattr(item, key):
+                        setattr(item, key, value)
+
+    def refresh(self) -> None:
+        """Reads the journal lines that were appended since the last refresh."""
+        with self._lock:
+            if not os.path.exists(self._filepath):
+                return None
+
+            with open(self._filepath, "rb") as journal:
+                journal.seek(self._offset)
+                data = journal.read()
+
+            # Keep a partially written last line for the next refresh
+            complete = data[:data.rfind(b"\n") + 1]
+            self._offset += len(complete)
+
+            for line in complete.decode("utf-8").splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self._apply_record(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    print(f"[Queue-Error] - Skipping invalid queue record: {line}")
+
+    def append(self, item: ScanQueueItem) -> ScanQueueItem:
+        """Adds a new item at the end of the queue."""
+        with self._lock:
+            self.refresh()
+            self._write_record({"op": "add", "item": asdict(item)})
+            self.refresh()
+        return item
+
+    def update(self, item_id: str, **changes) -> None:
+        """Updates the status/timing values of a queued item."""
+        with self._lock:
+            self.refresh()
+            self._write_record({"op": "update", "item_id": item_id, "changes": changes})
+            self.refresh()
+
+    def items(self) -> List[ScanQueueItem]:
+        """Returns all the items in queued order."""
+        with self._lock:
+            return list(self._items.values())
+
+    def pending(self) -> List[ScanQueueItem]:
+        """Returns the items that have not been collected yet."""
+        return [item for item in self.items() if item.status == "pending"]
+
+    def next_pending(self) -> Optional[ScanQueueItem]:
+        """Returns the first pending item, after reading any newly appended items."""
+        self.refresh()
+        pending = self.pending()
+        if not pending:
+            return None
+        return pending[0]
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        """Checks if a process is running, os.kill would terminate the process on Windows."""
+        if sys.platform == "win32":
+            # PROCESS_QUERY_LIMITED_INFORMATION and STILL_ACTIVE
+            handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+            if not handle:
+                return False
+            exit_code = ctypes.c_ulong()
+            ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            ctypes.windll.kernel32.CloseHandle(handle)
+            return exit_code.value == 259
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def acquire_executor(self) -> bool:
+        """
+        Takes the executor lock file of the queue, a lock left by a stopped process is taken over.
+        :return: False if another running process executes the queue
+        """
+        lock_filepath = self._filepath + ".lock"
+        for _ in range(2):
+            try:
+                descriptor = os.open(lock_filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    with open(lock_filepath, "r") as lock_file:
+                        pid = int(lock_file.read().strip() or 0)
+                except (OSError, ValueError):
+                    pid = 0
+                if pid and pid != os.getpid() and self._process_alive(pid):
+                    return False
+                try:
+                    os.remove(lock_filepath)
+                except FileNotFoundError:
+                    pass
+                continue
+
+            with os.fdopen(descriptor, "w") as lock_file:
+                lock_file.write(str(os.getpid()))
+            return True
+        return False
+
+    def release_executor(self) -> None:
+        """Removes the executor lock file of this process."""
+        lock_filepath = self._filepath + ".lock"
+        try:
+            with open(lock_filepath, "r") as lock_file:
+                if lock_file.read().strip() != str(os.getpid()):
+                    return None
+            os.remove(lock_filepath)
+        except (OSError, ValueError):
+            pass
+
+    def recover_interrupted(self) -> None:
+        """Marks the items left running by a stopped executor, they are not collected again automatically."""
+        self.refresh()
+        for item in self.items():
+            if item.status == "running":
+                self.update(item.item_id, status="interrupted", message="Application stopped during collection.")
+
+    def requeue(self, item_id: str) -> None:
+        """Sets a finished item back to pending."""
+        self.update(item_id, status="pending", message="", started_at=None, finished_at=None)
+
+    def cancel(self, item_id: str) -> None:
+        """Removes a pending item from the collection order."""
+        self.update(item_id, status="aborted", message="Cancelled before collection.")
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
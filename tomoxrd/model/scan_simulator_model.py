@@ -0,0 +1,542 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import math
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from epics import caget, caput
+from typing import ClassVar, Dict, List, Optional, Tuple
+
+from tomoxrd.model import MapAxis, MapGrid, ScanningModel, ScanHistoryModel, OverheadFit
+
+
+@dataclass
+class ScanPhase:
+    """A single phase of a simulated collection."""
+
+    name: str
+    start: float
+    duration: float
+    point: Optional[str] = None
+
+
+@dataclass
+class ScanTimeline:
+    """Ordered list of the simulated collection phases."""
+
+    phases: List[ScanPhase] = field(default_factory=lambda: [])
+    _total: float = field(init=False, repr=False, default=0.0)
+
+    def add(self, name: str, duration: float, point: Optional[str] = None) -> None:
+        self.phases.append(ScanPhase(name=name, start=self._total, duration=duration, point=point))
+        self._total += duration
+
+    def phase_totals(self) -> Dict[str, float]:
+        """Returns the total time spent in every phase type, in order of first appearance."""
+        totals: Dict[str, float] = {}
+        for phase in self.phases:
+            totals[phase.name] = totals.get(phase.name, 0.0) + phase.duration
+        return totals
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+
+@dataclass
+class ScanTimingModel:
+    """
+    Motor kinematics and per-operation overheads used by the scan simulator.
+    The motor acceleration values are the motor record ACCL times, in seconds.
+    """
+
+    # Theta
+    theta_position: float = 0.0
+    theta_max_speed: float = 10.0
+    theta_acceleration: float = 0.5
+    counts_per_degree: Optional[float] = None
+
+    # Sample stages (horizontal, vertical, focus)
+    stage_positions: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    stage_speeds: Tuple[float, float, float] = (1.0, 1.0, 1.0)
+    stage_accelerations: Tuple[float, float, float] = (0.2, 0.2, 0.2)
+
+    # Channel access and hardware overheads, in seconds
+    caget_time: float = 0.002
+    caput_time: float = 0.001
+    caput_wait_time: float = 0.01
+    pso_command_time: float = 0.03
+    readout_time: float = 0.005
+    sleep_time: float = 0.5
+
+    # PVs
+    _theta: ClassVar[str] = "13BMD:m119"
+    _stages: ClassVar[Tuple[str, str, str]] = ("13BMD:m123", "13BMD:m115", "13BMD:m122")
+    _pso_axis: ClassVar[str] = "13BMDPG1:TS:PSOAxisName"
+    _pso_command_out: ClassVar[str] = "13BMDPG1:TS:PSOCommand.BOUT"
+    _pso_counts_per_rotation: ClassVar[str] = "13BMDPG1:TS:PSOCountsPerRotation"
+    _detector_exposure: ClassVar[str] = "13PIL1MCdTe:cam1:AcquireTime"
+
+    @classmethod
+    def from_epics(cls, measure_overheads: Optional[bool] = True) -> "ScanTimingModel":
+        """Creates a timing model from the current motor VELO/ACCL/VMAX values."""
+        timing = cls()
+        timing.theta_max_speed = float(caget(timing._theta + ".VMAX"))
+        timing.theta_acceleration = float(caget(timing._theta + ".ACCL"))
+
+        counts_per_rotation = caget(timing._pso_counts_per_rotation)
+        if counts_per_rotation:
+            timing.counts_per_degree = float(counts_per_rotation) / 360.0
+
+        timing.stage_speeds = tuple(float(caget(stage + ".VELO")) for stage in timing._stages)
+        timing.stage_accelerations = tuple(float(caget(stage + ".ACCL")) for stage in timing._stages)
+        timing.refresh_positions()
+
+        if measure_overheads:
+            timing.measure_overheads()
+
+        return timing
+
+    def refresh_positions(self) -> None:
+        """Reads the current theta and sample stage positions."""
+        self.theta_position = float(caget(self._theta + ".RBV"))
+        self.stage_positions = tuple(float(caget(stage + ".RBV")) for stage in self._stages)
+
+    def measure_overheads(self, samples: Optional[int] = 3) -> None:
+        """
+        Measures the channel access round trip times, using reads and writes that don't change
+        the state of the hardware (rewriting the current exposure, querying the PSO units).
+        """
+        caget_times, caput_wait_times, pso_times = [], [], []
+        exposure = caget(self._detector_exposure)
+        pso_axis = caget(self._pso_axis, as_string=True)
+
+        for _ in range(samples):
+            start = time.perf_counter()
+            caget(self._theta + ".RBV")
+            caget_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            caput(self._detector_exposure, exposure, wait=True)
+            caput_wait_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            caput(self._pso_command_out, f"UNITSTOCOUNTS({pso_axis}, 360.0)", wait=True)
+            pso_times.append(time.perf_counter() - start)
+
+        self.caget_time = min(caget_times)
+        self.caput_wait_time = min(caput_wait_times)
+        self.pso_command_time = min(pso_times)
+
+
+class ScanSimulatorModel:
+    """
+    Dry-run simulator of a collection. Follows the same sequence of operations as the
+    scanning model (stage moves, PSO programming, taxi, trajectory, return and detector reset)
+    and adds up the time of every channel access operation, sleep and motor move.
+    """
+
+    _collection_types: tuple = ("Still", "Step", "Wide", "Burst")
+
+    def __init__(self, timing: ScanTimingModel) -> None:
+        self._timing = timing
+        # Fitted overheads per collection type, learned from the scan history
+        self._calibration: Dict[str, OverheadFit] = {}
+        # Changed with the timings and the calibration, invalidates the cached estimates
+        self._revision: int = 0
+
+    def calibrate(self, fit: OverheadFit) -> None:
+        """Adds the fitted overheads of a collection type to the simulated points."""
+        self._calibration[fit.collection_type] = fit
+        self._revision += 1
+
+    def calibrate_from_history(self, history: ScanHistoryModel) -> None:
+        """Fits the overheads of all the collection types from the stored scan history."""
+        for collection_type in self._collection_types:
+            fit = history.fit(collection_type)
+            if fit is not None:
+                self.calibrate(fit)
+
+    def predict_phases(self, record: dict) -> Dict[str, float]:
+        """Returns the uncalibrated simulated phases of a recorded point."""
+        if record["collection_type"] == "Burst":
+            points = [tuple(point) for point in record["points"]]
+            return self._simulate_burst(exposure=record["exposure"], points=points).phase_totals()
+        if record["collection_type"] == "Map":
+            grid = record["grid"]
+            axes = [None if grid[axis] is None else MapAxis(*grid[axis]) for axis in ("x", "y", "z")]
+            return self.simulate_map(MapGrid(*axes, snake=grid["snake"]), exposure=record["exposure"]).phase_totals()
+
+        start, end, step = record["start"], record["end"], record["step"]
+        if record["collection_type"] == "Still":
+            start, end, step = None, None, None
+        elif record["collection_type"] == "Wide":
+            step = None
+
+        timeline = self.simulate(
+            exposure=record["exposure"],
+            start=start,
+            end=end,
+            step=step,
+            cbf_collection=record["cbf"],
+            calibrated=False,
+            pso_programmed=not record.get("pso_reprogrammed", True),
+        )
+        return timeline.phase_totals()
+
+    def learn(self, history: ScanHistoryModel, record: dict) -> Dict[str, float]:
+        """
+        Stores the measured phases of a point in the history and refits the overheads of its type.
+        :return: The simulated phases of the point
+        """
+        predicted = self.predict_phases(record)
+        history.add_point(record, predicted=predicted)
+
+        fit = history.fit(record["collection_type"])
+        if fit is not None:
+            self.calibrate(fit)
+        return predicted
+
+    @staticmethod
+    def move_time(distance: float, speed: float, acceleration: float) -> float:
+        """Time of a trapezoidal move, where acceleration is the time needed to reach the speed."""
+        distance = abs(distance)
+        if distance == 0 or speed <= 0:
+            return 0.0
+
+        if acceleration <= 0:
+            return distance / speed
+
+        # Distance covered while accelerating and decelerating
+        ramp_distance = speed * acceleration
+        if distance >= ramp_distance:
+            return distance / speed + acceleration
+
+        # Triangular profile, the move never reaches the full speed
+        return 2.0 * math.sqrt(distance * acceleration / speed)
+
+    @staticmethod
+    def move_times(distances: np.ndarray, speed: float, acceleration: float) -> np.ndarray:
+        """Array version of move_time."""
+        distances = np.abs(distances)
+        if speed <= 0:
+            return np.zeros_like(distances)
+        if acceleration <= 0:
+            return distances / speed
+
+        ramp_distance = speed * acceleration
+        times = np.where(
+            distances >= ramp_distance,
+            distances / speed + acceleration,
+            2.0 * np.sqrt(distances * acceleration / speed),
+        )
+        return np.where(distances == 0, 0.0, times)
+
+    def point_moves(self, positions: np.ndarray, burst: Optional[bool] = False) -> Tuple[np.ndarray, float]:
+        """
+        Computes the stage moves of all the points at once, the same way as the simulated collection.
+        :param positions: The (n, 3) x, y, z targets of the points, NaN keeps the axis where it is
+        :return: The move time of every point and the time to revert the stages after the last point
+        """
+        timing = self._timing
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        initial = np.asarray(timing.stage_positions, dtype=np.float64)
+
+        # Position of every axis before each point, the last target of the axis or its initial position
+        targets = np.vstack([initial, positions])
+        rows = np.where(np.isnan(targets), 0, np.arange(targets.shape[0])[:, None])
+        filled = np.take_along_axis(targets, np.maximum.accumulate(rows, axis=0), axis=0)
+        moving = ~np.isnan(positions)
+        distances = np.where(moving, positions - filled[:-1], 0.0)
+
+        moves = np.zeros(positions.shape[0], dtype=np.float64)
+        per_axis = timing.caput_wait_time if burst else 2 * timing.caget_time + timing.caput_wait_time
+        for axis in range(3):
+            moves += np.where(moving[:, axis], per_axis, 0.0)
+            moves += self.move_times(distances[:, axis], timing.stage_speeds[axis], timing.stage_accelerations[axis])
+        if burst:
+            moves += np.where(
+                np.abs(distances).max(axis=1, initial=0.0) > ScanningModel._burst_shutter_max_move,
+                2 * timing.caput_wait_time,
+                0.0,
+            )
+
+        revert = timing.sleep_time
+        for axis in range(3):
+            revert += timing.caput_wait_time + self.move_time(
+                initial[axis] - filled[-1, axis], timing.stage_speeds[axis], timing.stage_accelerations[axis]
+            )
+        return moves, revert
+
+    def trajectory(self, exposure: float, start: float, end: float, step: Optional[float]) -> dict:
+        """Computes the fly scan trajectory values, the same way as the PSO programming."""
+        timing = self._timing
+        delta = abs(end - start)
+        wide = step is None
+
+        rotation_step = delta if wide else abs(step)
+        if timing.counts_per_degree:
+            rotation_step = round(rotation_step * timing.counts_per_degree) / timing.counts_per_degree
+
+        speed = rotation_step / (exposure + timing.readout_time)
+        accel_dist = timing.theta_acceleration / 2.0 * speed
+        num_angles = int(round(delta / rotation_step, 0)) if rotation_step > 0 else 0
+
+        if wide:
+            taxi = math.ceil(accel_dist + accel_dist * 0.001)
+        else:
+            taxi = math.ceil(accel_dist / rotation_step + 0.5) * rotation_step
+
+        direction = 1 if end > start else -1
+
+        return {
+            "rotation_step": rotation_step,
+            "speed": speed,
+            "num_angles": num_angles,
+            "taxi_start": start - taxi * direction,
+        }
+
+    def simulate(
+            self,
+            exposure: float,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+            step: Optional[float] = None,
+            points: Optional[List[Tuple[str, Optional[float], Optional[float], Optional[float]]]] = None,
+            cbf_collection: Optional[bool] = True,
+            calibrated: Optional[bool] = True,
+            pso_programmed: Optional[bool] = False,
+            burst: Optional[bool] = False,
+    ) -> ScanTimeline:
+        """Simulates a collection over the given (name, x, y, z) points and returns its timeline."""
+        timing = self._timing
+        timeline = ScanTimeline()
+
+        still = start is None or end is None
+        if still and burst and points:
+            fit = self._calibration.get("Burst") if calibrated else None
+            return self._simulate_burst(exposure=exposure, points=points, fit=fit)
+
+        step_scan = not still and step is not None
+
+        if still:
+            collection_type, frames = "Still", 1
+        elif step_scan:
+            collection_type = "Step"
+            frames = self.trajectory(exposure=exposure, start=start, end=end, step=step)["num_angles"]
+        else:
+            collection_type, frames = "Wide", 1
+        fit = self._calibration.get(collection_type) if calibrated else None
+        theta = timing.theta_position
+        stages = list(timing.stage_positions)
+
+        for point in points or [None]:
+            name = None
+
+            # Stage moves, two limit reads and a caput with wait for every axis
+            if point is not None:
+                name = point[0]
+                duration = 0.0
+                for axis, target in enumerate(point[1:]):
+                    if target is None:
+                        continue
+                    duration += 2 * timing.caget_time + timing.caput_wait_time
+                    duration += self.move_time(
+                        target - stages[axis], timing.stage_speeds[axis], timing.stage_accelerations[axis]
+                    )
+                    stages[axis] = target
+                timeline.add("move", duration, name)
+
+            # Collection preparation, the changed detector values are written together
+            prepare = timing.caput_wait_time
+
+            if still:
+                timeline.add("prepare", prepare, name)
+
+                # Shutter, arm delay and exposure happen at the same time after the detector is armed
+                acquisition = timing.caput_wait_time + timing.caput_time
+                acquisition += max(timing.sleep_time, exposure + timing.readout_time)
+                timeline.add("acquisition", acquisition, name)
+                timeline.add("flush", timing.caput_wait_time + timing.sleep_time, name)
+            else:
+                trajectory = self.trajectory(exposure=exposure, start=start, end=end, step=step)
+
+                # Limits, senses and trajectory values
+                prepare += 7 * timing.caget_time + 3 * timing.caput_time
+                timeline.add("prepare", prepare, name)
+
+                # PSO programming and arming, repeated points only set the window again
+                pso = (3 if step_scan else 4) * timing.caget_time
+                pso += (2 if pso_programmed else 8) * timing.pso_command_time
+                pso += timing.pso_command_time + timing.sleep_time
+                timeline.add("pso", pso, name)
+                pso_programmed = True
+
+                # Taxi to the start position at the maximum speed
+                taxi = 3 * timing.caput_time + timing.caget_time + timing.caput_wait_time
+                taxi += self.move_time(
+                    trajectory["taxi_start"] - theta, timing.theta_max_speed, timing.theta_acceleration
+                )
+                timeline.add("taxi", taxi, name)
+
+                # Arm the detector and fly from the taxi start through the end of the range
+                acquisition = timing.caput_wait_time + timing.caput_time + timing.sleep_time + timing.caget_time
+                acquisition += self.move_time(
+                    end - trajectory["taxi_start"], trajectory["speed"], timing.theta_acceleration
+                )
+                acquisition += timing.readout_time
+                timeline.add("acquisition", acquisition, name)
+                timeline.add("flush", timing.caput_wait_time + timing.sleep_time, name)
+
+                # PSO cleanup and return move at the maximum speed
+                return_move = 2 * timing.pso_command_time + 2 * timing.caput_time
+                return_move += self.move_time(end - start, timing.theta_max_speed, timing.theta_acceleration)
+                timeline.add("return", return_move, name)
+                theta = start
+
+            # Detector reset, restoring the changed values together
+            reset = timing.caget_time + timing.caput_wait_time
+            timeline.add("reset", reset, name)
+
+            # Overheads learned from the scan history
+            if fit is not None:
+                timeline.add("calibration", fit.correction(frames), name)
+
+        # Revert the sample stages to the starting positions
+        if points:
+            duration = timing.sleep_time
+            for axis, position in enumerate(timing.stage_positions):
+                duration += timing.caput_wait_time + self.move_time(
+                    position - stages[axis], timing.stage_speeds[axis], timing.stage_accelerations[axis]
+                )
+            timeline.add("move", duration)
+
+        return timeline
+
+    def _simulate_burst(
+            self,
+            exposure: float,
+            points: List[Tuple[str, Optional[float], Optional[float], Optional[float]]],
+            fit: Optional[OverheadFit] = None,
+    ) -> ScanTimeline:
+        """
+        Simulates a burst still collection, with one detector series and a fired trigger per point.
+        The fitted overheads of the bursts are added per point.
+        """
+        timing = self._timing
+        timeline = ScanTimeline()
+        stages = list(timing.stage_positions)
+
+        # Limits of every point, collection preparation and PSO programming for fired pulses
+        prepare = 6 * len(points) * timing.caget_time
+        prepare += timing.caput_wait_time
+        timeline.add("prepare", prepare)
+        timeline.add("pso", timing.caget_time + 4 * timing.pso_command_time + timing.caput_time + timing.sleep_time)
+
+        for name, *targets in points:
+            duration, distance = 0.0, 0.0
+            for axis, target in enumerate(targets):
+                if target is None:
+                    continue
+                duration += timing.caput_wait_time
+                duration += self.move_time(
+                    target - stages[axis], timing.stage_speeds[axis], timing.stage_accelerations[axis]
+                )
+                distance = max(distance, abs(target - stages[axis]))
+                stages[axis] = target
+            if distance > ScanningModel._burst_shutter_max_move:
+                duration += 2 * timing.caput_wait_time
+            timeline.add("move", duration, name)
+
+            # Point file name, fired trigger and the exposure until the TIFF plugin saves the image
+            acquisition = 2 * timing.caput_wait_time + 3 * timing.caget_time + timing.pso_command_time
+            acquisition += exposure + timing.readout_time
+            timeline.add("acquisition", acquisition, name)
+
+        timeline.add("flush", 2 * timing.caput_wait_time + timing.caget_time)
+        timeline.add("reset", 2 * timing.pso_command_time + timing.caput_wait_time)
+        if fit is not None:
+            timeline.add("calibration", fit.correction(len(points)))
+
+        # Revert the sample stages to the starting positions
+        duration = timing.sleep_time
+        for axis, position in enumerate(timing.stage_positions):
+            duration += timing.caput_wait_time + self.move_time(
+                position - stages[axis], timing.stage_speeds[axis], timing.stage_accelerations[axis]
+            )
+        timeline.add("move", duration)
+
+        return timeline
+
+    def simulate_map(self, grid: MapGrid, exposure: float) -> ScanTimeline:
+        """Simulates a map collected as fly rows of the horizontal stage."""
+        timing = self._timing
+        timeline = ScanTimeline()
+        stages = list(timing.stage_positions)
+
+        pixel_size = abs(grid.x.step)
+        speed = pixel_size / (exposure + ScanningModel._map_readout_time)
+        taxi = math.ceil(speed * timing.stage_accelerations[0] / 2 / pixel_size + 0.5) * pixel_size
+
+        # Limits, previous file names, the multi-trigger series and the PSO output of the horizontal stage
+        prepare = 11 * timing.caget_time + 9 * timing.caput_wait_time
+        timeline.add("prepare", prepare)
+
+        for row in grid.rows():
+            name = f"r{row.index + 1:04d}"
+            row_edge = row.x_start - row.direction * pixel_size / 2
+            taxi_start = row_edge - row.direction * taxi
+
+            # Vertical and focus moves, then the horizontal move to the taxi position at the normal speed
+            duration = 3 * timing.caput_wait_time
+            for axis, target in ((1, row.y), (2, row.z), (0, taxi_start)):
+                if target is None:
+                    continue
+                duration += timing.caput_wait_time + self.move_time(
+                    target - stages[axis], timing.stage_speeds[axis], timing.stage_accelerations[axis]
+                )
+                stages[axis] = target
+            timeline.add("move", duration, name)
+
+            # PSO window and arm, row series, shutter and the fly move through the row and the deceleration distance
+            timeline.add("prepare", 5 * timing.caput_wait_time + timing.caget_time, name)
+            taxi_end = row.x_end + row.direction * (pixel_size / 2 + taxi)
+            fly = self.move_time(taxi_end - taxi_start, speed, timing.stage_accelerations[0])
+            fly += timing.caput_time + 2 * timing.caget_time + timing.caput_wait_time
+            timeline.add("acquisition", fly, name)
+            stages[0] = taxi_end
+
+        timeline.add("reset", 3 * timing.caput_wait_time + timing.caget_time)
+
+        return timeline
+
+    @property
+    def timing(self) -> ScanTimingModel:
+        return self._timing
+
+    @timing.setter
+    def timing(self, value: ScanTimingModel) -> None:
+        self._timing = value
+        self._revision += 1
+
+    @property
+    def revision(self) -> int:
+        return self._revision
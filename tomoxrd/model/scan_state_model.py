@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+import threading
+import time
+from enum import Enum
+from qtpy.QtCore import QObject, Signal
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class ScanState(Enum):
+    """Lifecycle states of a collection, the value is the name of the timed phase."""
+
+    IDLE = "idle"
+    MOVING = "move"
+    PREPARING = "prepare"
+    PROGRAMMING = "pso"
+    TAXIING = "taxi"
+    ACQUIRING = "acquisition"
+    FLUSHING = "flush"
+    RETURNING = "return"
+    RESETTING = "reset"
+    ABORTING = "abort"
+
+
+class ScanStateModel(QObject):
+    """
+    Thread-safe state machine of the collection lifecycle. A collection starts with begin and ends with end,
+    in between every transition is timestamped and the time spent in each state is added up as phase timing.
+    After an abort only the cleanup states (flush, return and reset) can be entered.
+    """
+
+    state_changed: Signal = Signal(str)
+
+    _cleanup_states: tuple = (ScanState.FLUSHING, ScanState.RETURNING, ScanState.RESETTING)
+
+    def __init__(self) -> None:
+        super(ScanStateModel, self).__init__()
+        self._condition = threading.Condition()
+        self._state = ScanState.IDLE
+        self._aborted = False
+        self._entered_at = time.perf_counter()
+        self._phases: Dict[str, float] = {}
+        self._transitions: List[Tuple[float, ScanState]] = []
+        self._hooks: List[Callable[[ScanState, ScanState], None]] = []
+
+    def add_hook(self, hook: Callable[[ScanState, ScanState], None]) -> None:
+        """Adds a callback that runs with the (previous, new) states after every transition."""
+        self._hooks.append(hook)
+
+    def _enter(self, state: ScanState) -> ScanState:
+        """Records the time spent in the current state and enters the new state. Requires the lock."""
+        now = time.perf_counter()
+        previous = self._state
+        if previous is not ScanState.IDLE:
+            self._phases[previous.value] = self._phases.get(previous.value, 0.0) + now - self._entered_at
+        self._state = state
+        self._entered_at = now
+        self._transitions.append((time.time(), state))
+        self._condition.notify_all()
+        return previous
+
+    def _notify(self, previous: ScanState, state: ScanState) -> None:
+        for hook in self._hooks:
+            hook(previous, state)
+        self.state_changed.emit(state.name.capitalize())
+
+    def begin(self, state: Optional[ScanState] = ScanState.PREPARING) -> bool:
+        """Starts a new collection and clears the previous abort. Returns False if one is already running."""
+        with self._condition:
+            if self._state is not ScanState.IDLE:
+                return False
+            self._aborted = False
+            self._phases = {}
+            self._transitions = []
+            previous = self._enter(state)
+        self._notify(previous, state)
+        return True
+
+    def transition(self, state: ScanState) -> bool:
+        """Moves the running collection to a new state. Returns False if the transition is not allowed."""
+        with self._condition:
+            if self._state is ScanState.IDLE or state is ScanState.IDLE:
+                return False
+            if self._aborted and state not in self._cleanup_states:
+                return False
+            previous = self._enter(state)
+        self._notify(previous, state)
+        return True
+
+    def request_abort(self) -> bool:
+        """Marks the collection as aborted. Returns False if it is not running or already aborted."""
+        with self._condition:
+            if self._state is ScanState.IDLE or self._aborted:
+                return False
+            self._aborted = True
+            previous = self._enter(ScanState.ABORTING)
+        self._notify(previous, ScanState.ABORTING)
+        return True
+
+    def end(self) -> None:
+        """Ends the running collection."""
+        with self._condition:
+            if self._state is ScanState.IDLE:
+                return None
+            previous = self._enter(ScanState.IDLE)
+        self._notify(previous, ScanState.IDLE)
+
+    def wait_for(self, states: Iterable[ScanState], timeout: Optional[float] = None) -> bool:
+        """Blocks until the collection is in one of the states. Returns False on timeout."""
+        states = tuple(states)
+        with self._condition:
+            return self._condition.wait_for(lambda: self._state in states, timeout=timeout)
+
+    def take_phases(self) -> Dict[str, float]:
+        """Returns the time spent in every state since the last call, including the current state."""
+        with self._condition:
+            now = time.perf_counter()
+            if self._state is not ScanState.IDLE:
+                self._phases[self._state.value] = self._phases.get(self._state.value, 0.0) + now - self._entered_at
+                self._entered_at = now
+            phases, self._phases = self._phases, {}
+        return phases
+
+    @property
+    def state(self) -> ScanState:
+        with self._condition:
+            return self._state
+
+    @property
+    def running(self) -> bool:
+        with self._condition:
+            return self._state is not ScanState.IDLE
+
+    @property
+    def aborted(self) -> bool:
+        with self._condition:
+            return self._aborted
+
+    @property
+    def transitions(self) -> List[Tuple[float, ScanState]]:
+        """Returns the (timestamp, state) transitions of the current or last collection."""
+        with self._condition:
+            return list(self._transitions)
@@ -18,15 +18,28 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
+import csv
 import math
 import os.path
 import time
 import numpy as np
-from epics import caget, caput
-from typing import Optional
+from epics import caget, caput, get_pv
+from typing import List, Optional, Tuple
 from qtpy.QtCore import QObject, Signal
 
-from tomoxrd.widget.custom import MsgBox
+from tomoxrd.model import (
+    DetectorConfigModel,
+    FrameAccountModel,
+    FrameProgressModel,
+    FrameReducerModel,
+    FrameReport,
+    FrameTimingModel,
+    MapGrid,
+    MapRow,
+    NexusWriterModel,
+    ScanState,
+    ScanStateModel,
+)
 
 
 class ScanningModel(QObject):
@@ -35,16 +48,16 @@ class ScanningModel(QObject):
     scan_is_running: Signal = Signal(bool)
     frame_number_changed: Signal = Signal(int)
     frame_counter_changed: Signal = Signal(int)
+    frame_rate_changed: Signal = Signal(float, float)  # frames/s, seconds to finish
     total_frames_changed: Signal = Signal(int)
     trigger_esperanto_creation: Signal = Signal()
     error_message_changed: Signal = Signal(str)
-
-    # Properties
-    _is_running: bool = False
-    _aborted: bool = False
+    phases_recorded: Signal = Signal(dict)
+    frames_missing: Signal = Signal(str)
 
     # Detector PVs
     _detector_exposure: str = "13PIL1MCdTe:cam1:AcquireTime"
+    _detector_period: str = "13PIL1MCdTe:cam1:AcquirePeriod"
     _detector_acquire: str = "13PIL1MCdTe:cam1:Acquire"
     _detector_armed: str = "13PIL1MCdTe:cam1:Armed"
     _detector_num_images: str = "13PIL1MCdTe:cam1:NumImages"
@@ -54,14 +67,19 @@ class ScanningModel(QObject):
     _detector_file_name: str = "13PIL1MCdTe:cam1:FileName"
     _detector_file_number: str = "13PIL1MCdTe:cam1:FileNumber"
     _detector_file_path: str = "13PIL1MCdTe:cam1:FilePath"
+    _detector_full_filename: str = "13PIL1MCdTe:cam1:FullFileName_RBV"
 
     _tiff_file_template: str = "13PIL1MCdTe:TIFF1:FileTemplate"
     _tiff_file_number: str = "13PIL1MCdTe:TIFF1:FileNumber"
     _tiff_file_name: str = "13PIL1MCdTe:TIFF1:FileName"
+    _tiff_full_filename: str = "13PIL1MCdTe:TIFF1:FullFileName_RBV"
+    _tiff_enable: str = "13PIL1MCdTe:TIFF1:EnableCallbacks"
 
     _recursive_filter_number = "13PIL1MCdTe:Proc1:NumFilter"
     _recursive_filter_type = "13PIL1MCdTe:Proc1:FilterType"
     _recursive_filter_enable = "13PIL1MCdTe:Proc1:EnableFilter"
+    # Sum the CBF frames in software instead of the Proc1 recursive filter, opt-in
+    _software_merge: bool = False
 
     # PSO PVs
     _pso_axis: str = "13BMDPG1:TS:PSOAxisName"
@@ -80,6 +98,11 @@ class ScanningModel(QObject):
     _tiff_file_path: str = "13PIL1MCdTe:TIFF1:FilePath"
     _shutter: str = "13BMD:Unidig2Bo10"  # 1: Open, 0: Close
 
+    # Stage PVs
+    _horizontal_motor: str = "13BMD:m123"
+    _vertical_motor: str = "13BMD:m115"
+    _focus_motor: str = "13BMD:m122"
+
     _start_position: float = None
     _end_position: float = None
     _exposure_time: float = None
@@ -88,8 +111,7 @@ class ScanningModel(QObject):
     _num_angles: int = 1
 
     # Helper variables
-    _wide_scan: bool = False
-    _still_scan: bool = False
+    _collection_type: str = "Still"  # Still, Step, Wide, Burst or Map
     _encoder_dir: int = 1
     _motor_dir: int = 1
     _user_direction: int = 1
@@ -98,20 +120,119 @@ class ScanningModel(QObject):
     _motor_speed: float = None
     _accel_dist: float = None
     _cbf_collection: bool = True
+    # Frames of the step and wide points also saved to a single NeXus file
+    _container_collection: bool = False
     _frame_number: int = 1
     _filename: str = ""
+    _base_filename: str = ""
     _filepath: str = ""
-    _file_number: int = 1
     _total_frames: int = None
-    _previous_detector_filename: str = ""
-    _previous_tiff_filename: str = ""
-    _previous_detector_filepath: str = ""
-    _previous_tiff_filepath: str = ""
+    _tiff_path: str = ""
+
+    # Burst still collection
+    _burst_trigger_timeout: float = 5.0
+    _burst_shutter_max_move: float = 0.1
+
+    # Abort
+    _abort_timeout: float = 0.25
 
-    creating_esperanto: bool = False
+    # Frame progress updates per second
+    _progress_refresh_rate: float = 10.0
+
+    # Detector arming and theta return
+    _arm_timeout: float = 5.0
+    _return_timeout: float = 300.0
+
+    # Map fly rows
+    _map_readout_time: float = 0.005
+    _map_timeout: float = 5.0
+    _map_taxi_speed: float = None
+    # Horizontal stage axis on the Aerotech controller and its encoder input, the PSO fires a pulse per pixel
+    _map_pso_axis: str = "X"
+    _map_pso_input: int = 3
+    _map_counts_per_unit: float = None
 
     def __init__(self) -> None:
         super(ScanningModel, self).__init__()
+        # Lifecycle of the collection, also times its phases
+        self._state = ScanStateModel()
+        # Frame updates coalesced to the GUI refresh rate
+        self._progress = FrameProgressModel(refresh_rate=self._progress_refresh_rate)
+        self._progress.frame_number_changed.connect(self.frame_number_changed)
+        self._progress.frame_counter_changed.connect(self.frame_counter_changed)
+        self._progress.rate_changed.connect(self.frame_rate_changed)
+        # True if the collection was started by a single point, instead of a controller
+        self._owns_collection: bool = False
+        # Sum, max and mean projections of the point, computed as the frames land
+        self._reducer = FrameReducerModel()
+        # Expected against received frames of the point
+        self._account = FrameAccountModel()
+        self._account.stall_detected.connect(self.frames_missing)
+        self._frame_report: Optional[FrameReport] = None
+        # Arrival time and commanded omega of every frame, from the array counter monitor
+        self._timing = FrameTimingModel(f"{self._detector_arr_counter}_RBV")
+        self._frame_timing: Optional[dict] = None
+        self._local_path: str = ""
+        # Detector configuration, written concurrently and only where it differs
+        self._detector_config = DetectorConfigModel([
+            self._detector_exposure,
+            self._detector_period,
+            self._detector_num_images,
+            self._detector_trigger,
+            self._detector_arr_counter,
+            self._detector_file_template,
+            self._detector_file_name,
+            self._detector_file_number,
+            self._detector_file_path,
+            self._tiff_file_template,
+            self._tiff_file_number,
+            self._tiff_file_name,
+            self._tiff_file_path,
+            self._tiff_enable,
+            self._recursive_filter_number,
+            self._recursive_filter_type,
+            self._recursive_filter_enable,
+        ])
+        # Idle values written by the reset, instead of the values found before the collection
+        self._detector_defaults = {
+            self._detector_num_images: 1,
+            self._detector_trigger: 0,
+            self._detector_file_template: "%s%s_%4.4d_0001.tif",
+            self._tiff_file_template: "%s%s_%4.4d.tif",
+            self._recursive_filter_number: 1,
+        }
+
+        # Last programmed PSO output (axis, input, pulse width, distance), None if unknown
+        self._pso_state: Optional[tuple] = None
+        self._pso_reprogrammed: bool = True
+
+        # Channel access connections and PSO units, set by connect_hardware
+        self._abort_pvs: dict = {}
+        self._connected: bool = False
+
+    def connect_hardware(self) -> None:
+        """
+        Connects the abort PVs and initializes the PSO units. Blocks until the IOCs reply, so the
+        GUI runs it on a worker thread after the window is shown.
+        """
+        if self._connected:
+            return None
+
+        self._detector_config.connect()
+
+        # Connected ahead of time, so an abort doesn't wait for channel access connections
+        self._abort_pvs = {
+            name: get_pv(name, connect=True)
+            for name in (
+                self._theta + ".STOP",
+                self._horizontal_motor + ".STOP",
+                self._vertical_motor + ".STOP",
+                self._focus_motor + ".STOP",
+                self._detector_acquire,
+                self._shutter,
+            )
+        }
+
         self._pso_axis = caget(self._pso_axis, as_string=True)
         self._max_speed = caget(self._theta + ".VMAX")
 
@@ -120,18 +241,42 @@ class ScanningModel(QObject):
         reply = caget(self._pso_command_in, as_string=True)
         counts_per_rotation = float(reply[1:])
         caput(self._pso_counts_per_rotation, counts_per_rotation)
+        self._connected = True
 
     @staticmethod
     def create_error_message(msg: str) -> None:
         print(f"[Generic-Error] - {msg}")
+        # Imported here, the widget package imports the models
+        from tomoxrd.widget.custom import MsgBox
         MsgBox(msg=msg)
 
+    def begin_collection(self, state: Optional[ScanState] = ScanState.MOVING) -> bool:
+        """Starts a collection of several points. Returns False if a collection is already running."""
+        return self._state.begin(state)
+
+    def end_collection(self) -> None:
+        """Ends the running collection."""
+        self._owns_collection = False
+        self._state.end()
+
+    def _begin_point(self, state: ScanState) -> None:
+        """Starts a single point collection, unless it is part of a running collection."""
+        if self._state.begin(state):
+            self._owns_collection = True
+        else:
+            self._state.transition(state)
+
+    def _end_point(self) -> None:
+        """Ends the collection if it was started by the point."""
+        if self._owns_collection:
+            self.end_collection()
+
     def _calculate_encoder_counts(self, modifier: float, delta: float) -> int:
         """
         Computes the encoder counts for wide and step collections.
         Changes the value for the PSOEncoderCountsPerStep PV to the actual encoder counts.
         """
-        if not self._wide_scan:
+        if self._collection_type != "Wide":
             counts = round(self._rotation_step * modifier)
         else:
             counts = round(delta * modifier)
@@ -144,12 +289,12 @@ class ScanningModel(QObject):
         Adds 1/2 of a delta to ensure that we are really up to speed.
         """
         if self._rotation_step > 0:
-            if not self._wide_scan:
+            if self._collection_type != "Wide":
                 distance = math.ceil(self._accel_dist / self._rotation_step + 0.5) * self._rotation_step
             else:
                 distance = math.ceil(self._accel_dist + (self._accel_dist * 0.001))
         else:
-            if not self._wide_scan:
+            if self._collection_type != "Wide":
                 distance = math.floor(self._accel_dist / self._rotation_step - 0.5) * self._rotation_step
             else:
                 distance = math.ceil(self._accel_dist - (self._accel_dist * 0.001))
@@ -197,31 +342,39 @@ class ScanningModel(QObject):
     def _program_pso(self) -> None:
         """
         Performs programming of PSO output on the Aerotech driver.
+        The output, pulse, tracking and distance commands are only sent if they differ from the
+        programmed state, the window is always set again since it is referenced from the arm position.
         """
         pso_input = int(caget(self._pso_encoder_input, as_string=True))
-        # Make sure the PSO control is off
-        caput(self._pso_command_out, f"PSOCONTROL {self._pso_axis} RESET", wait=True)
-        # Set the output to occur from the I/O terminal on the controller
-        caput(self._pso_command_out, f"PSOOUTPUT {self._pso_axis} CONTROL 0 1", wait=True)
-        # Set the pulse width.  The total width and active width are the same, since this is a single pulse.
         pulse_width = caget(self._pso_pulse_width)
-        caput(self._pso_command_out, f"PSOPULSE {self._pso_axis} TIME {pulse_width},{pulse_width}", wait=True)
-        # Set the pulses to only occur in a specific window
-        caput(self._pso_command_out, f"PSOOUTPUT {self._pso_axis} PULSE WINDOW MASK", wait=True)
-        # Set which encoder we will use.  3 = the MXH (encoder multiplier) input, which is what we generally want
-        caput(self._pso_command_out, f"PSOTRACK {self._pso_axis} INPUT {pso_input}", wait=True)
-        # Set the distance between pulses. Do this in encoder counts.
         encoder_counts_per_step = int(np.abs(caget(self._pso_counts_per_step)))
         fixed_encoder_counts = 1
-        if not self._wide_scan:
-            caput(self._pso_command_out, f"PSODISTANCE {self._pso_axis} FIXED {encoder_counts_per_step}", wait=True)
+        if self._collection_type != "Wide":
+            pso_distance = encoder_counts_per_step
         else:
             # Convert acceleration distance to encoder counts and set as PSODISTANCE fixed
             encoder_multiply = float(caget(self._pso_counts_per_rotation)) / 360.0
             fixed_encoder_counts = int(
                 round(math.ceil(self._accel_dist + (self._accel_dist * 0.001)) * encoder_multiply)
             )
-            caput(self._pso_command_out, f"PSODISTANCE {self._pso_axis} FIXED {fixed_encoder_counts}", wait=True)
+            pso_distance = fixed_encoder_counts
+
+        pso_state = (self._pso_axis, pso_input, pulse_width, pso_distance)
+        self._pso_reprogrammed = pso_state != self._pso_state
+        if self._pso_reprogrammed:
+            # Make sure the PSO control is off
+            caput(self._pso_command_out, f"PSOCONTROL {self._pso_axis} RESET", wait=True)
+            # Set the output to occur from the I/O terminal on the controller
+            caput(self._pso_command_out, f"PSOOUTPUT {self._pso_axis} CONTROL 0 1", wait=True)
+            # Set the pulse width.  The total width and active width are the same, since this is a single pulse.
+            caput(self._pso_command_out, f"PSOPULSE {self._pso_axis} TIME {pulse_width},{pulse_width}", wait=True)
+            # Set the pulses to only occur in a specific window
+            caput(self._pso_command_out, f"PSOOUTPUT {self._pso_axis} PULSE WINDOW MASK", wait=True)
+            # Set which encoder we will use.  3 = the MXH (encoder multiplier) input, which is what we generally want
+            caput(self._pso_command_out, f"PSOTRACK {self._pso_axis} INPUT {pso_input}", wait=True)
+            # Set the distance between pulses. Do this in encoder counts.
+            caput(self._pso_command_out, f"PSODISTANCE {self._pso_axis} FIXED {pso_distance}", wait=True)
+            self._pso_state = pso_state
 
         # Which encoder is being used to calculate whether we are in the window.  1 for single axis
         caput(self._pso_command_out, f"PSOWINDOW {self._pso_axis} 1 INPUT {pso_input}", wait=True)
@@ -229,7 +382,7 @@ class ScanningModel(QObject):
         # Calculate window function parameters.  Must be in encoder counts, and is
         # referenced from the stage location where we arm the PSO.  We are at that point now.
         # We want pulses to start at start - delta/2, end at end + delta/2.
-        if not self._wide_scan:
+        if self._collection_type != "Wide":
             range_start = -round(np.abs(encoder_counts_per_step) / 2) * self._overall_sense
             range_length = np.abs(encoder_counts_per_step) * self._num_angles
         else:
@@ -249,49 +402,53 @@ class ScanningModel(QObject):
             wait=True
         )
 
-    def _prepare_detector(self) -> None:
+    def _prepare_detector(self, extra: Optional[dict] = None) -> None:
         """
-        Sets the pre-collection values to the detector PVs
+        Sets the pre-collection values to the detector PVs, writing only the values that changed.
+        Extra (PV, value) pairs of the collection type override the default values.
         Trigger mode: #0: Internal, #2: Ext-Trigger, #3: Multi-Trigger
         """
-        # Sets the exposure time
-        caput(self._detector_exposure, self._exposure_time, wait=True)
-        # Sets the number of images
-        caput(self._detector_num_images, self._num_angles, wait=True)
-        # Resets the image array counter
-        caput(self._detector_arr_counter, 0, wait=True)
-        # Sets the trigger mode
-        caput(self._detector_trigger, self._trigger_mode, wait=True)
-        # Sets the file name for the TIFF plugin
-        caput(self._tiff_file_name, self._filename)
-        # Sets the file name for the detector
-        caput(self._detector_file_name, self._filename)
-        # Sets the starting file number for the TIFF plugin
-        caput(self._tiff_file_number, self._frame_number)
-
-        detector_template = "%s%s_%4.4d_0001.tif"
-        tiff_template = "%s%s_%4.4d.tif"
-        if not self._still_scan and not self._wide_scan:
+        config = {
+            # Exposure time, number of images and the image array counter
+            self._detector_exposure: self._exposure_time,
+            self._detector_num_images: self._num_angles,
+            self._detector_arr_counter: 0,
+            self._detector_trigger: self._trigger_mode,
+            # File path and names for the TIFF plugin and the detector, starting file number for the TIFF plugin
+            self._tiff_file_path: self._tiff_path,
+            self._tiff_file_name: self._filename,
+            self._detector_file_name: self._filename,
+            self._tiff_file_number: self._frame_number,
+            self._detector_file_template: "%s%s_%4.4d_0001.tif",
+            self._tiff_file_template: "%s%s_%4.4d.tif",
+        }
+
+        if self._collection_type == "Step":
             if self._cbf_collection:
-                # Set the necessary values for .cbf collection
-                detector_template = "%s%s_%4.4d.cbf"
-                tiff_template = "%s%s_merged.tif"
-                # Save the latest detector file number and set the current as frame number
-                self._file_number = caget(self._detector_file_number)
-                caput(self._detector_file_number, self._frame_number, wait=True)
-                # Sets the detector file path for .cbf collection
-                caput(self._detector_file_path, caget(self._tiff_file_path, as_string=True))
-                # Set the n filtered
-                caput(self._recursive_filter_number, self._num_angles, wait=True)
-                # Enable the filter
-                caput(self._recursive_filter_enable, 1, wait=True)
-                # Set filter to sum
-                caput(self._recursive_filter_type, 2, wait=True)
-
-        # Sets the detector file template
-        caput(self._detector_file_template, detector_template)
-        # Sets the tiff file template
-        caput(self._tiff_file_template, tiff_template)
+                # Set the necessary values for .cbf collection, the detector numbers the frames from the frame number
+                config[self._detector_file_template] = "%s%s_%4.4d.cbf"
+                config[self._detector_file_number] = self._frame_number
+                config[self._detector_file_path] = self._tiff_path
+                if self._software_merge:
+                    # The reducer saves the merged frame, the TIFF plugin is idle
+                    config[self._tiff_enable] = 0
+                else:
+                    # Sum the n filtered frames
+                    config[self._tiff_file_template] = "%s%s_merged.tif"
+                    config[self._recursive_filter_number] = self._num_angles
+                    config[self._recursive_filter_enable] = 1
+                    config[self._recursive_filter_type] = 2
+
+        config.update(extra or {})
+
+        # The exposure, counter and TIFF file number are not restored after the collection
+        self._detector_config.apply(
+            config, keep=(self._detector_exposure, self._detector_arr_counter, self._tiff_file_number)
+        )
+
+    def invalidate_pso(self) -> None:
+        """Forgets the programmed PSO state, so the next point programs the PSO from scratch."""
+        self._pso_state = None
 
     def _cleanup_pso(self) -> None:
         caput(self._pso_command_out, f"PSOWINDOW {self._pso_axis} 1 OFF", wait=True)
@@ -299,61 +456,159 @@ class ScanningModel(QObject):
 
     def _reset_detector(self) -> None:
         """
-        Resets the detector's trigger mode and the number of images,
-        after the scan is completed/aborted.
-        """
-        # Resets the number of images
-        caput(self._detector_num_images, 1, wait=True)
-        # Resets the trigger mode to internal
-        caput(self._detector_trigger, 0, wait=True)
-        # Resets the extension file template
-        if not self._still_scan and not self._wide_scan:
-            caput(self._detector_file_template, "%s%s_%4.4d_0001.tif")
-            caput(self._tiff_file_template, "%s%s_%4.4d.tif")
-            if self._cbf_collection:
-                caput(self._recursive_filter_number, 1, wait=True)
-                # Reset file number
-                caput(self._detector_file_number, self._file_number, wait=True)
-        # Reset file path
-        caput(self._tiff_file_path, self._previous_tiff_filepath, wait=True)
-        caput(self._detector_file_path, self._previous_detector_filepath, wait=True)
-        # Reset file name
-        caput(self._tiff_file_name, self._previous_tiff_filename, wait=True)
-        caput(self._detector_file_name, self._previous_detector_filename, wait=True)
+        Resets the detector's trigger mode and the number of images, and restores the file paths,
+        names and numbers changed for the collection, after the scan is completed/aborted.
+        """
+        self._detector_config.restore(defaults=self._detector_defaults)
+
+    def _frame_files(self) -> List[str]:
+        """Returns the local paths of the frames of the point, in the order they are saved."""
+        extension = "cbf" if self._collection_type == "Step" and self._cbf_collection else "tif"
+        return [
+            os.path.join(self._local_path, f"{self._filename}_{self._frame_number + index:04d}.{extension}")
+            for index in range(self._num_angles)
+        ]
+
+    def _frame_container(self) -> Optional[NexusWriterModel]:
+        """Creates the NeXus container of the step and wide points, None if it is not used."""
+        if not self._container_collection or self._collection_type not in ("Step", "Wide"):
+            return None
+
+        direction = 1 if self._end_position >= self._start_position else -1
+        if self._collection_type == "Step":
+            omega_range = abs(self._rotation_step)
+        else:
+            omega_range = abs(self._end_position - self._start_position)
+        omega = self._start_position + direction * omega_range * np.arange(self._num_angles)
+
+        return NexusWriterModel(
+            path=os.path.join(self._local_path, f"{self._filename}_{self._frame_number:04d}.nxs"),
+            omega=omega,
+            omega_range=omega_range,
+            exposure=self._exposure_time,
+            positions=self.stage_positions(),
+        )
 
-    def _wait_for_collection(self) -> None:
-        frame_counter = 0
+    def _start_reduction(self) -> None:
+        """
+        Starts the projections of the point, the merged frame of the CBF step scans is saved from the sum.
+        The frames are also added to the NeXus container, if enabled.
+        """
+        merged_file = None
+        if self._collection_type == "Step" and self._cbf_collection and self._software_merge:
+            merged_file = os.path.join(self._local_path, f"{self._filename}_merged.tif")
+        self._reducer.start(self._frame_files(), merged_file=merged_file, container=self._frame_container())
 
-        while not self._aborted:
-            if caget(self._shutter) == 0:
+    def _current_frame(self) -> int:
+        """Returns the array counter for CBF collections, otherwise the next file number of the TIFF plugin."""
+        if self._cbf_collection:
+            return int(caget(f"{self._detector_arr_counter}_RBV"))
+        return int(caget(self._tiff_file_number))
+
+    def _wait_for_collection(self) -> None:
+        # The array counter starts from 0, the TIFF plugin from the first frame number
+        first_frame = 0 if self._cbf_collection else self._frame_number
+        self._progress.start(total=self._num_angles)
+        self._account.start(expected=self._num_angles, period=self._exposure_time + 0.005)
+        self._start_reduction()
+        reduction_closed = False
+
+        try:
+            while not self._state.aborted:
+                if caget(self._shutter) == 0:
+                    break
+
+                if not caget(self._detector_armed) == 0:
+                    # Get the current frame number
+                    frame = self._current_frame()
+                    # Update the frame number input box and the frame counter at the refresh rate
+                    self._progress.update(counter=frame - first_frame, frame_number=frame)
+                    self._reducer.frames_available(frame - first_frame)
+                    self._account.update(frame - first_frame)
+                    continue
                 break
 
-            if not caget(self._detector_armed) == 0:
-                # Get the current frame number
-                if self._cbf_collection:
-                    frame = int(caget(f"{self._detector_arr_counter}_RBV"))
-                else:
-                    frame = caget(self._tiff_file_number)
-                # Update the frame number input box whilst scanning
-                if self._frame_number != frame:
-                    self._frame_number = frame
-                    self.frame_number_changed.emit(self._frame_number)
-
-                    # Update the frame counter
-                    frame_counter += 1
-                    self.frame_counter_changed.emit(frame_counter)
-                continue
-            break
+            self._state.transition(ScanState.FLUSHING)
 
-        # Close the shutter
-        self.toggle_shutter(on=False)
+            # Close the shutter
+            self.toggle_shutter(on=False)
 
-        # Add delay
-        time.sleep(0.5)
+            # Add delay
+            time.sleep(0.5)
+
+            # Count the frames saved during the delay
+            frame = self._current_frame()
+            self._progress.update(counter=frame - first_frame, frame_number=frame)
+            self._progress.flush()
+            if self._state.aborted:
+                self._reducer.cancel()
+            else:
+                self._reducer.close(count=frame - first_frame)
+            reduction_closed = True
+        finally:
+            # The reducer would otherwise wait for the frames of the point forever
+            if not reduction_closed:
+                self._reducer.cancel()
+
+        self._check_frames(received=frame - first_frame)
+
+        stats = self._timing.stop()
+        self._frame_timing = None if stats is None else stats.to_dict()
+
+    def _check_frames(self, received: int) -> None:
+        """Compares the received frames against the expected frames and reports the missing ones."""
+        files = self._frame_files() if received < self._num_angles else None
+        self._frame_report = self._account.finish(received, files=files)
+        if self._frame_report.complete or self._state.aborted:
+            return None
+
+        missing = ", ".join(str(self._frame_number + index) for index in self._frame_report.missing[:10])
+        if len(self._frame_report.missing) > 10:
+            missing += ", ..."
+        message = (
+            f"{self._filename}: received {self._frame_report.received} of {self._frame_report.expected} frames"
+            f" (missing: {missing or 'none'})."
+        )
+        print(f"[Frames-Error] - {message}")
+        self.frames_missing.emit(message)
 
     def toggle_cbf_collection(self, state: int) -> None:
         self._cbf_collection = state
 
+    def toggle_software_merge(self, state: int) -> None:
+        """Saves the merged frame of the CBF step scans from the reducer sum, instead of the Proc1 filter."""
+        self._software_merge = bool(state)
+
+    def toggle_container_collection(self, state: int) -> None:
+        """Enables the NeXus container of the step and wide points, only if h5py is installed."""
+        self._container_collection = bool(state) and NexusWriterModel.available()
+
+    def set_base_filename(self, filename: str) -> None:
+        """Sets the TIFF plugin and detector file names that are restored after each collection."""
+        self._base_filename = filename
+        self._detector_config.apply(
+            {self._tiff_file_name: filename, self._detector_file_name: filename},
+            keep=(self._tiff_file_name, self._detector_file_name),
+        )
+
+    def next_frame_number(self) -> int:
+        """Returns the next file number of the TIFF plugin."""
+        return int(caget(self._tiff_file_number))
+
+    def newest_frame_file(self) -> Optional[str]:
+        """Returns the local path of the last frame saved by the detector, None if it is not known."""
+        # The TIFF plugin only saves the merged frame of the CBF step scans
+        if self._collection_type == "Step" and self._cbf_collection:
+            filename = caget(self._detector_full_filename, as_string=True)
+        else:
+            filename = caget(self._tiff_full_filename, as_string=True)
+
+        if not filename:
+            return None
+        if filename.startswith("/DAC"):
+            filename = self._base_path + filename[len("/DAC"):]
+        return os.path.normpath(filename)
+
     def prepare_scan(
             self,
             start: float,
@@ -365,8 +620,11 @@ class ScanningModel(QObject):
             step: Optional[float] = None,
     ) -> bool:
         self.scan_is_running.emit(True)
-        self._is_running = True
+        self._begin_point(ScanState.PREPARING)
         self.status_message_changed.emit("Preparing")
+        self._frame_report = None
+        self._frame_timing = None
+
         self._start_position = start
         self._end_position = end
         self._exposure_time = exposure
@@ -374,8 +632,6 @@ class ScanningModel(QObject):
         self._filename = filename
         self._filepath = filepath
 
-        self.creating_esperanto = False
-
         limited = False
 
         if start is not None or end is not None:
@@ -392,25 +648,26 @@ class ScanningModel(QObject):
                 limited = True
 
             if step is None:
-                self._wide_scan = True
+                self._collection_type = "Wide"
                 self._trigger_mode = 2
                 next_filepath = self._filepath
             else:
-                self._wide_scan = False
+                self._collection_type = "Step"
                 self._rotation_step = step
                 self._trigger_mode = 3
 
                 # Update filepath for step sacn
                 next_filepath = self._filepath + self._filename
 
-            self._still_scan = False
+            self._state.transition(ScanState.PROGRAMMING)
 
             self._compute_senses()
             self._compute_pso()
             self._program_pso()
+
+            self._state.transition(ScanState.PREPARING)
         else:
-            self._still_scan = True
-            self._wide_scan = False
+            self._collection_type = "Still"
             self._trigger_mode = 0
             self._num_angles = 1
             next_filepath = self._filepath
@@ -419,25 +676,56 @@ class ScanningModel(QObject):
         if not os.path.exists(next_filepath):
             os.makedirs(next_filepath)
 
-        self._previous_tiff_filepath = caget(self._tiff_file_path)
-        self._previous_tiff_filename = caget(self._tiff_file_name)
-        self._previous_detector_filepath = caget(self._detector_file_path)
-        self._previous_detector_filename = caget(self._detector_file_name)
-        caput(self._tiff_file_path, next_filepath.replace(self._base_path, "/DAC"), wait=True)
-
+        self._local_path = next_filepath
+        self._tiff_path = next_filepath.replace(self._base_path, "/DAC")
         self._prepare_detector()
 
         return limited
 
+    def abort(self) -> float:
+        """
+        Stops theta and the sample stages, disarms the detector and closes the shutter, with all the
+        writes issued at once. The collection thread notices the abort and finishes the scan afterwards.
+        :return: The abort latency in seconds
+        """
+        abort_start = time.perf_counter()
+        self.status_message_changed.emit("Aborting")
+        self._state.request_abort()
+
+        values = {pv: 1 for pv in self._abort_pvs if pv.endswith(".STOP")}
+        values[self._detector_acquire] = 0
+        values[self._shutter] = 0
+        for name, value in values.items():
+            self._abort_pvs[name].put(value, wait=False, use_complete=True)
+
+        timeout = abort_start + self._abort_timeout
+        while not all(self._abort_pvs[name].put_complete for name in values):
+            if time.perf_counter() > timeout:
+                break
+            time.sleep(0.001)
+
+        latency = time.perf_counter() - abort_start
+        incomplete = [name for name in values if not self._abort_pvs[name].put_complete]
+        if incomplete:
+            print(f"[Abort-Error] - No completion after {latency * 1000:.0f} ms: {', '.join(incomplete)}")
+        else:
+            print(f"[Abort] - Motion, detector and shutter stopped in {latency * 1000:.0f} ms")
+        return latency
+
     def collect_still(self) -> None:
         # Set the scan status to running
         self.status_message_changed.emit("Scanning")
 
+        if not self._state.transition(ScanState.ACQUIRING):
+            self._finish_scan()
+            return None
+
         self.toggle_shutter(on=True)
 
-        # Arm the detector
+        # Arm the detector, a short still can already be saved when the armed status is read
+        self._start_frame_timing()
         caput(self._detector_acquire, 1)
-        time.sleep(0.5)
+        self._wait_for_armed(still=True)
 
         self._wait_for_collection()
         self._finish_scan()
@@ -450,22 +738,61 @@ class ScanningModel(QObject):
 
         caput(self._shutter, status, wait=True)
 
+    def _wait_for_armed(self, still: bool) -> bool:
+        """
+        Waits for the detector to report that it is armed, instead of a fixed delay. A still is also
+        complete if its frame was already counted.
+        :return: False on abort or timeout
+        """
+        if still:
+            return self._wait_for_pv(
+                self._detector_armed,
+                lambda armed: armed == 1 or caget(f"{self._detector_arr_counter}_RBV") >= 1,
+                timeout=self._arm_timeout,
+            )
+        return self._wait_for_pv(self._detector_armed, lambda armed: armed == 1, timeout=self._arm_timeout)
+
+    def _start_frame_timing(self) -> None:
+        """Starts the frame timing of a rotation, with the commanded omega of every step."""
+        step = None
+        if self._collection_type == "Step":
+            direction = 1 if self._end_position >= self._start_position else -1
+            step = direction * abs(self._rotation_step)
+        self._timing.start(exposure=self._exposure_time, omega_start=self._start_position, omega_step=step)
+
     def collect_projections(self) -> None:
         # Set the scan status to running
         self.status_message_changed.emit("Scanning")
+
+        if not self._state.transition(ScanState.PROGRAMMING):
+            self._finish_scan()
+            return None
+
         # Arm the PSO
         caput(self._pso_command_out, f"PSOCONTROL {self._pso_axis} ARM", wait=True)
         time.sleep(0.5)
+
+        if not self._state.transition(ScanState.TAXIING):
+            self._finish_scan()
+            return None
+
         # Place the motor at the start position using the max velocity
         caput(self._theta + ".VELO", self._max_speed)
         caput(self._theta + ".VAL", caget(self._pso_start_taxi), wait=True)
         caput(self._theta + ".VELO", self._motor_speed)
 
+        if not self._state.transition(ScanState.ACQUIRING):
+            self._finish_scan()
+            return None
+
         self.toggle_shutter(on=True)
 
         # Arm the detector
+        self._start_frame_timing()
         caput(self._detector_acquire, 1)
-        time.sleep(0.5)
+        if not self._wait_for_armed(still=False):
+            self._finish_scan()
+            return None
 
         # Start the trajectory
         caput(self._theta + ".VAL", caget(self._pso_end_taxi))
@@ -473,58 +800,591 @@ class ScanningModel(QObject):
         self._wait_for_collection()
         self._finish_scan()
 
+    def collect_still_burst(
+            self,
+            points: List[Tuple[str, Optional[float], Optional[float], Optional[float]]],
+            exposure: float,
+            frame: int,
+            filename: str,
+            filepath: str,
+            keep_shutter_open: Optional[bool] = True,
+    ) -> int:
+        """
+        Collects one still image at each of the (name, x, y, z) points, with the detector armed once in
+        multi-trigger mode for all of them. Every image is triggered by firing the PSO output after the
+        stages reach the point. The shutter stays open between points, unless the move is longer than
+        the burst shutter limit or keep_shutter_open is False.
+        :return: The number of collected points
+        """
+        self.scan_is_running.emit(True)
+        self._begin_point(ScanState.PREPARING)
+        self.status_message_changed.emit("Preparing")
+        self._frame_report = None
+        self._frame_timing = None
+
+        # Check all the positions before touching the detector
+        for _, x, y, z in points:
+            if not self.check_limits(self._horizontal_motor, x) or not self.check_limits(
+                    self._vertical_motor, y) or not self.check_limits(self._focus_motor, z):
+                self.scan_is_running.emit(False)
+                self._end_point()
+                return 0
+
+        self._start_position = None
+        self._end_position = None
+        self._exposure_time = exposure
+        self._frame_number = frame
+        self._filename = filename
+        self._filepath = filepath
+        self._collection_type = "Burst"
+        self._num_angles = len(points)
+        self._trigger_mode = 3
+
+        if not os.path.exists(self._filepath):
+            os.makedirs(self._filepath)
+        self._local_path = self._filepath
+
+        # The detector saves a numbered series, the TIFF plugin saves each point under its own name
+        self._tiff_path = self._filepath.replace(self._base_path, "/DAC")
+        self._prepare_detector(extra={self._detector_file_template: "%s%s_%4.4d.tif"})
+
+        # Pulses are fired by hand, so the output is not masked by a window
+        pulse_width = caget(self._pso_pulse_width)
+        caput(self._pso_command_out, f"PSOCONTROL {self._pso_axis} RESET", wait=True)
+        caput(self._pso_command_out, f"PSOOUTPUT {self._pso_axis} CONTROL 0 1", wait=True)
+        caput(self._pso_command_out, f"PSOPULSE {self._pso_axis} TIME {pulse_width},{pulse_width}", wait=True)
+        caput(self._pso_command_out, f"PSOOUTPUT {self._pso_axis} PULSE", wait=True)
+        self._pso_state = None
+
+        # Arm the detector, the points are skipped if it is not armed
+        caput(self._detector_acquire, 1)
+        if not self._wait_for_armed(still=False):
+            if self._state.request_abort():
+                self.error_message_changed.emit("The detector was not armed for the burst.")
+
+        self.status_message_changed.emit("Scanning")
+        self._progress.start(total=len(points))
+        positions = list(self.stage_positions())
+        collected = 0
+        files = []
+        for name, x, y, z in points:
+            if not self._state.transition(ScanState.MOVING):
+                break
+
+            targets = (x, y, z)
+            distance = max(
+                (abs(target - position) for target, position in zip(targets, positions) if target is not None),
+                default=0.0,
+            )
+            if not keep_shutter_open or distance > self._burst_shutter_max_move:
+                self.toggle_shutter(on=False)
+
+            if x is not None:
+                caput(self._horizontal_motor + ".VAL", x, wait=True)
+            if y is not None:
+                caput(self._vertical_motor + ".VAL", y, wait=True)
+            if z is not None:
+                caput(self._focus_motor + ".VAL", z, wait=True)
+            positions = [position if target is None else target for target, position in zip(targets, positions)]
+
+            self._detector_config.apply({self._tiff_file_name: f"{filename}_{name}"})
+            tiff_number = caget(self._tiff_file_number)
+
+            if not self._state.transition(ScanState.ACQUIRING):
+                break
+
+            if caget(self._shutter) == 0:
+                self.toggle_shutter(on=True)
+
+            # Trigger a single image and wait for the TIFF plugin to save it
+            caput(self._pso_command_out, f"PSOCONTROL {self._pso_axis} FIRE", wait=True)
+            saved = self._wait_for_pv(
+                self._tiff_file_number, lambda number: number != tiff_number, timeout=exposure + self._burst_trigger_timeout
+            )
+            if not saved:
+                if self._state.request_abort():
+                    self.error_message_changed.emit(f"No image was received for the {name} point.")
+                break
+
+            collected += 1
+            files.append(os.path.join(self._local_path, f"{filename}_{name}_{tiff_number:04d}.tif"))
+            self._frame_number = caget(self._tiff_file_number)
+            self._progress.update(counter=collected, frame_number=self._frame_number)
+
+        self._progress.flush()
+
+        # Close the shutter
+        self._state.transition(ScanState.RESETTING)
+        self.toggle_shutter(on=False)
+
+        # Stop the detector, it is still armed if the burst was interrupted
+        if caget(self._detector_armed) == 1:
+            caput(self._detector_acquire, 0, wait=True)
+
+        self._cleanup_pso()
+        self._reset_detector()
+
+        # A single record for the whole burst
+        self._frame_report = FrameReport(
+            expected=len(points), received=collected, missing=list(range(collected, len(points)))
+        )
+        self._record_phases(
+            aborted=self._state.aborted,
+            first_frame=frame,
+            files={"frames": files},
+            points=[list(point) for point in points],
+            cbf=False,
+            pso_reprogrammed=True,
+        )
+
+        self.scan_is_running.emit(False)
+        self._end_point()
+        self.frame_counter_changed.emit(0)
+        self.status_message_changed.emit("Finished")
+
+        return collected
+
+    def _wait_for_pv(self, pv: str, condition, timeout: float, abortable: Optional[bool] = True) -> bool:
+        """Polls a PV until the condition is true. Returns False on abort (if abortable) or timeout."""
+        timeout = time.perf_counter() + timeout
+        while not (abortable and self._state.aborted):
+            if condition(caget(pv)):
+                return True
+            if time.perf_counter() > timeout:
+                return False
+            time.sleep(0.005)
+        return False
+
+    def _map_encoder_counts(self) -> float:
+        """Returns the encoder counts per unit of the horizontal stage, read once from the controller."""
+        if self._map_counts_per_unit is None:
+            caput(self._pso_command_out, f"UNITSTOCOUNTS({self._map_pso_axis}, 1.0)", wait=True)
+            reply = caget(self._pso_command_in, as_string=True)
+            self._map_counts_per_unit = float(reply[1:])
+        return self._map_counts_per_unit
+
+    def _program_map_pso(self, pixel_counts: int) -> None:
+        """
+        Programs the PSO output of the horizontal stage, with a pulse every pixel_counts encoder counts.
+        The window of every row is set when the row is armed.
+        """
+        pulse_width = caget(self._pso_pulse_width)
+        caput(self._pso_command_out, f"PSOCONTROL {self._map_pso_axis} RESET", wait=True)
+        caput(self._pso_command_out, f"PSOOUTPUT {self._map_pso_axis} CONTROL 0 1", wait=True)
+        caput(self._pso_command_out, f"PSOPULSE {self._map_pso_axis} TIME {pulse_width},{pulse_width}", wait=True)
+        caput(self._pso_command_out, f"PSOOUTPUT {self._map_pso_axis} PULSE WINDOW MASK", wait=True)
+        caput(self._pso_command_out, f"PSOTRACK {self._map_pso_axis} INPUT {self._map_pso_input}", wait=True)
+        caput(self._pso_command_out, f"PSODISTANCE {self._map_pso_axis} FIXED {pixel_counts}", wait=True)
+        caput(self._pso_command_out, f"PSOWINDOW {self._map_pso_axis} 1 INPUT {self._map_pso_input}", wait=True)
+        # The theta PSO is programmed from scratch by the next rotation
+        self._pso_state = None
+
+    def _fly_map_row(
+            self, row: MapRow, filename: str, pixel_size: float, pixel_counts: int, speed: float, taxi_pixels: int
+    ) -> bool:
+        """
+        Collects a single map row, with the PSO firing one detector trigger at the edge of every pixel
+        while the horizontal stage flies through the row at constant speed.
+        :return: False if the row was not collected
+        """
+        taxi = taxi_pixels * pixel_size
+        row_edge = row.x_start - row.direction * pixel_size / 2
+        taxi_start = row_edge - row.direction * taxi
+        taxi_end = row.x_end + row.direction * (pixel_size / 2 + taxi)
+
+        # Go to the row and to its taxi position at the normal speed
+        self._state.transition(ScanState.TAXIING)
+        caput(self._vertical_motor + ".VAL", row.y, wait=True)
+        if row.z is not None:
+            caput(self._focus_motor + ".VAL", row.z, wait=True)
+        caput(self._horizontal_motor + ".VELO", self._map_taxi_speed, wait=True)
+        caput(self._horizontal_motor + ".VAL", taxi_start, wait=True)
+
+        # The window is referenced from the arm position, the pulses start at the edge of the first pixel
+        motor_dir = 1 if caget(self._horizontal_motor + ".DIR") == 0 else -1
+        encoder_dir = 1 if self._map_encoder_counts() > 0 else -1
+        overall_sense = row.direction * motor_dir * encoder_dir
+        range_start = (taxi_pixels * pixel_counts - round(pixel_counts / 2)) * overall_sense
+        range_length = row.pixels * pixel_counts
+        if overall_sense > 0:
+            window_start = range_start
+            window_end = window_start + range_length
+        else:
+            window_end = range_start
+            window_start = window_end - range_length
+        caput(
+            self._pso_command_out,
+            f"PSOWINDOW {self._map_pso_axis} 1 RANGE {window_start - 5},{window_end + 5}",
+            wait=True
+        )
+        caput(self._pso_command_out, f"PSOCONTROL {self._map_pso_axis} ARM", wait=True)
+
+        # Every row is saved in its own numbered series
+        self._detector_config.apply(
+            {
+                self._detector_num_images: row.pixels,
+                self._detector_arr_counter: 0,
+                self._tiff_file_name: f"{filename}_r{row.index + 1:04d}",
+                self._tiff_file_number: 1,
+            },
+            keep=(self._detector_arr_counter, self._tiff_file_number),
+        )
+
+        if not self._state.transition(ScanState.ACQUIRING):
+            return False
+
+        self.toggle_shutter(on=True)
+
+        # Arm the detector, the frames are triggered by the PSO pulses
+        caput(self._detector_acquire, 1)
+        if not self._wait_for_armed(still=False):
+            self.toggle_shutter(on=False)
+            return False
+
+        # Start the fly move
+        caput(self._horizontal_motor + ".VELO", speed, wait=True)
+        caput(self._horizontal_motor + ".VAL", taxi_end)
+
+        # Wait for the frames of the row
+        timeout = time.perf_counter() + (taxi_end - taxi_start) * row.direction / speed + self._map_timeout
+        while not self._state.aborted:
+            frames = int(caget(f"{self._detector_arr_counter}_RBV"))
+            self._progress.update(counter=row.index * row.pixels + frames)
+            if frames >= row.pixels:
+                break
+            if time.perf_counter() > timeout:
+                if self._state.request_abort():
+                    self.error_message_changed.emit(f"Row {row.index + 1} received {frames} of {row.pixels} frames.")
+                break
+            time.sleep(0.01)
+
+        self._state.transition(ScanState.FLUSHING)
+        self.toggle_shutter(on=False)
+        self._wait_for_pv(
+            self._horizontal_motor + ".DMOV", lambda done: done == 1, timeout=self._map_timeout, abortable=False
+        )
+        caput(self._pso_command_out, f"PSOWINDOW {self._map_pso_axis} 1 OFF", wait=True)
+
+        return not self._state.aborted
+
+    def collect_map(self, grid: MapGrid, exposure: float, filename: str, filepath: str) -> int:
+        """
+        Collects a raster map as fly rows of the horizontal stage. The PSO of the horizontal stage triggers
+        the detector once per pixel, with the stage speed matching the pixel size to the frame period.
+        The pixel positions of the triggers are saved next to the frames as <filename>_map.csv.
+        :return: The number of collected rows
+        """
+        self.scan_is_running.emit(True)
+        self._begin_point(ScanState.PREPARING)
+        self.status_message_changed.emit("Preparing")
+
+        pixel_size = abs(grid.x.step)
+        if pixel_size == 0:
+            self.error_message_changed.emit("The horizontal step of the map must be larger than zero.")
+            self.scan_is_running.emit(False)
+            self._end_point()
+            return 0
+
+        # Keep each pixel an integer number of encoder counts
+        counts_per_unit = abs(self._map_encoder_counts())
+        pixel_counts = max(1, round(pixel_size * counts_per_unit))
+        pixel_size = pixel_counts / counts_per_unit
+
+        period = exposure + self._map_readout_time
+        speed = pixel_size / period
+        max_speed = caget(self._horizontal_motor + ".VMAX")
+        if max_speed and speed > max_speed:
+            self.error_message_changed.emit(
+                f"The map pixel size requires a horizontal speed of {speed:.4f}, above the maximum of {max_speed}."
+            )
+            self.scan_is_running.emit(False)
+            self._end_point()
+            return 0
+
+        # Accelerate over an integer number of pixels, to be at speed half a pixel before the first pulse
+        accel_dist = speed * float(caget(self._horizontal_motor + ".ACCL")) / 2
+        taxi_pixels = math.ceil(accel_dist / pixel_size + 0.5)
+        taxi = taxi_pixels * pixel_size
+
+        (x_min, x_max), (y_min, y_max), z_bounds = grid.bounds()
+        limits = [
+            self.check_limits(self._horizontal_motor, x_min - pixel_size / 2 - taxi),
+            self.check_limits(self._horizontal_motor, x_max + pixel_size / 2 + taxi),
+            self.check_limits(self._vertical_motor, y_min),
+            self.check_limits(self._vertical_motor, y_max),
+        ]
+        if z_bounds is not None:
+            limits.append(self.check_limits(self._focus_motor, z_bounds[0]))
+            limits.append(self.check_limits(self._focus_motor, z_bounds[1]))
+        if not all(limits):
+            self.scan_is_running.emit(False)
+            self._end_point()
+            return 0
+
+        self._start_position = None
+        self._end_position = None
+        self._exposure_time = exposure
+        self._filename = filename
+        self._filepath = filepath
+        self._collection_type = "Map"
+        self._num_angles = grid.x.size
+        self._trigger_mode = 3
+        self._frame_number = 1
+        self._map_taxi_speed = caget(self._horizontal_motor + ".VELO")
+        self._frame_report = None
+        self._frame_timing = None
+        previous_tiff_number = self._detector_config.value(self._tiff_file_number)
+
+        if not os.path.exists(self._filepath):
+            os.makedirs(self._filepath)
+        self._local_path = self._filepath
+
+        # Multi-trigger series of one frame per PSO pulse
+        self._tiff_path = self._filepath.replace(self._base_path, "/DAC")
+        self._prepare_detector(extra={self._detector_file_template: "%s%s_%4.4d.tif"})
+        self._program_map_pso(pixel_counts=pixel_counts)
+
+        self.total_frames = grid.num_pixels
+        self.status_message_changed.emit("Scanning")
+        self._progress.start(total=grid.num_pixels)
+
+        pixel_rows = []
+        for row in grid.rows():
+            if self._state.aborted:
+                break
+
+            collected = self._fly_map_row(
+                row,
+                filename=filename,
+                pixel_size=pixel_size,
+                pixel_counts=pixel_counts,
+                speed=speed,
+                taxi_pixels=taxi_pixels,
+            )
+            if not collected:
+                break
+
+            # Pixel centers from the PSO pulse positions
+            row_edge = row.x_start - row.direction * pixel_size / 2
+            for pixel in range(row.pixels):
+                x = row_edge + row.direction * (pixel + 0.5) * pixel_size
+                pixel_file = f"{filename}_r{row.index + 1:04d}_{pixel + 1:04d}.tif"
+                pixel_rows.append([pixel_file, row.index + 1, pixel + 1, round(x, 6), row.y, row.z])
+
+        # Stop the detector, it is still armed if the map was interrupted
+        self._progress.flush()
+        self._state.transition(ScanState.RESETTING)
+        if caget(self._detector_armed) == 1:
+            caput(self._detector_acquire, 0, wait=True)
+
+        caput(self._pso_command_out, f"PSOWINDOW {self._map_pso_axis} 1 OFF", wait=True)
+        caput(self._pso_command_out, f"PSOCONTROL {self._map_pso_axis} OFF", wait=True)
+        caput(self._horizontal_motor + ".VELO", self._map_taxi_speed, wait=True)
+        self._reset_detector()
+        self._detector_config.apply({self._tiff_file_number: previous_tiff_number}, keep=(self._tiff_file_number,))
+
+        map_filepath = os.path.join(self._filepath, f"{filename}_map.csv")
+        with open(map_filepath, "w", newline="") as map_file:
+            writer = csv.writer(map_file)
+            writer.writerow(["file", "row", "pixel", "x", "y", "z"])
+            writer.writerows(pixel_rows)
+
+        # A single record for the whole map, positioned at the first corner of the grid
+        (x_min, x_max), (y_min, y_max), z_bounds = grid.bounds()
+        self._frame_report = FrameReport(expected=grid.num_pixels, received=len(pixel_rows))
+        self._record_phases(
+            aborted=self._state.aborted,
+            positions=(x_min, y_min, None if z_bounds is None else z_bounds[0]),
+            first_frame=None,
+            frames=grid.num_pixels,
+            files={
+                "frames": [os.path.join(self._filepath, pixel_row[0]) for pixel_row in pixel_rows],
+                "map": [map_filepath],
+            },
+            grid={
+                "x": [grid.x.start, grid.x.stop, grid.x.step],
+                "y": [grid.y.start, grid.y.stop, grid.y.step],
+                "z": None if grid.z is None else [grid.z.start, grid.z.stop, grid.z.step],
+                "snake": grid.snake,
+                "bounds": [[x_min, x_max], [y_min, y_max], None if z_bounds is None else list(z_bounds)],
+            },
+            cbf=False,
+            pso_reprogrammed=True,
+        )
+
+        self.scan_is_running.emit(False)
+        self._end_point()
+        self.frame_counter_changed.emit(0)
+        self.status_message_changed.emit("Finished")
+
+        return len({pixel_row[1] for pixel_row in pixel_rows})
+
+    def check_limits(self, pv: str, value: float | None) -> bool:
+        """
+        Checks for high and low limits for a PV.
+        :return: False if exceeds the limits, else True
+        """
+        if value is None:
+            return True
+        if value < caget(pv + ".LLM"):
+            self.error_message_changed.emit(f"You have reached the low limit of the {pv}.")
+            return False
+        if value > caget(pv + ".HLM"):
+            self.error_message_changed.emit(f"You have reached the high limit of the {pv}.")
+            return False
+        return True
+
+    def move_to_point(self, x: Optional[float] = None, y: Optional[float] = None, z: Optional[float] = None) -> bool:
+        """Moves the stages to the collection point positions to prepare for the collection."""
+        self.scan_is_running.emit(True)
+        self.status_message_changed.emit("Moving")
+
+        # Check motor limits
+        limit_check_horiz = self.check_limits(self._horizontal_motor, x)
+        limit_check_vert = self.check_limits(self._vertical_motor, y)
+        limit_check_focus = self.check_limits(self._focus_motor, z)
+
+        if not limit_check_horiz or not limit_check_vert or not limit_check_focus:
+            return False
+
+        # The move is timed as part of the next point, the wait since the previous point is not
+        self._state.take_phases()
+        self._state.transition(ScanState.MOVING)
+        if x is not None:
+            caput(self._horizontal_motor + ".VAL", x, wait=True)
+        if y is not None:
+            caput(self._vertical_motor + ".VAL", y, wait=True)
+        if z is not None:
+            caput(self._focus_motor + ".VAL", z, wait=True)
+
+        return True
+
+    def stage_positions(self) -> Tuple[float, float, float]:
+        """Returns the current readback positions of the horizontal, vertical and focus stages."""
+        return (
+            caget(self._horizontal_motor + ".RBV"),
+            caget(self._vertical_motor + ".RBV"),
+            caget(self._focus_motor + ".RBV"),
+        )
+
     def _finish_scan(self) -> None:
-        # Reset status values
-        self._aborted = False
-        if not self._still_scan:
+        aborted = self._state.aborted
+        if self._collection_type != "Still":
+            self._state.transition(ScanState.RETURNING)
             # Cleanup PSO
             self._cleanup_pso()
-            # Set motor speed to max and revert motor position
+            # Set motor speed to max and revert motor position, the put completes when theta is in place
             caput(self._theta + ".VELO", self._max_speed)
-            caput(self._theta + ".VAL", self._start_position)
+            caput(self._theta + ".VAL", self._start_position, wait=True, timeout=self._return_timeout)
 
-            # Check theta
-            while round(caget(self._theta + ".RBV"), 4) != caget(self._theta + ".VAL"):
-                continue
-
-            if not self._wide_scan and self._cbf_collection:
-                # Trigger esperanto file creation.
-                self.creating_esperanto = True
+            frames_complete = self._frame_report is not None and self._frame_report.complete
+            if self._collection_type == "Step" and self._cbf_collection and not aborted and frames_complete:
+                # Trigger esperanto file creation, conversions with missing frames would fail.
                 self.trigger_esperanto_creation.emit()
-                # while self.creating_esperanto:
-                #     continue
 
+        self._state.transition(ScanState.RESETTING)
         # Check detector
         if caget(self._detector_armed) == 1:
             caput(self._detector_acquire, 0, wait=True)
 
         # Reset detector
         self._reset_detector()
+        self._record_phases(aborted=aborted)
         # Change scan running status
         self.scan_is_running.emit(False)
-        self._is_running = False
+        self._end_point()
         # Reset frame counter
         self.frame_counter_changed.emit(0)
         # Set finish scan message
         self.status_message_changed.emit("Finished")
 
+    def _point_name(self) -> Optional[str]:
+        """Returns the collection point name, appended to the base file name by the controllers."""
+        if self._base_filename and self._filename.startswith(self._base_filename + "_"):
+            return self._filename[len(self._base_filename) + 1:]
+        return None
+
+    def _point_files(self) -> dict:
+        """Returns the (kind: paths) of the files saved for the point."""
+        received = self._num_angles if self._frame_report is None else self._frame_report.received
+        files = {"frames": self._frame_files()[:received]}
+        others = {
+            "merged": os.path.join(self._local_path, f"{self._filename}_merged.tif"),
+            "nexus": os.path.join(self._local_path, f"{self._filename}_{self._frame_number:04d}.nxs"),
+        }
+        for kind, path in others.items():
+            if os.path.exists(path):
+                files[kind] = [path]
+        return files
+
+    def _record_phases(self, aborted: bool, **values) -> None:
+        """
+        Emits the measured phase durations of the finished point, with the collection parameters and
+        the sample, point, stage positions and files that are stored in the catalog. The given values
+        replace the ones of a rotation point.
+        """
+        record = {
+            "sample": self._base_filename,
+            "point": self._point_name(),
+            "positions": self.stage_positions(),
+            "directory": self._local_path,
+            "filename": self._filename,
+            "first_frame": self._frame_number,
+            "files": self._point_files(),
+            "collection_type": self._collection_type,
+            "exposure": self._exposure_time,
+            "start": self._start_position,
+            "end": self._end_position,
+            "step": self._rotation_step if self._collection_type == "Step" else None,
+            "frames": self._num_angles,
+            "frames_received": None if self._frame_report is None else self._frame_report.received,
+            "cbf": bool(self._cbf_collection),
+            "aborted": aborted,
+            "pso_reprogrammed": self._collection_type == "Still" or self._pso_reprogrammed,
+            "frame_timing": self._frame_timing,
+            "phases": self._state.take_phases(),
+        }
+        record.update(values)
+        self.phases_recorded.emit(record)
+
     @property
-    def is_running(self) -> bool:
-        return self._is_running
+    def state(self) -> ScanStateModel:
+        """Returns the state machine of the collection."""
+        return self._state
+
+    @property
+    def frame_report(self) -> Optional[FrameReport]:
+        """Returns the expected and received frames of the last point, None if it did not acquire."""
+        return self._frame_report
+
+    @property
+    def timing(self) -> FrameTimingModel:
+        """Returns the per-frame arrival times and commanded omega of the last point."""
+        return self._timing
 
-    @is_running.setter
-    def is_running(self, value: bool) -> None:
-        self._is_running = value
+    @property
+    def reducer(self) -> FrameReducerModel:
+        """Returns the streaming sum, max and mean projections of the collection point."""
+        return self._reducer
+
+    @property
+    def progress(self) -> FrameProgressModel:
+        """Returns the exact frame counts, frame rate and expected finish time of the collection."""
+        return self._progress
+
+    @property
+    def connected(self) -> bool:
+        """Returns True once the abort PVs and the PSO units are initialized."""
+        return self._connected
+
+    @property
+    def is_running(self) -> bool:
+        return self._state.running
 
     @property
     def aborted(self) -> bool:
         """Returns the aborted status of the collection."""
-        return self._aborted
-
-    @aborted.setter
-    def aborted(self, value: bool) -> None:
-        self.status_message_changed.emit("Aborting")
-        self._aborted = value
+        return self._state.aborted
 
     @property
     def total_frames(self) -> int:
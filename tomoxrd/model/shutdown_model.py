@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import time
+from dataclasses import dataclass
+from qtpy.QtCore import QObject, QTimer, Signal
+from typing import Callable, List, Optional
+
+
+@dataclass
+class ShutdownStep:
+    """A subsystem to stop, with the check of its stopped state and the time it is given to stop."""
+
+    name: str
+    stop: Callable[[], None]
+    stopped: Callable[[], bool]
+    timeout: float
+    deadline: float = 0.0
+
+
+class ShutdownModel(QObject):
+    """
+    Stops every subsystem at once on exit and polls them from a timer, so the event loop keeps running
+    while they stop. A subsystem that is still running after its timeout is reported and left behind.
+    """
+
+    finished: Signal = Signal(list)  # Names of the subsystems that failed to stop
+
+    _poll_interval: int = 50  # ms
+
+    def __init__(self) -> None:
+        super(ShutdownModel, self).__init__()
+        self._steps: List[ShutdownStep] = []
+        self._pending: List[ShutdownStep] = []
+        self._failed: List[str] = []
+        self._started: bool = False
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self._poll_interval)
+        self._timer.timeout.connect(self._poll)
+
+    def add(
+            self,
+            name: str,
+            stop: Callable[[], None],
+            stopped: Optional[Callable[[], bool]] = None,
+            timeout: Optional[float] = 5.0,
+    ) -> None:
+        """Adds a subsystem, stop must not block. Without a stopped check the subsystem stops with the call."""
+        self._steps.append(ShutdownStep(name, stop, stopped or (lambda: True), timeout))
+
+    def start(self) -> None:
+        """Signals every subsystem to stop and starts waiting for them, repeated calls are ignored."""
+        if self._started:
+            return None
+        self._started = True
+
+        now = time.perf_counter()
+        for step in self._steps:
+            try:
+                step.stop()
+            except Exception as error:
+                print(f"[Shutdown-Error] - {step.name}: {error}")
+                self._failed.append(step.name)
+                continue
+            step.deadline = now + step.timeout
+            self._pending.append(step)
+
+        # The first check runs from the event loop, so finished is never emitted from start
+        self._timer.start()
+
+    def _poll(self) -> None:
+        now = time.perf_counter()
+        for step in list(self._pending):
+            try:
+                stopped = step.stopped()
+            except Exception as error:
+                print(f"[Shutdown-Error] - {step.name}: {error}")
+                stopped = False
+
+            if stopped:
+                self._pending.remove(step)
+            elif now >= step.deadline:
+                print(f"[Shutdown-Error] - {step.name} did not stop within {step.timeout:g} s")
+                self._failed.append(step.name)
+                self._pending.remove(step)
+
+        if not self._pending:
+            self._timer.stop()
+            self.finished.emit(list(self._failed))
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    @property
+    def failed(self) -> List[str]:
+        return list(self._failed)
@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import json
+import os
+import threading
+import time
+from qtpy.QtCore import QObject, Signal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class StartupModel(QObject):
+    """
+    Runs the hardware initialization on a worker thread once the window is shown. Every step reads
+    on the worker, and its result is applied on the GUI thread. Keeps the time to the first paint
+    and of every step, appended to a JSON lines file to follow the startup time between releases.
+    """
+
+    state_changed: Signal = Signal(str)
+    finished: Signal = Signal(bool)  # True if all the steps succeeded
+    _step_done: Signal = Signal(object, object)
+
+    def __init__(self, started_at: Optional[float] = None) -> None:
+        super(StartupModel, self).__init__()
+        # perf_counter value of the process start, the package import if not given
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self._steps: List[Tuple[str, Callable[[], Any], Optional[Callable[[Any], None]]]] = []
+        self._timings: Dict[str, float] = {}
+        self._failed: List[str] = []
+        self._first_paint: Optional[float] = None
+        self._ready: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self._step_done.connect(self._apply_step)
+
+    def add_step(self, name: str, work: Callable[[], Any], apply: Optional[Callable[[Any], None]] = None) -> None:
+        """Adds a step, work runs on the worker thread and apply receives its result on the GUI thread."""
+        self._steps.append((name, work, apply))
+
+    def start(self) -> None:
+        """Starts the steps in the order they were added."""
+        if self._thread is not None:
+            return None
+
+        self.state_changed.emit("Connecting")
+        self._thread = threading.Thread(target=self._run, args=(), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Skips the steps that have not started yet, the running step can't be interrupted."""
+        self._stopped.set()
+
+    def _run(self) -> None:
+        for name, work, apply in self._steps:
+            if self._stopped.is_set():
+                self._failed.append(name)
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = work()
+            except Exception as error:
+                print(f"[Startup-Error] - {name}: {error}")
+                self._failed.append(name)
+                continue
+            finally:
+                self._timings[name] = time.perf_counter() - start
+
+            if apply is not None:
+                self._step_done.emit(apply, result)
+
+        # Queued after the results, so every step is applied before the finished slots run
+        self._ready = time.perf_counter() - self._started_at
+        self.state_changed.emit("Idle" if not self._failed else "Not connected")
+        self.finished.emit(not self._failed)
+
+    @staticmethod
+    def _apply_step(apply: Callable[[Any], None], result: Any) -> None:
+        apply(result)
+
+    def mark_first_paint(self) -> None:
+        """Records the time from the start to the first paint of the window, only the first call counts."""
+        if self._first_paint is None:
+            self._first_paint = time.perf_counter() - self._started_at
+
+    def record(self) -> dict:
+        return {
+            "timestamp": time.time(),
+            "first_paint": self._first_paint,
+            "ready": self._ready,
+            "steps": dict(self._timings),
+            "failed": list(self._failed),
+        }
+
+    def save(self, filepath: str) -> None:
+        """Appends the startup record to the JSON lines file."""
+        try:
+            with open(filepath, "a", encoding="utf-8") as startup_file:
+                startup_file.write(json.dumps(self.record()) + "\n")
+        except OSError as error:
+            print(f"[Startup-Error] - Could not save the startup time to {os.path.basename(filepath)}: {error}")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def first_paint(self) -> Optional[float]:
+        return self._first_paint
+
+    @property
+    def ready(self) -> Optional[float]:
+        return self._ready
+
+    @property
+    def failed(self) -> List[str]:
+        return list(self._failed)
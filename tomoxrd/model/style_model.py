@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import os
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from tomoxrd.model import PathModel
+
+
+@dataclass(frozen=True)
+class StyleModel:
+    """
+    Model that loads all the qss files once and combines them into the application stylesheet. The main
+    file goes first, the widget files only use object name selectors so their order does not matter.
+    """
+
+    paths: PathModel = field(compare=False, repr=False)
+    _stylesheet: str = field(init=False, compare=False, repr=False)
+
+    _main_file: ClassVar[str] = "main.qss"
+
+    def __post_init__(self) -> None:
+        files = sorted(
+            filename for filename in os.listdir(self.paths.qss_path)
+            if filename.endswith(".qss") and filename != self._main_file
+        )
+
+        stylesheets = []
+        for filename in (self._main_file, *files):
+            with open(os.path.join(self.paths.qss_path, filename), "r") as qss_file:
+                stylesheets.append(qss_file.read())
+        object.__setattr__(self, "_stylesheet", "\n".join(stylesheets))
+
+    @property
+    def stylesheet(self) -> str:
+        return self._stylesheet
@@ -19,3 +19,14 @@
 # ----------------------------------------------------------------------
 
 from tomoxrd.util.settings_util import check_float_setting, check_str_setting
+from tomoxrd.util.frame_util import (
+    read_frame,
+    read_tiff,
+    read_cbf,
+    read_esperanto,
+    write_tiff,
+    decode_byte_offset,
+    decode_agi_bitfield,
+    bin_frame,
+    log_scale,
+)
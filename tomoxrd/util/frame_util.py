@@ -0,0 +1,315 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import os
+import re
+import numpy as np
+from typing import Optional, Tuple
+
+# Start of the binary section of a CBF file
+_cbf_binary_marker: bytes = b"\x0c\x1a\x04\xd5"
+
+_tiff_types: dict = {
+    (1, 1): np.uint8, (1, 2): np.int8,
+    (2, 1): np.uint16, (2, 2): np.int16,
+    (4, 1): np.uint32, (4, 2): np.int32, (4, 3): np.float32,
+    (8, 3): np.float64,
+}
+
+
+def read_frame(path: str) -> np.ndarray:
+    """Reads a single TIFF, CBF or esperanto detector frame, the uncompressed data are memory-mapped."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".tif", ".tiff"):
+        return read_tiff(path)
+    if extension == ".cbf":
+        return read_cbf(path)
+    if extension == ".esperanto":
+        return read_esperanto(path)
+    raise ValueError(f"Unsupported frame format: {path}")
+
+
+def _tiff_tags(data: np.memmap) -> Tuple[str, dict]:
+    """Returns the byte order and the (tag: values) of the first image file directory of a TIFF file."""
+    byte_order = {b"II": "<", b"MM": ">"}.get(bytes(data[:2]))
+    if byte_order is None:
+        raise ValueError("Not a TIFF file.")
+
+    offset = int(data[4:8].view(f"{byte_order}u4")[0])
+    entries = int(data[offset:offset + 2].view(f"{byte_order}u2")[0])
+    sizes = {3: "u2", 4: "u4"}
+
+    tags = {}
+    for entry in range(entries):
+        start = offset + 2 + entry * 12
+        tag, value_type = data[start:start + 4].view(f"{byte_order}u2")
+        count = int(data[start + 4:start + 8].view(f"{byte_order}u4")[0])
+        if value_type not in sizes:
+            continue
+        value_size = 2 if value_type == 3 else 4
+        if count * value_size <= 4:
+            values = data[start + 8:start + 8 + count * value_size]
+        else:
+            values_offset = int(data[start + 8:start + 12].view(f"{byte_order}u4")[0])
+            values = data[values_offset:values_offset + count * value_size]
+        tags[int(tag)] = values.view(f"{byte_order}{sizes[value_type]}").astype(np.int64)
+    return byte_order, tags
+
+
+def read_tiff(path: str) -> np.ndarray:
+    """Reads an uncompressed single image TIFF file, as written by the areaDetector TIFF plugin."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    byte_order, tags = _tiff_tags(data)
+
+    cols, rows = int(tags[256][0]), int(tags[257][0])
+    bits = int(tags.get(258, [8])[0])
+    compression = int(tags.get(259, [1])[0])
+    sample_format = int(tags.get(339, [1])[0])
+    if compression != 1:
+        raise ValueError(f"Compressed TIFF files are not supported: {path}")
+
+    dtype = np.dtype(_tiff_types[(bits // 8, sample_format)]).newbyteorder(byte_order)
+    offsets, counts = tags[273], tags[279]
+    if np.all(offsets[1:] == offsets[:-1] + counts[:-1]):
+        # Contiguous strips are mapped as a single array
+        return np.ndarray((rows, cols), dtype=dtype, buffer=data, offset=int(offsets[0]))
+
+    strips = [data[offset:offset + count] for offset, count in zip(offsets, counts)]
+    return np.concatenate(strips).view(dtype).reshape(rows, cols)
+
+
+def _cbf_header(header: bytes) -> dict:
+    """Returns the (name: value) pairs of the binary section header of a CBF file."""
+    return dict(re.findall(rb"(X-Binary-[\w-]+|Content-Type):\s*([^\r\n;]+)", header))
+
+
+def read_cbf(path: str) -> np.ndarray:
+    """Reads a CBF file with byte offset compression, as written by the Pilatus detectors."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    marker = bytes(data[:65536]).find(_cbf_binary_marker)
+    if marker < 0:
+        raise ValueError(f"No binary section in {path}")
+
+    header = _cbf_header(bytes(data[:marker]))
+    cols = int(header[b"X-Binary-Size-Fastest-Dimension"])
+    rows = int(header[b"X-Binary-Size-Second-Dimension"])
+    size = int(header[b"X-Binary-Size"])
+
+    start = marker + len(_cbf_binary_marker)
+    if start + size > data.size:
+        raise ValueError(f"Incomplete CBF file: {path}")
+    return decode_byte_offset(data[start:start + size], rows * cols).reshape(rows, cols)
+
+
+def decode_byte_offset(data: np.ndarray, count: int) -> np.ndarray:
+    """
+    Decodes CBF byte offset compressed data. Every value is the difference from the previous one as
+    an int8, with escapes to int16 and int32 for the larger differences. The escapes are rare and
+    are the only values handled one by one.
+    """
+    raw = np.asarray(data, dtype=np.uint8)
+    differences = raw.view(np.int8).astype(np.int64)
+    escapes = np.flatnonzero(raw == 0x80)
+
+    if escapes.size:
+        keep = np.ones(raw.size, dtype=bool)
+        consumed = -1
+        for position in escapes:
+            if position < consumed:
+                continue
+            value = int.from_bytes(raw[position + 1:position + 3].tobytes(), "little", signed=True)
+            consumed = position + 3
+            if value == -0x8000:
+                value = int.from_bytes(raw[position + 3:position + 7].tobytes(), "little", signed=True)
+                consumed = position + 7
+                if value == -0x80000000:
+                    raise ValueError("64 bit byte offset values are not supported.")
+            differences[position] = value
+            keep[position + 1:consumed] = False
+        differences = differences[keep]
+
+    if differences.size < count:
+        raise ValueError(f"Expected {count} values, decoded {differences.size}.")
+    return np.cumsum(differences[:count]).astype(np.int32)
+
+
+def read_esperanto(path: str) -> np.ndarray:
+    """Reads a CrysAlis esperanto file, as written by cryio with AGI bitfield compression or uncompressed."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    description = re.match(rb"ESPERANTO FORMAT\s+\d+\s+CONSISTING OF\s+(\d+)\s+LINES OF\s+(\d+)", bytes(data[:256]))
+    if description is None:
+        raise ValueError(f"Not an esperanto file: {path}")
+
+    header_size = int(description.group(1)) * int(description.group(2))
+    image = re.search(rb"IMAGE\s+(\d+)\s+(\d+)\s+\d+\s+\d+\s+\"(\w+)\"", bytes(data[:header_size]))
+    if image is None:
+        raise ValueError(f"No image description in {path}")
+    cols, rows, data_type = int(image.group(1)), int(image.group(2)), image.group(3)
+
+    if data_type == b"4BYTE_LONG":
+        return np.ndarray((rows, cols), dtype="<i4", buffer=data, offset=header_size)
+    if data_type == b"AGI_BITFIELD":
+        return decode_agi_bitfield(data[header_size:], rows, cols)
+    raise ValueError(f"Unsupported esperanto data type {data_type.decode()}: {path}")
+
+
+def _agi_value(raw: bytes, position: int, code: int, bits: int) -> tuple:
+    """Returns the difference of a packed field and the next position, the overflows are read from the raw data."""
+    if bits == 0:
+        return 0, position
+    if bits == 8 and code == 0xfe:
+        return int.from_bytes(raw[position:position + 2], "little", signed=True), position + 2
+    if bits == 8 and code == 0xff:
+        return int.from_bytes(raw[position:position + 4], "little", signed=True), position + 4
+    return code - (1 << (bits - 1)) + 1, position
+
+
+def _agi_overflow_size(raw: bytes, start: int, bits: int) -> int:
+    """Returns the size of the overflow table of a packed field, only the 8 bit fields have overflows."""
+    if bits != 8:
+        return 0
+    return 2 * raw.count(b"\xfe", start, start + 8) + 4 * raw.count(b"\xff", start, start + 8)
+
+
+def _agi_blocks(data: np.ndarray, headers: np.ndarray) -> np.ndarray:
+    """Decodes the 16 differences of every block from the position of its sizes byte."""
+    sizes = data[headers].astype(np.int64)
+    bits = np.stack((sizes & 0x0f, sizes >> 4), axis=1)
+    if bits.max(initial=0) > 8:
+        raise ValueError("Invalid AGI bitfield field size.")
+    field_starts = headers[:, None] + 1 + np.stack((np.zeros_like(sizes), bits[:, 0]), axis=1)
+    index = np.arange(8)
+
+    # Little-endian fields of up to 8 bytes, the bytes after the field are masked
+    offsets = np.minimum(field_starts[..., None] + index, data.size - 1)
+    field_bytes = np.where(index < bits[..., None], data[offsets], 0).astype(np.uint64)
+    fields = (field_bytes << (8 * index).astype(np.uint64)).sum(axis=-1, dtype=np.uint64)
+
+    masks = (np.left_shift(1, bits) - 1).astype(np.uint64)
+    codes = (fields[..., None] >> (bits[..., None] * index).astype(np.uint64)) & masks[..., None]
+    codes = codes.astype(np.int64)
+    # Fields of 0 bits are all zero differences
+    bias = np.where(bits > 0, np.left_shift(1, np.maximum(bits, 1) - 1) - 1, 0)
+    values = codes - bias[..., None]
+
+    # The overflow tables follow the fields, the values of the first field before the ones of the second
+    overflow = (bits[..., None] == 8) & (codes >= 0xfe)
+    if overflow.any():
+        overflow_sizes = np.where(overflow, np.where(codes == 0xfe, 2, 4), 0).reshape(-1, 16)
+        table_starts = field_starts[:, 1] + bits[:, 1]
+        positions = (table_starts[:, None] + np.cumsum(overflow_sizes, axis=1) - overflow_sizes).reshape(values.shape)
+        positions = positions[overflow]
+        table_bytes = data[np.minimum(positions[:, None] + np.arange(4), data.size - 1)].astype(np.uint32)
+        short = (table_bytes[:, 0] | table_bytes[:, 1] << 8).astype(np.uint16).view(np.int16)
+        long = (
+            table_bytes[:, 0] | table_bytes[:, 1] << 8 | table_bytes[:, 2] << 16 | table_bytes[:, 3] << 24
+        ).view(np.int32)
+        values[overflow] = np.where(codes[overflow] == 0xfe, short, long)
+
+    return values.reshape(-1, 16)
+
+
+def decode_agi_bitfield(data: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """
+    Decodes AGI bitfield compressed data. Every row starts with its first value, followed by blocks of
+    16 differences packed in two fields of 8 values with the bit size given by a leading byte. The
+    differences that don't fit in 8 bits follow the fields as 16 or 32 bit values. The last 15 values
+    of a row are single byte differences. Only the block positions are found value by value, the
+    blocks are decoded at once.
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    raw = data.tobytes()
+    position = 4
+    block_columns = range(1, cols - 16, 16)
+    headers = np.empty(rows * len(block_columns), dtype=np.int64)
+    differences = np.zeros((rows, cols), dtype=np.int64)
+    block = 0
+
+    for row in range(rows):
+        differences[row, 0], position = _agi_value(raw, position + 1, raw[position], 8)
+
+        for _ in block_columns:
+            headers[block] = position
+            block += 1
+            sizes = raw[position]
+            first_bits, second_bits = sizes & 0x0f, sizes >> 4
+            first_start = position + 1
+            second_start = first_start + first_bits
+            position = second_start + second_bits
+            position += _agi_overflow_size(raw, first_start, first_bits)
+            position += _agi_overflow_size(raw, second_start, second_bits)
+
+        tail = differences[row]
+        for column in range(cols - 15, cols):
+            tail[column], position = _agi_value(raw, position + 1, raw[position], 8)
+
+    # The tail columns overlap the last block, their differences are the same
+    blocks = _agi_blocks(data, headers).reshape(rows, -1)
+    tail_start = max(cols - 15, 1)
+    tail = differences[:, tail_start:].copy()
+    differences[:, 1:1 + blocks.shape[1]] = blocks
+    differences[:, tail_start:] = tail
+
+    return np.cumsum(differences, axis=1).astype(np.int32)
+
+
+def bin_frame(frame: np.ndarray, factor: int) -> np.ndarray:
+    """Sums blocks of factor x factor pixels, the edge pixels that do not fill a block are dropped."""
+    if factor <= 1:
+        return np.asarray(frame, dtype=np.float32)
+    rows, cols = frame.shape[0] // factor * factor, frame.shape[1] // factor * factor
+    blocks = np.asarray(frame[:rows, :cols], dtype=np.float32).reshape(rows // factor, factor, cols // factor, factor)
+    return blocks.sum(axis=(1, 3))
+
+
+def log_scale(frame: np.ndarray, percentile: Optional[float] = 99.9) -> np.ndarray:
+    """Scales a frame logarithmically to 8 bits, clipping the masked (negative) pixels and the hottest pixels."""
+    frame = np.log1p(np.clip(frame, 0, None, dtype=np.float32))
+    high = float(np.percentile(frame, percentile))
+    if high <= 0:
+        return np.zeros(frame.shape, dtype=np.uint8)
+    return (np.clip(frame / high, 0, 1) * 255).astype(np.uint8)
+
+
+def write_tiff(path: str, frame: np.ndarray) -> None:
+    """Writes a frame as an uncompressed single strip little-endian TIFF file."""
+    frame = np.ascontiguousarray(frame)
+    types = {value: key for key, value in _tiff_types.items()}
+    if frame.dtype.type not in types:
+        raise ValueError(f"Unsupported TIFF data type: {frame.dtype}")
+    size, sample_format = types[frame.dtype.type]
+    frame = frame.astype(frame.dtype.newbyteorder("<"), copy=False)
+
+    rows, cols = frame.shape
+    data = frame.tobytes()
+    # (tag, type, value), type 3 is a short and type 4 a long
+    entries = [
+        (256, 4, cols), (257, 4, rows), (258, 3, size * 8), (259, 3, 1), (262, 3, 1),
+        (273, 4, 8), (277, 3, 1), (278, 4, rows), (279, 4, len(data)), (339, 3, sample_format),
+    ]
+
+    with open(path, "wb") as tiff_file:
+        tiff_file.write(b"II" + (42).to_bytes(2, "little") + (8 + len(data)).to_bytes(4, "little"))
+        tiff_file.write(data)
+        tiff_file.write(len(entries).to_bytes(2, "little"))
+        for tag, value_type, value in entries:
+            tiff_file.write(tag.to_bytes(2, "little") + value_type.to_bytes(2, "little") + (1).to_bytes(4, "little"))
+            tiff_file.write(value.to_bytes(2 if value_type == 3 else 4, "little").ljust(4, b"\x00"))
+        tiff_file.write((0).to_bytes(4, "little"))
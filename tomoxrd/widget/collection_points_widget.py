@@ -18,12 +18,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-import os
 from qtpy.QtCore import QSize, Qt
 from qtpy.QtWidgets import QGroupBox, QGridLayout
 
 from tomoxrd.model import PathModel
-from tomoxrd.widget.custom import AbstractFlatButton, AbstractTableWidget
+from tomoxrd.widget.custom import AbstractFlatButton, AbstractTableView, CoordinateDelegate, CheckBoxDelegate
 
 
 class CollectionPointsWidget(QGroupBox):
@@ -51,34 +50,24 @@ class CollectionPointsWidget(QGroupBox):
         )
 
         # Tables
-        self.table_points = AbstractTableWidget(
-            columns=5,
-            horizontal_headers=["Name", "X", "Y", "Z", "Enabled"],
-            column_stretch=0,
-            object_name="table-points",
-        )
+        self.table_points = AbstractTableView(column_stretch=0, object_name="table-points")
+
+        # Delegates, the editors are created only while a cell is edited
+        self._coordinate_delegate = CoordinateDelegate(self.table_points)
+        self._checkbox_delegate = CheckBoxDelegate(self.table_points)
 
         self._configure_collection_points_groupbox()
-        self._connect_collection_points_widgets()
         self._layout_collection_points()
 
     def _configure_collection_points_groupbox(self) -> None:
         """Base configuration of the collection points widgets."""
-        # Load groupbox qss file
-        self.setStyleSheet(
-            open(
-                os.path.join(self._paths.qss_path, "collection_points.qss"), "r"
-            ).read()
-        )
-
         # Set groupbox title
         self.setTitle(self._title)
 
-    def _connect_collection_points_widgets(self) -> None:
-        """Connects the collection points widget events."""
-        self.btn_delete.clicked.connect(self.table_points.delete_point)
-        self.btn_clear.clicked.connect(self.table_points.clear_points)
-        self.btn_check_all.clicked.connect(self.table_points.check_all_points)
+        # Set the x, y, z and enabled delegates
+        for column in (1, 2, 3):
+            self.table_points.setItemDelegateForColumn(column, self._coordinate_delegate)
+        self.table_points.setItemDelegateForColumn(4, self._checkbox_delegate)
 
     def _layout_collection_points(self) -> None:
         layout_points = QGridLayout()
@@ -18,9 +18,8 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-import os
 from qtpy.QtCore import QSize, Qt
-from qtpy.QtWidgets import QGroupBox, QGridLayout
+from qtpy.QtWidgets import QGroupBox, QGridLayout, QCheckBox
 
 from tomoxrd.model import PathModel
 from tomoxrd.widget.custom import AbstractComboBox, AbstractLabel, NoWheelNumberSpinBox
@@ -42,9 +41,14 @@ class CollectionSettingsWidget(QGroupBox):
         self._lbl_omega_range_start = AbstractLabel("Ω Range Start")
         self._lbl_omega_range_end = AbstractLabel("Ω Range End")
         self._lbl_step_size = AbstractLabel("Step Size (°)")
-        self._lbl_map_options = AbstractLabel(
-            "Map Options (under construction)", object_name="lbl-map"
-        )
+        self._lbl_map_options = AbstractLabel("Map Options", object_name="lbl-map")
+        self._lbl_map_start = AbstractLabel("Start")
+        self._lbl_map_stop = AbstractLabel("Stop")
+        self._lbl_map_step = AbstractLabel("Step")
+        self._lbl_map_x = AbstractLabel("Horizontal")
+        self._lbl_map_y = AbstractLabel("Vertical")
+        self._lbl_map_z = AbstractLabel("Focus")
+        self.lbl_map_pixels = AbstractLabel("0 Pixels")
 
         # Combo box
         self.combo_collection_type = AbstractComboBox(
@@ -89,48 +93,77 @@ class CollectionSettingsWidget(QGroupBox):
             object_name="spinbox-collection",
         )
 
+        # Map spin boxes, per axis (start, stop, step)
+        self.spin_map_x = self._create_map_spinboxes()
+        self.spin_map_y = self._create_map_spinboxes()
+        self.spin_map_z = self._create_map_spinboxes()
+
+        # Check boxes
+        self.check_burst = QCheckBox("Burst")
+        self.check_map_snake = QCheckBox("Snake")
+        self.check_map_z = QCheckBox("Focus Layers")
+
         self._configure_collection_settings_groupbox()
         self._layout_collection_settings()
 
-    def _configure_collection_settings_groupbox(self) -> None:
-        """Base configuration of the collection settings widgets."""
-        # Load groupbox qss file
-        self.setStyleSheet(
-            open(
-                os.path.join(self._paths.qss_path, "collection_settings.qss"), "r"
-            ).read()
+    @staticmethod
+    def _create_map_spinboxes() -> tuple:
+        """Creates the start, stop and step spin boxes of a map axis."""
+        return tuple(
+            NoWheelNumberSpinBox(
+                min_value=min_value,
+                max_value=100.0,
+                default_value=default_value,
+                single_step=0.01,
+                precision=4,
+                size=QSize(95, 22),
+                object_name="spinbox-collection",
+            )
+            for min_value, default_value in ((-100.0, 0.0), (-100.0, 0.1), (0.0, 0.01))
         )
 
+    def _configure_collection_settings_groupbox(self) -> None:
+        """Base configuration of the collection settings widgets."""
         # Set groupbox title
         self.setTitle(self._title)
 
+        # Burst collects all the still points in a single detector series
+        self.check_burst.setToolTip("Collect all the still points with the detector armed once.")
+        self.check_burst.setEnabled(False)
+
+        # Snake order by default, 2D maps unless focus layers are selected
+        self.check_map_snake.setChecked(True)
+        self.check_map_z.setChecked(False)
+        self.check_map_z.stateChanged.connect(self._toggle_widget_status)
+
         # Add collection types
-        self.combo_collection_type.addItems(["Still", "Step", "Wide"])
+        self.combo_collection_type.addItems(["Still", "Step", "Wide", "Map"])
         self.combo_collection_type.currentIndexChanged.connect(self._toggle_widget_status)
         self.combo_collection_type.setCurrentIndex(1)
 
     def _toggle_widget_status(self) -> None:
-        if self.combo_collection_type.currentText() == "Still":
-            self._lbl_step_size.setEnabled(False)
-            self._lbl_omega_range_start.setEnabled(False)
-            self._lbl_omega_range_end.setEnabled(False)
-            self.spin_step_size.setEnabled(False)
-            self.spin_omega_range_start.setEnabled(False)
-            self.spin_omega_range_end.setEnabled(False)
-        elif self.combo_collection_type.currentText() == "Step":
-            self._lbl_step_size.setEnabled(True)
-            self._lbl_omega_range_start.setEnabled(True)
-            self._lbl_omega_range_end.setEnabled(True)
-            self.spin_step_size.setEnabled(True)
-            self.spin_omega_range_start.setEnabled(True)
-            self.spin_omega_range_end.setEnabled(True)
-        else:
-            self._lbl_step_size.setEnabled(False)
-            self._lbl_omega_range_start.setEnabled(True)
-            self._lbl_omega_range_end.setEnabled(True)
-            self.spin_step_size.setEnabled(False)
-            self.spin_omega_range_start.setEnabled(True)
-            self.spin_omega_range_end.setEnabled(True)
+        collection_type = self.combo_collection_type.currentText()
+        omega_range = collection_type in ("Step", "Wide")
+        map_scan = collection_type == "Map"
+
+        self._lbl_step_size.setEnabled(collection_type == "Step")
+        self.spin_step_size.setEnabled(collection_type == "Step")
+        self._lbl_omega_range_start.setEnabled(omega_range)
+        self._lbl_omega_range_end.setEnabled(omega_range)
+        self.spin_omega_range_start.setEnabled(omega_range)
+        self.spin_omega_range_end.setEnabled(omega_range)
+        self.check_burst.setEnabled(collection_type == "Still")
+
+        for widget in (
+            self._lbl_map_start, self._lbl_map_stop, self._lbl_map_step, self._lbl_map_x, self._lbl_map_y,
+            self.lbl_map_pixels, self.check_map_snake, self.check_map_z, *self.spin_map_x, *self.spin_map_y,
+        ):
+            widget.setEnabled(map_scan)
+
+        focus_layers = map_scan and self.check_map_z.isChecked()
+        self._lbl_map_z.setEnabled(focus_layers)
+        for spinbox in self.spin_map_z:
+            spinbox.setEnabled(focus_layers)
 
     def _layout_collection_settings(self) -> None:
         """Layout collection settings widgets."""
@@ -139,6 +172,7 @@ class CollectionSettingsWidget(QGroupBox):
             self._lbl_collection_type, 0, 3, 1, 1, alignment=Qt.AlignmentFlag.AlignRight
         )
         layout_collection.addWidget(self.combo_collection_type, 0, 4, 1, 1)
+        layout_collection.addWidget(self.check_burst, 0, 2, 1, 1)
         layout_collection.addWidget(
             self._lbl_omega_range_start,
             1,
@@ -163,6 +197,21 @@ class CollectionSettingsWidget(QGroupBox):
         layout_collection.addWidget(
             self._lbl_map_options, 4, 1, 1, 4, alignment=Qt.AlignmentFlag.AlignCenter
         )
+        layout_collection.addWidget(self._lbl_map_start, 5, 2, 1, 1, alignment=Qt.AlignmentFlag.AlignCenter)
+        layout_collection.addWidget(self._lbl_map_stop, 5, 3, 1, 1, alignment=Qt.AlignmentFlag.AlignCenter)
+        layout_collection.addWidget(self._lbl_map_step, 5, 4, 1, 1, alignment=Qt.AlignmentFlag.AlignCenter)
+        map_axes = (
+            (self._lbl_map_x, self.spin_map_x),
+            (self._lbl_map_y, self.spin_map_y),
+            (self._lbl_map_z, self.spin_map_z),
+        )
+        for row, (label, spinboxes) in enumerate(map_axes, start=6):
+            layout_collection.addWidget(label, row, 1, 1, 1, alignment=Qt.AlignmentFlag.AlignRight)
+            for column, spinbox in enumerate(spinboxes, start=2):
+                layout_collection.addWidget(spinbox, row, column, 1, 1)
+        layout_collection.addWidget(self.check_map_snake, 9, 2, 1, 1)
+        layout_collection.addWidget(self.check_map_z, 9, 3, 1, 1)
+        layout_collection.addWidget(self.lbl_map_pixels, 9, 4, 1, 1, alignment=Qt.AlignmentFlag.AlignRight)
 
         layout_collection.setColumnStretch(0, 1)
         layout_collection.setColumnStretch(5, 1)
@@ -18,7 +18,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-import os
 import datetime
 from qtpy.QtCore import QSize, Qt
 from qtpy.QtWidgets import QWidget, QGridLayout
@@ -55,7 +54,6 @@ class CollectionStatusWidget(QWidget):
             "Prepare for XRD", size=QSize(135, 30), object_name="btn-status"
         )
 
-        self._configure_collection_status_widgets()
         self._layout_collection_status()
 
     def update_estimated_time_widget(self, seconds: float) -> None:
@@ -63,133 +61,53 @@ class CollectionStatusWidget(QWidget):
         time_delta = time_delta - datetime.timedelta(microseconds=time_delta.microseconds)
         self.lbl_estimated_time.setText(str(time_delta))
 
+    def update_estimated_time_phases(self, phases: dict) -> None:
+        """Shows the time of every simulated collection phase as the estimated time tooltip."""
+        lines = []
+        for name, seconds in phases.items():
+            # The learned calibration can be negative when the simulator overestimates
+            sign = "-" if seconds < 0 else ""
+            time_delta = datetime.timedelta(seconds=round(abs(seconds)))
+            lines.append(f"{name.capitalize()}: {sign}{time_delta}")
+        self.lbl_estimated_time.setToolTip("\n".join(lines))
+
     def update_elapsed_time_widget(self, seconds: float) -> None:
         time_delta = datetime.timedelta(seconds=seconds)
         time_delta = time_delta - datetime.timedelta(microseconds=time_delta.microseconds)
         self.lbl_elapsed_time.setText(str(time_delta))
 
+    def update_frame_rate(self, frames_per_second: float, remaining: float) -> None:
+        """Shows the frame rate and the expected finish time as the frames tooltip."""
+        if frames_per_second <= 0:
+            self.lbl_frames.setToolTip("")
+            return None
+        finish_time = datetime.datetime.now() + datetime.timedelta(seconds=remaining)
+        self.lbl_frames.setToolTip(f"{frames_per_second:.1f} frames/s\nFinishes at {finish_time:%H:%M:%S}")
+
     def toggle_tomo_abort_button(self, state: bool) -> None:
         """Toggles the style to account for prepare for tomo and abort."""
-        if not state:
-            self.btn_prepare_for_tomo.setText("Prepare for Tomo")
-            self.btn_prepare_for_tomo.setStyleSheet(
-                """
-                QPushButton {
-                    background: #9dedca;
-                    border: 2px solid #9dedca;
-                    color: #323336;
-                    font-size: 16px;
-                    padding: 1px 5px;
-                }
-                QPushButton:hover, QPushButton:focus, QPushButton:pressed {
-                    background-color: #71ab91;
-                    border-color: #71ab91;
-                }
-                """
-            )
-        else:
-            self.btn_prepare_for_tomo.setText("Abort")
-            self.btn_prepare_for_tomo.setStyleSheet(
-                """
-                QPushButton {
-                    background: #99232f;
-                    border: 2px solid #99232f;
-                    color: #d5dde3;
-                    font-size: 16px;
-                    padding: 1px 5px;
-                }
-                QPushButton:hover, QPushButton:focus, QPushButton:pressed {
-                    background-color: #731e26;
-                    border-color: #731e26;
-                }
-                """
-            )
+        self.btn_prepare_for_tomo.setText("Abort" if state else "Prepare for Tomo")
+        self.btn_prepare_for_tomo.set_state("abort", state)
 
     def toggle_xrd_abort_button(self, state: bool) -> None:
-        """Toggles the style to account for prepare for tomo and abort."""
-        if not state:
-            self.btn_prepare_for_xrd.setText("Prepare for XRD")
-            self.btn_prepare_for_xrd.setStyleSheet(
-                """
-                QPushButton {
-                    background: #9dedca;
-                    border: 2px solid #9dedca;
-                    color: #323336;
-                    font-size: 16px;
-                    padding: 1px 5px;
-                }
-                QPushButton:hover, QPushButton:focus, QPushButton:pressed {
-                    background-color: #71ab91;
-                    border-color: #71ab91;
-                }
-                """
-            )
-        else:
-            self.btn_prepare_for_xrd.setText("Abort")
-            self.btn_prepare_for_xrd.setStyleSheet(
-                """
-                QPushButton {
-                    background: #99232f;
-                    border: 2px solid #99232f;
-                    color: #d5dde3;
-                    font-size: 16px;
-                    padding: 1px 5px;
-                }
-                QPushButton:hover, QPushButton:focus, QPushButton:pressed {
-                    background-color: #731e26;
-                    border-color: #731e26;
-                }
-                """
-            )
+        """Toggles the style to account for prepare for XRD and abort."""
+        self.btn_prepare_for_xrd.setText("Abort" if state else "Prepare for XRD")
+        self.btn_prepare_for_xrd.set_state("abort", state)
 
     def toggle_collect_abort_button(self, state: bool) -> None:
         """Toggles the style to account for collect and abort."""
-        if not state:
-            self.btn_collect_abort.setText("Collect")
-            self.btn_collect_abort.setStyleSheet(
-                """
-                QPushButton {
-                    background: #9dedca;
-                    border: 2px solid #9dedca;
-                    color: #323336;
-                    font-size: 16px;
-                    padding: 1px 5px;
-                }
-                QPushButton:hover, QPushButton:focus, QPushButton:pressed {
-                    background-color: #71ab91;
-                    border-color: #71ab91;
-                }
-                """
-            )
-        else:
-            self.btn_collect_abort.setText("Abort")
-            self.btn_collect_abort.setStyleSheet(
-                """
-                QPushButton {
-                    background: #99232f;
-                    border: 2px solid #99232f;
-                    color: #d5dde3;
-                    font-size: 16px;
-                    padding: 1px 5px;
-                }
-                QPushButton:hover, QPushButton:focus, QPushButton:pressed {
-                    background-color: #731e26;
-                    border-color: #731e26;
-                }
-                """
-            )
-
-    def _configure_collection_status_widgets(self) -> None:
-        # Load the qss file
-        self.setStyleSheet(
-            open(
-                os.path.join(self._paths.qss_path, "collection_status.qss"), "r"
-            ).read()
-        )
+        self.btn_collect_abort.setText("Abort" if state else "Collect")
+        self.btn_collect_abort.set_state("abort", state)
 
     def update_status_message(self, message: str) -> None:
         self.lbl_status.setText(message)
 
+    def set_connecting(self, state: bool) -> None:
+        """Disables the buttons that need the hardware while it is connecting."""
+        self.btn_collect_abort.setEnabled(not state)
+        self.btn_prepare_for_tomo.setEnabled(not state)
+        self.btn_prepare_for_xrd.setEnabled(not state)
+
     def _layout_collection_status(self) -> None:
         """Layout collection status widgets."""
         layout_status = QGridLayout()
@@ -66,6 +66,14 @@ class AbstractFlatButton(QPushButton):
         """Clears the focus state of the button."""
         self.clearFocus()
 
+    def set_state(self, name: str, value: bool) -> None:
+        """Sets a dynamic property used by the stylesheet selectors and repolishes only this button."""
+        if self.property(name) == value:
+            return None
+        self.setProperty(name, value)
+        self.style().unpolish(self)
+        self.style().polish(self)
+
 
 class FileBrowserButton(AbstractFlatButton, QObject):
     """
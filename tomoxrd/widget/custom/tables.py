@@ -18,78 +18,52 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-from qtpy.QtCore import Qt, QObject, Signal
+from qtpy.QtCore import Qt, QAbstractItemModel, QEvent, QModelIndex, QRect
+from qtpy.QtGui import QDoubleValidator
 from qtpy.QtWidgets import (
     QWidget,
-    QTableWidget,
+    QTableView,
     QAbstractItemView,
+    QApplication,
     QHeaderView,
-    QTableWidgetItem,
-    QCheckBox,
-    QHBoxLayout,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QStyleOptionViewItem,
 )
-from typing import Optional, List
+from typing import Optional
 
-from tomoxrd.widget.custom import AbstractLabel, AbstractInputBox
+from tomoxrd.widget.custom import AbstractInputBox
 
 
-class AbstractTableWidget(QTableWidget, QObject):
+class AbstractTableView(QTableView):
     """
-    Used to create instances of simple table widgets, with a specified number of columns.
+    Used to create instances of simple table views, the columns and headers are given by the model.
     """
-    enabled_checkboxes_changed: Signal = Signal()
-
-    enabled_checkboxes: List[QCheckBox] = []
-    _row_counter: int = 0
 
     def __init__(
         self,
-        columns: Optional[int] = None,
-        rows: Optional[int] = None,
-        horizontal_headers: Optional[list] = None,
+        show_headers: Optional[bool] = True,
         column_stretch: Optional[int] = None,
         object_name: Optional[str] = "abstract-table",
     ) -> None:
-        super(AbstractTableWidget, self).__init__()
+        super(AbstractTableView, self).__init__()
 
-        self._columns = columns
-        self._rows = rows
-        self._horizontal_headers = horizontal_headers
+        self._show_headers = show_headers
         self._column_stretch = column_stretch
         self._object_name = object_name
 
         self._configure_abstract_table()
 
     def _configure_abstract_table(self) -> None:
-        """Sets the basic configuration values for the abstract table widget."""
-        # Set columns
-        if self._columns is not None:
-            if self._columns >= 1:
-                self.setColumnCount(self._columns)
-
-        # Set rows
-        if self._rows is not None:
-            if self._rows >= 1:
-                self.setRowCount(self._rows)
-
+        """Sets the basic configuration values for the abstract table view."""
         # Set horizontal headers
-        if self._horizontal_headers is None:
-            self.horizontalHeader().setVisible(False)
-        else:
-            self.horizontalHeader().setVisible(True)
-            self.setHorizontalHeaderLabels(self._horizontal_headers)
+        self.horizontalHeader().setVisible(self._show_headers)
 
         # Set object name
         if self._object_name is not None:
             self.setObjectName(self._object_name)
 
-        # Set column stretch
-        if self._column_stretch is not None:
-            if 0 <= self._column_stretch <= self._columns - 1:
-                self.horizontalHeader().setSectionResizeMode(
-                    self._column_stretch, QHeaderView.Stretch
-                )
-
         # Hide vertical header
         self.verticalHeader().setVisible(False)
 
@@ -106,84 +80,80 @@ class AbstractTableWidget(QTableWidget, QObject):
         self.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.setSelectionMode(QAbstractItemView.SingleSelection)
 
-    def _check_for_available_name(self) -> None:
-        self._row_counter = 0
-        for row in range(self.rowCount() - 1):
+        # Edit on double click or typing, editors are only created for the edited cell
+        self.setEditTriggers(
+            QAbstractItemView.DoubleClicked | QAbstractItemView.SelectedClicked | QAbstractItemView.EditKeyPressed
+        )
 
-            self._row_counter += 1
+    def setModel(self, model: QAbstractItemModel) -> None:
+        super(AbstractTableView, self).setModel(model)
 
-            if not f"pos{self._row_counter}" == self.item(row, 0).text():
-                return None
-
-    def _checkbox_state_changed(self, state: bool) -> None:
-        self.enabled_checkboxes_changed.emit()
-
-    def add_point(
-        self,
-        x_value: Optional[float] = None,
-        y_value: Optional[float] = None,
-        z_value: Optional[float] = None,
-    ) -> None:
+        # Set column stretch, the sections exist only after the model is set
+        if self._column_stretch is not None:
+            if 0 <= self._column_stretch <= model.columnCount() - 1:
+                self.horizontalHeader().setSectionResizeMode(self._column_stretch, QHeaderView.Stretch)
+
+    def current_row(self) -> int:
+        """Returns the selected row, or -1 if no row is selected."""
+        return self.currentIndex().row()
+
+
+class CoordinateDelegate(QStyledItemDelegate):
+    """Edits a position with a line edit that accepts numbers or an empty value."""
+
+    def createEditor(self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> QWidget:
+        editor = AbstractInputBox(object_name="table-input")
+        editor.setParent(parent)
+        validator = QDoubleValidator(editor)
+        validator.setNotation(QDoubleValidator.StandardNotation)
+        editor.setValidator(validator)
+        return editor
+
+    def setEditorData(self, editor: AbstractInputBox, index: QModelIndex) -> None:
+        editor.setText(index.data(Qt.EditRole) or "")
+
+    def setModelData(self, editor: AbstractInputBox, model: QAbstractItemModel, index: QModelIndex) -> None:
+        model.setData(index, editor.text(), Qt.EditRole)
+
+
+class CheckBoxDelegate(QStyledItemDelegate):
+    """Paints a centered checkbox for checkable cells and toggles it on click."""
+
+    def _checkbox_rect(self, option: QStyleOptionViewItem) -> QRect:
+        style = QApplication.style()
+        size = style.subElementRect(QStyle.SE_CheckBoxIndicator, QStyleOptionButton(), None).size()
+        rect = QRect(option.rect.topLeft(), size)
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        # Paint the background and selection without the default checkbox
+        background = QStyleOptionViewItem(option)
+        self.initStyleOption(background, index)
+        background.features &= ~QStyleOptionViewItem.HasCheckIndicator
+        QApplication.style().drawControl(QStyle.CE_ItemViewItem, background, painter, option.widget)
+
+        checkbox = QStyleOptionButton()
+        checkbox.rect = self._checkbox_rect(option)
+        checkbox.state = QStyle.State_On if index.data(Qt.CheckStateRole) == Qt.Checked else QStyle.State_Off
+        if option.state & QStyle.State_Enabled:
+            checkbox.state |= QStyle.State_Enabled
+        QApplication.style().drawControl(QStyle.CE_CheckBox, checkbox, painter)
+
+    def editorEvent(self, event: QEvent, model: QAbstractItemModel, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        if not index.flags() & Qt.ItemIsUserCheckable or not index.flags() & Qt.ItemIsEnabled:
+            return False
+
+        if event.type() == QEvent.MouseButtonRelease:
+            if event.button() != Qt.LeftButton or not self._checkbox_rect(option).contains(event.pos()):
+                return False
+        elif event.type() == QEvent.MouseButtonDblClick:
+            return self._checkbox_rect(option).contains(event.pos())
+        elif event.type() == QEvent.KeyPress:
+            if event.key() not in (Qt.Key_Space, Qt.Key_Select):
+                return False
+        else:
+            return False
 
-        row = self.rowCount()
-        self.setRowCount(row + 1)
-
-        # Name
-        self._row_counter = row + 1
-        dynamic_created_name = f"pos{self._row_counter}"
-
-        if row > 0:
-            # Check if name exists
-            for existing_row in range(row):
-                if dynamic_created_name == self.item(existing_row, 0).text():
-                    temp_counter = self._row_counter
-                    self._check_for_available_name()
-                    dynamic_created_name = f"pos{self._row_counter}"
-                    self._row_counter = temp_counter
-
-        name = QTableWidgetItem(dynamic_created_name)
-        name.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setItem(row, 0, name)
-
-        # x value
-        if x_value is not None:
-            x = AbstractInputBox(object_name="table-input")
-            x.setText(str(x_value))
-            self.setCellWidget(row, 1, x)
-
-        # y value
-        if y_value is not None:
-            y = AbstractInputBox(object_name="table-input")
-            y.setText(str(y_value))
-            self.setCellWidget(row, 2, y)
-
-        # z value
-        if z_value is not None:
-            z = AbstractInputBox(object_name="table-input")
-            z.setText(str(z_value))
-            self.setCellWidget(row, 3, z)
-
-        # Enabled
-        checkbox = QCheckBox()
-        checkbox.setChecked(True)
-        checkbox.setObjectName("table-checkbox")
-        self.setCellWidget(row, 4, checkbox)
-        self.enabled_checkboxes.append(checkbox)
-        checkbox.stateChanged.connect(self._checkbox_state_changed)
-
-    def delete_point(self) -> None:
-        index = self.currentRow()
-        if index >= 0:
-            self.removeRow(index)
-            del self.enabled_checkboxes[index]
-
-    def clear_points(self) -> None:
-        for row in range(self.rowCount()):
-            self.removeRow(row)
-
-        self.setRowCount(0)
-        self.enabled_checkboxes.clear()
-
-    def check_all_points(self) -> None:
-        for checkbox in self.enabled_checkboxes:
-            checkbox.setChecked(True)
+        state = Qt.Unchecked if index.data(Qt.CheckStateRole) == Qt.Checked else Qt.Checked
+        return model.setData(index, state, Qt.CheckStateRole)
@@ -18,7 +18,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-import os
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QGroupBox, QGridLayout
 
@@ -93,13 +92,6 @@ class DetectorSettingsWidget(QGroupBox):
 
     def _configure_detector_settings_groupbox(self) -> None:
         """Base configuration of the detector settings widgets."""
-        # Load groupbox qss file
-        self.setStyleSheet(
-            open(
-                os.path.join(self._paths.qss_path, "detector_settings.qss"), "r"
-            ).read()
-        )
-
         # Set groupbox title
         self.setTitle(self._title)
 
@@ -18,7 +18,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ----------------------------------------------------------------------
 
-import os
 from qtpy.QtCore import QSize, Qt
 from qtpy.QtWidgets import QGroupBox, QGridLayout, QCheckBox
 
@@ -78,6 +77,9 @@ class FilenameSettingsWidget(QGroupBox):
         # Check boxes
         self.check_chrysalis = QCheckBox("Use CrysAlis")
         self.check_auto_reset_frames = QCheckBox("Auto Reset Frame #")
+        self.check_nexus = QCheckBox("Save NeXus File")
+        self.check_software_merge = QCheckBox("Merge Frames in Software")
+        self.check_archive = QCheckBox("Archive CBF Files")
 
         # Event filters
         self._filename_filter = EventFilterModel(as_filepath=False)
@@ -88,13 +90,6 @@ class FilenameSettingsWidget(QGroupBox):
 
     def _configure_filename_settings_groupbox(self) -> None:
         """Base configuration of the filename settings widgets."""
-        # Load groupbox qss file
-        self.setStyleSheet(
-            open(
-                os.path.join(self._paths.qss_path, "filename_settings.qss"), "r"
-            ).read()
-        )
-
         # Set groupbox title
         self.setTitle(self._title)
 
@@ -104,6 +99,12 @@ class FilenameSettingsWidget(QGroupBox):
         # Set checkboxes check status
         self.check_auto_reset_frames.setChecked(True)
         self.check_chrysalis.setChecked(True)
+        self.check_nexus.setChecked(False)
+        self.check_nexus.setToolTip("Also save the frames of every step and wide point to a single .nxs file.")
+        self.check_software_merge.setChecked(False)
+        self.check_software_merge.setToolTip("Sum the .cbf frames in software instead of the Proc1 recursive filter.")
+        self.check_archive.setChecked(False)
+        self.check_archive.setToolTip("Pack the .cbf files to one compressed archive after the CrysAlis conversion.")
 
         # Add event filters
         self.ipt_filename.installEventFilter(self._filename_filter)
@@ -131,7 +132,10 @@ class FilenameSettingsWidget(QGroupBox):
         layout.addWidget(self.btn_reset, 2, 2, 1, 2)
         layout.addWidget(self.check_auto_reset_frames, 3, 0, 1, 3)
         layout.addWidget(self.check_chrysalis, 4, 0, 1, 3)
-        layout.addWidget(self.flb_calibration, 5, 0, 1, 4)
-        layout.addWidget(self.lbl_calibration_path, 6, 0, 1, 4)
+        layout.addWidget(self.check_nexus, 5, 0, 1, 3)
+        layout.addWidget(self.check_software_merge, 6, 0, 1, 3)
+        layout.addWidget(self.check_archive, 7, 0, 1, 3)
+        layout.addWidget(self.flb_calibration, 8, 0, 1, 4)
+        layout.addWidget(self.lbl_calibration_path, 9, 0, 1, 4)
 
         self.setLayout(layout)
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+# ----------------------------------------------------------------------
+# TomoXRD - TomoXRD Collection GUI Software.
+# Author: Christofanis Skordas (skordasc@uchicago.edu)
+# Copyright (C) 2022  GSECARS, The University of Chicago
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ----------------------------------------------------------------------
+
+import numpy as np
+from qtpy.QtCore import QSize, Qt
+from qtpy.QtGui import QImage, QPixmap
+from qtpy.QtWidgets import QGroupBox, QGridLayout
+
+from tomoxrd.model import PathModel
+from tomoxrd.widget.custom import AbstractLabel
+
+
+class FramePreviewWidget(QGroupBox):
+
+    _title: str = "Frame Preview"
+    _image_size: QSize = QSize(260, 260)
+
+    def __init__(self, paths: PathModel) -> None:
+        super(FramePreviewWidget, self).__init__()
+
+        # The assets paths
+        self._paths = paths
+
+        # Labels
+        self.lbl_image = AbstractLabel(object_name="lbl-preview")
+        self.lbl_filename = AbstractLabel("No frame")
+
+        self._configure_frame_preview_groupbox()
+        self._layout_frame_preview()
+
+    def _configure_frame_preview_groupbox(self) -> None:
+        """Base configuration of the frame preview widgets."""
+        # Set groupbox title
+        self.setTitle(self._title)
+
+        self.lbl_image.setFixedSize(self._image_size)
+        self.lbl_image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+    def _layout_frame_preview(self) -> None:
+        layout = QGridLayout()
+        layout.addWidget(self.lbl_image, 0, 0, 1, 1)
+        layout.addWidget(self.lbl_filename, 1, 0, 1, 1, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        layout.setRowStretch(2, 1)
+
+        self.setLayout(layout)
+
+    def update_preview(self, image: np.ndarray, filename: str) -> None:
+        """Shows an 8 bit frame scaled to the preview size."""
+        image = np.ascontiguousarray(image)
+        rows, cols = image.shape
+        # The image is copied, the array can be released after the conversion
+        q_image = QImage(image.data, cols, rows, cols, QImage.Format.Format_Grayscale8).copy()
+        self.lbl_image.setPixmap(
+            QPixmap.fromImage(q_image).scaled(
+                self._image_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+            )
+        )
+        self.lbl_filename.setText(filename)
@@ -19,8 +19,8 @@
 # ----------------------------------------------------------------------
 
 import os
-from qtpy.QtCore import QPoint, QSettings, QSize, Qt, QEvent
-from qtpy.QtGui import QCloseEvent, QIcon
+from qtpy.QtCore import QPoint, QSettings, QSize, Qt, QEvent, Signal
+from qtpy.QtGui import QCloseEvent, QIcon, QPaintEvent
 from qtpy.QtWidgets import (
     QMainWindow,
     QMessageBox,
@@ -29,13 +29,14 @@ from qtpy.QtWidgets import (
 )
 from typing import Optional
 
-from tomoxrd.model import PathModel
+from tomoxrd.model import PathModel, StyleModel
 from tomoxrd.widget import (
     DetectorSettingsWidget,
     FilenameSettingsWidget,
     CollectionSettingsWidget,
     CollectionPointsWidget,
     CollectionStatusWidget,
+    FramePreviewWidget,
 )
 
 
@@ -44,6 +45,9 @@ class MainWidget(QMainWindow):
     The main application window.
     """
 
+    first_painted: Signal = Signal()
+    close_requested: Signal = Signal()
+
     def __init__(self, settings: QSettings, paths: PathModel) -> None:
         super(MainWidget, self).__init__()
 
@@ -56,10 +60,12 @@ class MainWidget(QMainWindow):
         self.collection_settings = CollectionSettingsWidget(paths=self._paths)
         self.collection_points = CollectionPointsWidget(paths=self._paths)
         self.collection_status = CollectionStatusWidget(paths=self._paths)
+        self.frame_preview = FramePreviewWidget(paths=self._paths)
 
         # Event helpers
         self._terminated: bool = False
-        self._workers_finished: bool = False
+        self._closing: bool = False
+        self._painted: bool = False
 
         self._configure_main_frame()
         self._configure_main_widget()
@@ -72,6 +78,7 @@ class MainWidget(QMainWindow):
         layout.addWidget(self.collection_settings, 0, 2, 1, 1)
         layout.addWidget(self.collection_points, 1, 0, 1, 3)
         layout.addWidget(self.collection_status, 2, 0, 1, 3)
+        layout.addWidget(self.frame_preview, 0, 3, 3, 1)
 
         layout.setRowStretch(1, 1)
         layout.setColumnStretch(2, 1)
@@ -91,10 +98,8 @@ class MainWidget(QMainWindow):
             QIcon(os.path.join(self._paths.icon_path, "tomoxrd_icon.png"))
         )
 
-        # Load qss
-        self.setStyleSheet(
-            open(os.path.join(self._paths.qss_path, "main.qss"), "r").read()
-        )
+        # Load the combined qss of the application, parsed once for the whole window
+        self.setStyleSheet(StyleModel(paths=self._paths).stylesheet)
 
         # Set central widget
         self.setCentralWidget(self._central_widget)
@@ -129,6 +134,16 @@ class MainWidget(QMainWindow):
 
     def closeEvent(self, event: QCloseEvent) -> None:
         """Creates a message box for exit confirmation if closeEvent is triggered."""
+        # Close once all the subsystems are stopped
+        if self._terminated:
+            event.accept()
+            return None
+
+        # Already stopping, wait for terminate
+        if self._closing:
+            event.ignore()
+            return None
+
         _msg_question = QMessageBox.question(
             self,
             "Exit confirmation",
@@ -142,15 +157,25 @@ class MainWidget(QMainWindow):
             self._settings.setValue("window_position", self.pos())
             self._settings.setValue("maximized", int(self.windowState()))
 
-            # Make sure that all other threads are aborted before closing.
-            self._terminated = True
-            while not self._workers_finished:
-                continue
+            # Stop all the other threads, the window closes from terminate
+            self._closing = True
+            self.setEnabled(False)
+            self.statusBar().showMessage("Closing")
+            self.close_requested.emit()
 
-            # Close application
-            event.accept()
-        else:
-            event.ignore()
+        event.ignore()
+
+    def terminate(self) -> None:
+        """Closes the window after the shutdown."""
+        self._terminated = True
+        self.close()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """Emits first_painted once, after the window is painted for the first time."""
+        super(MainWidget, self).paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.first_painted.emit()
 
     def changeEvent(self, event: QEvent) -> None:
         """Updates the state of the window on changes"""
@@ -168,10 +193,3 @@ class MainWidget(QMainWindow):
     def terminated(self) -> bool:
         return self._terminated
 
-    @property
-    def workers_finished(self) -> bool:
-        return self._workers_finished
-
-    @workers_finished.setter
-    def workers_finished(self, value: bool) -> None:
-        self._workers_finished = value